@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from jd_resume_evaluator.batch import (
+    JsonlResultWriter,
+    check_batch_args,
+    collect_inputs,
+    make_pairs,
+    make_preranked_pairs,
+    run_batch,
+)
+from jd_resume_evaluator.cli import (
+    add_budget_args,
+    add_cache_args,
+    add_engine_args,
+    budgets_from_args,
+    cache_from_args,
+    engine_config_from_args,
+)
+from jd_resume_evaluator.dedup import find_near_duplicates
+from jd_resume_evaluator.ranking import LexicalIndex
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Evaluate every JD × CV pair in one process and stream reports to disk."
+    )
+    parser.add_argument(
+        "--jobs",
+        nargs="+",
+        required=True,
+        help="JD files, directories, or glob patterns (e.g. 'job_box/*.md').",
+    )
+    parser.add_argument(
+        "--cvs",
+        nargs="+",
+        required=True,
+        help="CV files, directories, or glob patterns (e.g. 'resume_box/').",
+    )
+    add_engine_args(parser)
+    add_budget_args(parser)
+    add_cache_args(parser)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=min(8, os.cpu_count() or 1),
+        help="Worker pool size.",
+    )
+    parser.add_argument(
+        "--executor",
+        default="thread",
+        choices=["thread", "process", "async"],
+        help=(
+            "Worker pool type: thread (I/O-bound LLM calls), process (CPU-bound mock/prep) or "
+            "async (one event loop; LLM calls share a keep-alive connection pool of --workers sockets)."
+        ),
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=None,
+        help="Lexically pre-rank CVs per JD (BM25) and only evaluate the top K.",
+    )
+    parser.add_argument(
+        "--index-dir",
+        default="outputs/cv_index",
+        help="Persistent pre-ranking index directory (updated incrementally; used with --top-k).",
+    )
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=None,
+        help=(
+            "Treat CVs whose estimated shingle similarity (MinHash) to an earlier CV is at least this "
+            "(e.g. 0.9) as near-duplicates and reuse that CV's report instead of evaluating them."
+        ),
+    )
+    parser.add_argument(
+        "--out-dir",
+        default="outputs/jd_resume_batch",
+        help="Directory to write batch outputs into (timestamped subdir).",
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Do not print per-pair progress to stderr.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    budgets = budgets_from_args(args)
+    config = engine_config_from_args(args)
+    try:
+        # Checked before any output exists, so bad flags do not leave an empty results.jsonl behind.
+        check_batch_args(config, workers=args.workers, executor_kind=args.executor)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    jd_paths = collect_inputs(args.jobs)
+    cv_paths = collect_inputs(args.cvs)
+    if args.top_k is not None:
+        index = LexicalIndex.open(Path(args.index_dir))
+        pairs = make_preranked_pairs(jd_paths, cv_paths, index=index, top_k=args.top_k)
+    else:
+        pairs = make_pairs(jd_paths, cv_paths)
+    duplicates = None
+    if args.dedup_threshold is not None:
+        duplicates = find_near_duplicates(
+            cv_paths,
+            threshold=args.dedup_threshold,
+            corpus_dir=budgets.corpus_dir,
+            max_bytes=budgets.stream_threshold_bytes,
+        )
+        print(f"{len(duplicates)} of {len(cv_paths)} CVs are near-duplicates", file=sys.stderr)
+
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    out_dir = Path(args.out_dir) / timestamp
+
+    def progress(done: int, total: int, elapsed: float) -> None:
+        if not args.quiet:
+            rate = done / elapsed if elapsed > 0 else 0.0
+            print(f"[{done}/{total}] {rate:.2f} pairs/sec", file=sys.stderr)
+
+    with JsonlResultWriter(out_dir / "results.jsonl") as writer:
+        summary = run_batch(
+            pairs,
+            budgets=budgets,
+            config=config,
+            workers=args.workers,
+            executor_kind=args.executor,
+            cache=cache_from_args(args),
+            on_result=writer.write,
+            on_progress=progress,
+            duplicates=duplicates,
+        )
+
+    (out_dir / "summary.json").write_text(
+        json.dumps(asdict(summary), ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+    )
+    print(str(out_dir))
+    return 0 if summary.pairs_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable
+
+from benchmarks.synthetic import synthetic_report
+from jd_resume_evaluator.aio_http import HttpProtocolError
+from jd_resume_evaluator.server import _read_request, _write_response
+
+_MAX_BODY_BYTES = 64 * 1024 * 1024
+_COMPLETION_PATHS = ("/chat/completions", "/v1/chat/completions")
+_PROSE = "I'm sorry, but I can't provide a structured evaluation for this candidate without more context."
+
+
+@dataclass(frozen=True)
+class StubConfig:
+    # Latency spec for parse_latency(); applied before every response except injected 429s.
+    latency: str = "lognormal:0.3,0.5"
+    # Per-request fault probabilities (disjoint; their sum must be <= 1).
+    rate_limit_rate: float = 0.0
+    error_rate: float = 0.0
+    malformed_rate: float = 0.0
+    truncated_rate: float = 0.0
+    fenced_rate: float = 0.0
+    retry_after: float = 1.0
+    # Streaming: characters per SSE delta and the pause between deltas.
+    stream_chunk_chars: int = 64
+    stream_chunk_delay: float = 0.002
+    seed: int | None = None
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Sampler of response latencies in seconds from a `kind:params` spec.
+
+    - `fixed:S`, `uniform:LO,HI`, `normal:MEAN,SD` (clamped at 0), `exp:MEAN`
+    - `lognormal:MEDIAN,SIGMA`: the usual long-tailed shape of LLM latencies
+    """
+    kind, _, params = spec.partition(":")
+    try:
+        values = [float(v) for v in params.split(",")] if params else []
+    except ValueError:
+        raise ValueError(f"Invalid latency spec: {spec!r}") from None
+    arity = {"fixed": 1, "uniform": 2, "normal": 2, "exp": 1, "lognormal": 2}
+    if kind not in arity:
+        raise ValueError(f"Unknown latency distribution {kind!r}; expected one of {', '.join(arity)}.")
+    if len(values) != arity[kind] or any(v < 0 for v in values):
+        raise ValueError(f"Latency spec {spec!r} needs {arity[kind]} non-negative number(s).")
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1.0 / values[0]) if values[0] > 0 else 0.0
+    mu = math.log(values[0]) if values[0] > 0 else float("-inf")
+    return lambda rng: rng.lognormvariate(mu, values[1]) if values[0] > 0 else 0.0
+
+
+class LlmStub:
+    """
+    Local OpenAI-compatible `/chat/completions` endpoint for load tests (never calls a real model).
+
+    - Answers with a schema-valid report (benchmarks.synthetic), as one JSON body or, with
+      `"stream": true`, as SSE deltas over a chunked response.
+    - Each request draws one outcome: 429 with `Retry-After`, 500/503, malformed content (prose or
+      broken JSON), content truncated mid-object (`finish_reason: "length"`), fenced JSON, or a
+      clean report. Latency is sampled per request from `StubConfig.latency`.
+    - `usage` is filled from character counts (~4 chars/token). Streams send it as a final chunk with no
+      choices, and only when `stream_options.include_usage` is set (as OpenAI does).
+      `GET /stats` returns the outcome counters.
+    """
+
+    def __init__(self, config: StubConfig) -> None:
+        faults = (
+            config.rate_limit_rate,
+            config.error_rate,
+            config.malformed_rate,
+            config.truncated_rate,
+            config.fenced_rate,
+        )
+        if any(p < 0 for p in faults) or sum(faults) > 1.0:
+            raise ValueError("Fault rates must be >= 0 and sum to at most 1.")
+        if config.stream_chunk_chars < 1:
+            raise ValueError("stream_chunk_chars must be >= 1.")
+        self.config = config
+        self._latency = parse_latency(config.latency)
+        self._rng = random.Random(config.seed)
+        self._report = json.dumps(synthetic_report(), ensure_ascii=False, indent=2)
+        self.outcomes: Counter[str] = Counter()
+        self.started = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "requests": sum(self.outcomes.values()),
+            "outcomes": dict(self.outcomes),
+            "uptime_seconds": round(time.monotonic() - self.started, 3),
+        }
+
+    async def serve(self, host: str, port: int, *, ready: Callable[[int], None] | None = None) -> None:
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await _read_request(reader, _MAX_BODY_BYTES)
+                if request is None:
+                    return
+                if request.path == "/stats":
+                    _write_response(writer, 200, self.stats(), keep_alive=request.keep_alive)
+                elif request.path not in _COMPLETION_PATHS:
+                    _write_response(writer, 404, {"error": f"Unknown path: {request.path}"}, keep_alive=False)
+                    await writer.drain()
+                    return
+                else:
+                    await self._complete(writer, json.loads(request.body or b"{}"), keep_alive=request.keep_alive)
+                await writer.drain()
+                if not request.keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError, HttpProtocolError):
+            return
+        finally:
+            writer.close()
+
+    async def _complete(self, writer: asyncio.StreamWriter, payload: dict, *, keep_alive: bool) -> None:
+        outcome = self._draw_outcome()
+        self.outcomes[outcome] += 1
+        if outcome == "rate_limited":
+            headers = {"Retry-After": f"{self.config.retry_after:g}"}
+            body = {"error": {"message": "Rate limit reached."}}
+            _write_response(writer, 429, body, keep_alive=keep_alive, headers=headers)
+            return
+        await asyncio.sleep(self._latency(self._rng))
+        if outcome == "server_error":
+            status = self._rng.choice((500, 503))
+            _write_response(writer, status, {"error": {"message": "Injected server error."}}, keep_alive=keep_alive)
+            return
+
+        content, finish_reason = self._content(outcome)
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in payload.get("messages") or [])
+        usage = {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_chars // 4 + len(content) // 4,
+        }
+        model = str(payload.get("model") or "stub")
+        if payload.get("stream"):
+            if not (payload.get("stream_options") or {}).get("include_usage"):
+                usage = None
+            await self._stream(writer, content, finish_reason, usage, model=model, keep_alive=keep_alive)
+            return
+        body = {
+            "id": f"stub-{sum(self.outcomes.values())}",
+            "object": "chat.completion",
+            "model": model,
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": finish_reason}
+            ],
+            "usage": usage,
+        }
+        _write_response(writer, 200, body, keep_alive=keep_alive)
+
+    async def _stream(
+        self,
+        writer: asyncio.StreamWriter,
+        content: str,
+        finish_reason: str,
+        usage: dict | None,
+        *,
+        model: str,
+        keep_alive: bool,
+    ) -> None:
+        head = [
+            "HTTP/1.1 200 OK",
+            "Content-Type: text/event-stream",
+            "Transfer-Encoding: chunked",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+
+        def send(event: dict | str) -> None:
+            data = event if isinstance(event, str) else json.dumps(event, ensure_ascii=False)
+            chunk = f"data: {data}\n\n".encode("utf-8")
+            writer.write(f"{len(chunk):x}\r\n".encode("latin-1") + chunk + b"\r\n")
+
+        step = self.config.stream_chunk_chars
+        for start in range(0, len(content), step):
+            delta = {"content": content[start : start + step]}
+            send({"object": "chat.completion.chunk", "model": model, "choices": [{"index": 0, "delta": delta}]})
+            await writer.drain()
+            if self.config.stream_chunk_delay > 0:
+                await asyncio.sleep(self.config.stream_chunk_delay)
+        send(
+            {
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}],
+            }
+        )
+        if usage is not None:
+            send({"object": "chat.completion.chunk", "model": model, "choices": [], "usage": usage})
+        send("[DONE]")
+        writer.write(b"0\r\n\r\n")
+
+    def _draw_outcome(self) -> str:
+        roll = self._rng.random()
+        config = self.config
+        for outcome, rate in (
+            ("rate_limited", config.rate_limit_rate),
+            ("server_error", config.error_rate),
+            ("malformed", config.malformed_rate),
+            ("truncated", config.truncated_rate),
+            ("fenced", config.fenced_rate),
+        ):
+            if roll < rate:
+                return outcome
+            roll -= rate
+        return "ok"
+
+    def _content(self, outcome: str) -> tuple[str, str]:
+        report = self._report
+        if outcome == "malformed":
+            if self._rng.random() < 0.5:
+                return _PROSE, "stop"
+            # A trailing comma: looks like JSON, fails json.loads.
+            return report[: report.rindex("}")].rstrip() + ",\n}", "stop"
+        if outcome == "truncated":
+            return report[: self._rng.randint(1, len(report) - 2)], "length"
+        if outcome == "fenced":
+            return f"Here is the evaluation:\n```json\n{report}\n```\n", "stop"
+        return report, "stop"
+
+
+def start_stub(config: StubConfig, *, host: str = "127.0.0.1", port: int = 0) -> tuple[LlmStub, str]:
+    """Run a stub on a daemon thread (port 0 = any free port); returns it and its `/v1` base URL."""
+    stub = LlmStub(config)
+    bound: list[int] = []
+    ready = threading.Event()
+
+    def on_ready(actual_port: int) -> None:
+        bound.append(actual_port)
+        ready.set()
+
+    thread = threading.Thread(
+        target=lambda: asyncio.run(stub.serve(host, port, ready=on_ready)), name="llm-stub", daemon=True
+    )
+    thread.start()
+    if not ready.wait(10.0):
+        raise RuntimeError("LLM stub did not start listening within 10 seconds.")
+    return stub, f"http://{host}:{bound[0]}/v1"
+
+
+def add_stub_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--latency",
+        default=StubConfig.latency,
+        help=(
+            "Response latency distribution (seconds): fixed:S, uniform:LO,HI, normal:MEAN,SD, exp:MEAN "
+            "or lognormal:MEDIAN,SIGMA."
+        ),
+    )
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered 429.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered 500/503.")
+    parser.add_argument(
+        "--malformed-rate",
+        type=float,
+        default=0.0,
+        help="Share of completions that are prose or broken JSON.",
+    )
+    parser.add_argument(
+        "--truncated-rate",
+        type=float,
+        default=0.0,
+        help="Share of completions cut off mid-object (finish_reason 'length').",
+    )
+    parser.add_argument(
+        "--fenced-rate",
+        type=float,
+        default=0.0,
+        help="Share of completions wrapped in a Markdown ```json fence.",
+    )
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s.")
+    parser.add_argument("--stream-chunk-chars", type=int, default=64, help="Characters per streamed delta.")
+    parser.add_argument(
+        "--stream-chunk-delay",
+        type=float,
+        default=0.002,
+        help="Seconds between streamed deltas.",
+    )
+    parser.add_argument("--stub-seed", type=int, default=None, help="Seed for latency and fault draws.")
+
+
+def stub_config_from_args(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(
+        latency=args.latency,
+        rate_limit_rate=args.rate_limit_rate,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        truncated_rate=args.truncated_rate,
+        fenced_rate=args.fenced_rate,
+        retry_after=args.retry_after,
+        stream_chunk_chars=args.stream_chunk_chars,
+        stream_chunk_delay=args.stream_chunk_delay,
+        seed=args.stub_seed,
+    )
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Local OpenAI-compatible /chat/completions stub with latency and fault injection."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address.")
+    parser.add_argument("--port", type=int, default=8090, help="Bind port.")
+    add_stub_args(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    stub = LlmStub(stub_config_from_args(args))
+    print(f"LLM stub on http://{args.host}:{args.port}/v1 (use as --openai-base-url)", file=sys.stderr)
+    try:
+        asyncio.run(stub.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+
+from benchmarks.llm_stub import add_stub_args, start_stub, stub_config_from_args
+from benchmarks.synthetic import generate_document
+from jd_resume_evaluator.engines import EngineName, evaluate_with_engine
+from jd_resume_evaluator.report import parse_report
+from jd_resume_evaluator.server import _percentiles_ms
+from jd_resume_evaluator.text_prep import InputBudgets, PreparedInputs, prepare_texts, read_text
+
+KB = 1024
+DEFAULT_BUDGETS = InputBudgets(max_jd_chars=60_000, max_cv_chars=140_000, max_prompt_chars=220_000)
+_HTTP_STATUS = re.compile(r"HTTPError (\d{3})")
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Drive evaluate_with_engine() against an OpenAI-compatible endpoint at a fixed concurrency and "
+            "report latency percentiles, throughput and failure rates (JSON output)."
+        )
+    )
+    parser.add_argument(
+        "--base-url",
+        default=None,
+        help="OpenAI-compatible base URL to load (default: start the bundled stub in-process).",
+    )
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY", "stub"), help="API key to send.")
+    parser.add_argument(
+        "--engine",
+        default="openai",
+        choices=[EngineName.openai.value, EngineName.openai_async.value],
+        help="Engine path under test.",
+    )
+    parser.add_argument("--stream", action="store_true", help="Use the streaming path (openai engine).")
+    parser.add_argument("--model", default="stub", help="Model name sent in each request.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests kept in flight.")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests to send.")
+    parser.add_argument("--request-timeout", type=float, default=30.0, help="Per-request timeout in seconds.")
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=3,
+        help="Engine retries (429/5xx for openai_async; off-schema aborts with --stream).",
+    )
+    parser.add_argument("--job", default=None, help="JD file (default: synthetic 4 KB JD).")
+    parser.add_argument("--cv", default=None, help="CV file (default: synthetic CV of --cv-bytes).")
+    parser.add_argument("--cv-bytes", type=int, default=10 * KB, help="Size of the synthetic CV.")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic generator seed.")
+    parser.add_argument("--out", default=None, help="Write results JSON here (default: stdout).")
+    stub = parser.add_argument_group("bundled stub (ignored with --base-url)")
+    add_stub_args(stub)
+    return parser.parse_args(argv)
+
+
+def _prepared(args: argparse.Namespace) -> PreparedInputs:
+    if args.job:
+        jd_text, jd_name = read_text(Path(args.job)), args.job
+    else:
+        jd_text, jd_name = generate_document(4 * KB, kind="jd", seed=args.seed), "<synthetic jd>"
+    if args.cv:
+        cv_text, cv_name = read_text(Path(args.cv)), args.cv
+    else:
+        cv_text, cv_name = generate_document(args.cv_bytes, kind="cv", seed=args.seed), "<synthetic cv>"
+    return prepare_texts(jd_text, cv_text, budgets=DEFAULT_BUDGETS, jd_name=jd_name, cv_name=cv_name)
+
+
+def _classify(error: Exception) -> tuple[str, str | None]:
+    # (outcome, HTTP status) for a failed request.
+    match = _HTTP_STATUS.search(str(error))
+    if isinstance(error, RuntimeError) and match:
+        return "http_error", match.group(1)
+    if isinstance(error, ValueError):
+        return "parse_failure", None
+    return "error", None
+
+
+def run_load(args: argparse.Namespace, base_url: str, prepared: PreparedInputs) -> dict:
+    """
+    Closed-loop load: `concurrency` threads each send their next request as soon as the previous one ends.
+
+    Each request runs the real engine path (HTTP, SSE, JSON extraction, retries) and then the report
+    schema check, so a schema-invalid completion counts as a parse failure like unparseable output does.
+    """
+    engine = EngineName(args.engine)
+    latencies: list[float] = []
+    ok_latencies: list[float] = []
+    outcomes: Counter[str] = Counter()
+    statuses: Counter[str] = Counter()
+    examples: dict[str, str] = {}
+    lock = threading.Lock()
+
+    def one(_: int) -> None:
+        started = time.perf_counter()
+        outcome, status, detail = "ok", None, None
+        try:
+            report_dict, _ = evaluate_with_engine(
+                engine=engine,
+                prepared=prepared,
+                model=args.model,
+                temperature=0.0,
+                openai_base_url=base_url,
+                openai_api_key=args.api_key,
+                request_timeout=args.request_timeout,
+                max_retries=args.max_retries,
+                stream=args.stream,
+            )
+            parse_report(report_dict)
+        except Exception as e:  # noqa: BLE001 - every failure is a data point
+            outcome, status = _classify(e)
+            detail = f"{type(e).__name__}: {e}"[:300]
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            outcomes[outcome] += 1
+            if status is not None:
+                statuses[status] += 1
+            if outcome == "ok":
+                ok_latencies.append(elapsed)
+            elif detail is not None:
+                examples.setdefault(outcome, detail)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one, range(args.requests)))
+    seconds = time.perf_counter() - started
+
+    total = sum(outcomes.values())
+    return {
+        "engine": engine.value,
+        "stream": bool(args.stream),
+        "base_url": base_url,
+        "concurrency": args.concurrency,
+        "requests": total,
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(total / seconds, 3) if seconds > 0 else None,
+        "ok_rps": round(outcomes["ok"] / seconds, 3) if seconds > 0 else None,
+        "latency_ms": _percentiles_ms(latencies),
+        "ok_latency_ms": _percentiles_ms(ok_latencies),
+        "outcomes": dict(outcomes),
+        "parse_failure_rate": round(outcomes["parse_failure"] / total, 4) if total else None,
+        "failure_rate": round((total - outcomes["ok"]) / total, 4) if total else None,
+        "http_statuses": dict(statuses),
+        "error_examples": examples,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    if args.concurrency < 1 or args.requests < 1:
+        raise ValueError("--concurrency and --requests must be >= 1.")
+    if args.stream and args.engine != EngineName.openai.value:
+        raise ValueError("--stream is only supported by --engine openai.")
+
+    stub = None
+    base_url = args.base_url
+    if base_url is None:
+        stub, base_url = start_stub(stub_config_from_args(args))
+    prepared = _prepared(args)
+
+    result = run_load(args, base_url, prepared)
+    if stub is not None:
+        result["stub"] = {"config": asdict(stub.config), **stub.stats()}
+
+    lat = result["latency_ms"]
+    print(
+        f"{result['requests']} requests in {result['seconds']:.2f}s ({result['throughput_rps']} req/s, "
+        f"concurrency {args.concurrency}); p50 {lat['p50']} ms, p95 {lat['p95']} ms, p99 {lat['p99']} ms; "
+        f"outcomes {result['outcomes']}",
+        file=sys.stderr,
+    )
+    data = json.dumps(result, indent=2) + "\n"
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(data, encoding="utf-8")
+    else:
+        sys.stdout.write(data)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import main as cli_main
+from benchmarks.synthetic import generate_document, synthetic_report
+from jd_resume_evaluator.engines import _evaluate_mock
+from jd_resume_evaluator.json_parse import parse_json_object
+from jd_resume_evaluator.report import validate_report_dict
+from jd_resume_evaluator.text_prep import InputBudgets, normalize_text, outline_extract, prepare_inputs
+
+KB = 1024
+MB = 1024 * 1024
+DEFAULT_SIZES = [1 * KB, 10 * KB, 100 * KB, 1 * MB, 10 * MB]
+LANGS = {"ascii": 0.0, "cjk": 0.7}
+DEFAULT_BUDGETS = InputBudgets(max_jd_chars=60_000, max_cv_chars=140_000, max_prompt_chars=220_000)
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Reproducible hot-path benchmarks over synthetic JD/CV inputs (JSON output)."
+    )
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="Comma-separated CV sizes in bytes (e.g. '1024,1048576,104857600' to include 100 MB).",
+    )
+    parser.add_argument(
+        "--langs",
+        default="ascii,cjk",
+        help=f"Comma-separated language mixes: {', '.join(LANGS)}.",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed samples per case (median is reported).")
+    parser.add_argument(
+        "--min-sample-seconds",
+        type=float,
+        default=0.05,
+        help="Loop each sample until it takes at least this long.",
+    )
+    parser.add_argument("--main-runs", type=int, default=20, help="Runs of the full main() path (mock engine).")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic generator seed.")
+    parser.add_argument("--out", default=None, help="Write results JSON here (default: stdout).")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to compare against.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.20,
+        help="Flag a regression when median time exceeds the baseline by more than this fraction.",
+    )
+    return parser.parse_args(argv)
+
+
+def _time(fn: Callable[[], object], *, repeat: int, min_sample_seconds: float) -> dict:
+    # Calibrate loops per sample (like timeit.autorange) so tiny functions are not timer noise.
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_sample_seconds or loops >= 1_000_000:
+            break
+        loops *= 10 if elapsed < min_sample_seconds / 10 else 2
+
+    samples = [elapsed / loops]
+    for _ in range(max(repeat, 1) - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - started) / loops)
+    return {
+        "loops": loops,
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "max_s": max(samples),
+    }
+
+
+def run_benchmarks(args: argparse.Namespace) -> list[dict]:
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    langs = [lang.strip() for lang in args.langs.split(",") if lang.strip()]
+    for lang in langs:
+        if lang not in LANGS:
+            raise ValueError(f"Unknown language mix: {lang}")
+
+    timing = {"repeat": args.repeat, "min_sample_seconds": args.min_sample_seconds}
+    results: list[dict] = []
+
+    def record(name: str, size: int, lang: str, fn: Callable[[], object], nbytes: int | None = None) -> None:
+        stats = _time(fn, **timing)
+        row = {"name": name, "size": size, "lang": lang, **stats}
+        if nbytes:
+            row["mb_per_s"] = (nbytes / MB) / stats["median_s"] if stats["median_s"] > 0 else None
+        results.append(row)
+        print(f"{name:<22} {lang:<5} {size:>11,} B  median {stats['median_s'] * 1e3:10.3f} ms", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        for lang in langs:
+            jd_path = tmp_dir / f"jd_{lang}.md"
+            jd_path.write_text(
+                generate_document(4 * KB, kind="jd", cjk_ratio=LANGS[lang], seed=args.seed), encoding="utf-8"
+            )
+            for size in sizes:
+                cv_text = generate_document(size, kind="cv", cjk_ratio=LANGS[lang], seed=args.seed)
+                cv_path = tmp_dir / f"cv_{lang}_{size}.md"
+                cv_path.write_text(cv_text, encoding="utf-8")
+                nbytes = cv_path.stat().st_size
+                normalized = normalize_text(cv_text)
+                del cv_text
+
+                record(
+                    "prepare_inputs",
+                    size,
+                    lang,
+                    lambda: prepare_inputs(jd_path, cv_path, budgets=DEFAULT_BUDGETS),
+                    nbytes,
+                )
+                record(
+                    "outline_extract",
+                    size,
+                    lang,
+                    lambda: outline_extract(normalized, max_chars=DEFAULT_BUDGETS.max_cv_chars),
+                    nbytes,
+                )
+                prepared = prepare_inputs(jd_path, cv_path, budgets=DEFAULT_BUDGETS)
+                record("evaluate_mock", size, lang, lambda: _evaluate_mock(prepared))
+                del normalized
+                cv_path.unlink()
+
+        for n_items in (8, 64):
+            report = synthetic_report(n_items)
+            raw = json.dumps(report, ensure_ascii=False, indent=2)
+            fenced = f"Here is the report:\n```json\n{raw}\n```\n"
+            size = len(raw.encode("utf-8"))
+            record("parse_json_object", size, "ascii", lambda: parse_json_object(raw))
+            record("parse_json_fenced", size, "ascii", lambda: parse_json_object(fenced))
+            record("validate_report_dict", size, "ascii", lambda: validate_report_dict(report))
+
+        # Full CLI path (mock engine): prep, engine, validation and output writing.
+        jd_path = tmp_dir / "main_jd.md"
+        cv_path = tmp_dir / "main_cv.md"
+        jd_path.write_text(generate_document(4 * KB, kind="jd", seed=args.seed), encoding="utf-8")
+        cv_path.write_text(generate_document(30 * KB, kind="cv", seed=args.seed), encoding="utf-8")
+        argv = ["--job", str(jd_path), "--cv", str(cv_path), "--engine", "mock", "--out-dir", str(tmp_dir / "out")]
+        started = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for _ in range(args.main_runs):
+                cli_main.main(argv)
+        elapsed = time.perf_counter() - started
+        results.append(
+            {
+                "name": "main_mock",
+                "size": 30 * KB,
+                "lang": "ascii",
+                "loops": args.main_runs,
+                "min_s": elapsed / args.main_runs,
+                "median_s": elapsed / args.main_runs,
+                "max_s": elapsed / args.main_runs,
+                "runs_per_s": args.main_runs / elapsed if elapsed > 0 else None,
+            }
+        )
+        print(f"{'main_mock':<22} ascii {30 * KB:>11,} B  {args.main_runs / elapsed:10.1f} runs/s", file=sys.stderr)
+    return results
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> list[dict]:
+    """Return cases whose median time regressed by more than `threshold` versus the baseline."""
+    base = {(r["name"], r["size"], r["lang"]): r for r in baseline}
+    regressions = []
+    for row in results:
+        ref = base.get((row["name"], row["size"], row["lang"]))
+        if ref is None or ref["median_s"] <= 0:
+            continue
+        ratio = row["median_s"] / ref["median_s"]
+        if ratio > 1 + threshold:
+            regressions.append(
+                {
+                    "name": row["name"],
+                    "size": row["size"],
+                    "lang": row["lang"],
+                    "baseline_median_s": ref["median_s"],
+                    "median_s": row["median_s"],
+                    "ratio": round(ratio, 3),
+                }
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    results = run_benchmarks(args)
+    payload = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))["results"]
+        regressions = compare(results, baseline, args.threshold)
+        payload["regressions"] = regressions
+        for reg in regressions:
+            print(
+                f"REGRESSION {reg['name']} {reg['lang']} {reg['size']:,} B: "
+                f"{reg['baseline_median_s'] * 1e3:.3f} ms -> {reg['median_s'] * 1e3:.3f} ms (x{reg['ratio']})",
+                file=sys.stderr,
+            )
+        exit_code = 1 if regressions else 0
+
+    text = json.dumps(payload, ensure_ascii=False, indent=2) + "\n"
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    else:
+        sys.stdout.write(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import random
+
+_ASCII_WORDS = (
+    "python pytorch kubernetes docker llm rag retrieval evaluation pipeline latency throughput "
+    "deployed designed led built improved scaled migrated monitoring observability streaming "
+    "team stakeholders customers platform service api model training inference dataset metrics "
+    "the and with for of to in on at by from as an a"
+).split()
+_CJK_WORDS = "机器学习 工程师 负责 平台 模型 训练 推理 数据 指标 团队 项目 系统 设计 优化 部署 用户 研究 产品".split()
+_KEYWORDS = ["Python", "PyTorch", "Kubernetes", "RAG", "LLM evaluation", "MLOps", "vector search", "A/B testing"]
+
+
+def generate_document(
+    size_bytes: int,
+    *,
+    kind: str = "cv",
+    cjk_ratio: float = 0.0,
+    heading_density: float = 0.08,
+    bullet_density: float = 0.45,
+    seed: int = 0,
+) -> str:
+    """
+    Deterministic synthetic JD/CV Markdown of roughly `size_bytes` UTF-8 bytes.
+
+    - `cjk_ratio`: share of words drawn from a CJK vocabulary (0.0 = pure ASCII).
+    - `heading_density` / `bullet_density`: share of lines that are `##` headings / `-` bullets;
+      the rest are prose lines.
+    - `kind="jd"` sprinkles backticked keywords so JD keyword extraction has signal.
+    """
+    if not 0.0 <= cjk_ratio <= 1.0:
+        raise ValueError("cjk_ratio must be within 0..1.")
+    if heading_density + bullet_density > 1.0:
+        raise ValueError("heading_density + bullet_density must be <= 1.")
+
+    rng = random.Random(seed)
+    lines: list[str] = [f"# Synthetic {kind.upper()} {seed}"]
+    size = len(lines[0].encode("utf-8")) + 1
+    while size < size_bytes:
+        words = []
+        for _ in range(rng.randint(6, 18)):
+            words.append(rng.choice(_CJK_WORDS) if rng.random() < cjk_ratio else rng.choice(_ASCII_WORDS))
+        if kind == "jd" and rng.random() < 0.3:
+            words.insert(rng.randrange(len(words)), f"`{rng.choice(_KEYWORDS)}`")
+        body = " ".join(words)
+
+        roll = rng.random()
+        if roll < heading_density:
+            line = f"## {body[:60]}"
+        elif roll < heading_density + bullet_density:
+            line = f"- {body}"
+        else:
+            line = body[:1].upper() + body[1:] + "."
+        lines.append(line)
+        size += len(line.encode("utf-8")) + 1
+    return "\n".join(lines) + "\n"
+
+
+def synthetic_report(n_items: int = 8) -> dict:
+    """A schema-valid report dict shaped like a real LLM response."""
+    return {
+        "overall_score": 72,
+        "recommend_interview": True,
+        "score_breakdown": {
+            "must_haves": 40,
+            "nice_to_haves": 25,
+            "llm_engineering": 70,
+            "mlops": 55,
+            "system_design": 60,
+            "impact_and_ownership": 65,
+        },
+        "strengths": [
+            {"claim": f"Strength {i}: built retrieval pipelines", "evidence_quotes": [f"Built RAG service {i}"]}
+            for i in range(n_items)
+        ],
+        "gaps": [
+            {"gap": f"Gap {i}", "impact": "Needs validation in interview.", "evidence_quotes": [f"Requires {i}"]}
+            for i in range(n_items)
+        ],
+        "follow_up_questions": [f"Question {i}?" for i in range(max(5, n_items))],
+        "risk_flags": ["Synthetic input."],
+    }
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from jd_resume_evaluator.chunking import prepare_chunked_inputs
+from jd_resume_evaluator.cli import (
+    add_budget_args,
+    add_cache_args,
+    add_engine_args,
+    budgets_from_args,
+    cache_from_args,
+    engine_config_from_args,
+)
+from jd_resume_evaluator.compare import (
+    compare_models,
+    comparison_dict,
+    comparison_markdown,
+    parse_model_specs,
+)
+from jd_resume_evaluator.engines import EngineName
+from jd_resume_evaluator.text_prep import prepare_inputs
+
+_UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Evaluate one JD ↔ CV pair with several models concurrently and diff the reports."
+    )
+    parser.add_argument("--job", required=True, help="Path to the job description (Markdown/text).")
+    parser.add_argument("--cv", required=True, help="Path to the candidate CV/resume (Markdown/text).")
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        required=True,
+        help=(
+            "Models to compare as [engine:]model, e.g. 'gpt-4o-mini openai_async:gpt-4o mock'. "
+            "Without an engine prefix --engine is used."
+        ),
+    )
+    add_engine_args(parser)
+    add_budget_args(parser)
+    add_cache_args(parser)
+    parser.add_argument(
+        "--consensus",
+        type=int,
+        default=None,
+        help=(
+            "Stop once this many models agree on recommend_interview; slower models are cancelled "
+            "and reported as skipped (default: wait for every model)."
+        ),
+    )
+    parser.add_argument(
+        "--out-dir",
+        default="outputs/jd_resume_compare",
+        help="Directory to write comparison outputs into (timestamped subdir).",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    budgets = budgets_from_args(args)
+    config = engine_config_from_args(args)
+    specs = parse_model_specs(args.models, default_engine=EngineName(args.engine))
+
+    # Prepared once; every model sees byte-identical inputs.
+    if budgets.cv_chunking:
+        inputs = prepare_chunked_inputs(Path(args.job), Path(args.cv), budgets=budgets)
+    else:
+        inputs = prepare_inputs(Path(args.job), Path(args.cv), budgets=budgets)
+
+    outcomes, consensus = asyncio.run(
+        compare_models(inputs, specs, config=config, cache=cache_from_args(args), min_agree=args.consensus)
+    )
+    comparison = comparison_dict(outcomes, consensus)
+
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    out_dir = Path(args.out_dir) / timestamp
+    reports_dir = out_dir / "reports"
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "comparison.json").write_text(
+        json.dumps(comparison, ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+    )
+    (out_dir / "comparison.md").write_text(comparison_markdown(comparison), encoding="utf-8")
+    (out_dir / "input_meta.json").write_text(
+        json.dumps(asdict(inputs.meta), ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+    )
+    for outcome in outcomes:
+        if outcome.report is None:
+            continue
+        name = _UNSAFE_FILENAME.sub("_", outcome.label)
+        (reports_dir / f"{name}.json").write_text(
+            json.dumps(outcome.report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+        )
+        (reports_dir / f"{name}.evidence_check.json").write_text(
+            json.dumps(asdict(outcome.evidence), ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+        )
+        if outcome.raw_output is not None:
+            (reports_dir / f"{name}.raw_output.txt").write_text(outcome.raw_output, encoding="utf-8")
+
+    print(str(out_dir))
+    return 0 if any(o.status == "ok" for o in outcomes) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
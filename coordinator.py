@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from jd_resume_evaluator.batch import collect_inputs, make_pairs
+from jd_resume_evaluator.cli import add_budget_args, add_engine_args, budgets_from_args, engine_config_from_args
+from jd_resume_evaluator.work_queue import WorkQueue
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Enqueue every JD × CV pair into a shared work queue for worker.py processes on any number of "
+            "hosts, report queue progress, and export finished results."
+        )
+    )
+    parser.add_argument(
+        "--queue",
+        default="outputs/work_queue.sqlite",
+        help="Queue database (on storage every worker can reach, at the same path).",
+    )
+    parser.add_argument(
+        "--jobs",
+        nargs="+",
+        default=None,
+        help="JD files, directories, or glob patterns to enqueue (with --cvs).",
+    )
+    parser.add_argument(
+        "--cvs",
+        nargs="+",
+        default=None,
+        help="CV files, directories, or glob patterns to enqueue (with --jobs).",
+    )
+    add_engine_args(parser)
+    add_budget_args(parser)
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="Claims per job before it is marked failed (failed evaluations and expired leases both count).",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Return failed jobs to the queue with fresh attempts (they are otherwise never re-run).",
+    )
+    parser.add_argument(
+        "--export",
+        default=None,
+        help="Write the outcomes of finished (done/failed) jobs to this JSONL file, in batch.py's results format.",
+    )
+    args = parser.parse_args(argv)
+    if (args.jobs is None) != (args.cvs is None):
+        parser.error("--jobs and --cvs must be given together.")
+    if args.rpm is not None or args.tpm is not None:
+        parser.error("--rpm/--tpm are enforced per process by the pooled async engine; workers do not use it.")
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    with WorkQueue(Path(args.queue)) as queue:
+        if args.jobs is not None:
+            pairs = make_pairs(collect_inputs(args.jobs), collect_inputs(args.cvs))
+            added = queue.enqueue(
+                pairs,
+                budgets=budgets_from_args(args),
+                config=engine_config_from_args(args),
+                max_attempts=args.max_attempts,
+            )
+            print(f"enqueued {added} new job(s) ({len(pairs) - added} already queued or finished)", file=sys.stderr)
+        if args.retry_failed:
+            print(f"requeued {queue.retry_failed()} failed job(s)", file=sys.stderr)
+        if args.export:
+            out = Path(args.export)
+            out.parent.mkdir(parents=True, exist_ok=True)
+            with out.open("w", encoding="utf-8") as fh:
+                for row in queue.outcomes():
+                    fh.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n")
+        stats = queue.stats()
+    print(json.dumps(stats))
+    return 0 if stats["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
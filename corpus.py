@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict, replace
+from pathlib import Path
+
+from jd_resume_evaluator.batch import collect_inputs
+from jd_resume_evaluator.corpus import PackedCorpus
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Build/update a packed corpus: the normalized text of many CV/JD files in one memory-mapped "
+            "file plus an offset index, read by --corpus-dir in batch.py, rank.py, watch.py and server.py."
+        )
+    )
+    parser.add_argument("--corpus-dir", default="outputs/cv_corpus", help="Corpus directory.")
+    parser.add_argument(
+        "--cvs",
+        nargs="*",
+        default=[],
+        help="CV (or JD) files, directories, or glob patterns to (incrementally) pack.",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Drop packed files that are not among --cvs.",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Rewrite the data file without the text of replaced/removed documents.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    corpus = PackedCorpus.open(Path(args.corpus_dir))
+
+    started = time.perf_counter()
+    summary = corpus.update(collect_inputs(args.cvs) if args.cvs else [], prune=args.prune)
+    if args.compact:
+        compacted = corpus.compact()
+        summary = replace(summary, data_bytes=compacted.data_bytes, dead_bytes=compacted.dead_bytes)
+    print(
+        f"packed +{summary.added} ~{summary.refreshed} -{summary.removed} ({summary.documents} documents, "
+        f"{summary.data_bytes} bytes) in {time.perf_counter() - started:.2f}s",
+        file=sys.stderr,
+    )
+    print(json.dumps(asdict(summary)))
+    corpus.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
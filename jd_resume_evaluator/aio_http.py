@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import asyncio
+import ssl
+from collections import deque
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from jd_resume_evaluator.timing import count, span
+
+
+@dataclass(frozen=True)
+class HttpResponse:
+    status: int
+    headers: dict[str, str]
+    body: bytes
+
+
+class HttpProtocolError(RuntimeError):
+    pass
+
+
+class _StaleConnection(ConnectionError):
+    pass
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+
+    def is_usable(self) -> bool:
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self) -> None:
+        if not self.writer.is_closing():
+            self.writer.close()
+
+
+class AsyncHttpPool:
+    """
+    Minimal asyncio HTTP/1.1 client with persistent (keep-alive) connections to one origin.
+
+    - At most `max_connections` sockets are open at once; callers wait for a free one.
+    - Idle connections are reused, so TLS handshakes are paid once per socket, not per request.
+    - A request that hits a connection error on a reused socket is retried once on a fresh socket
+      (the server may have closed an idle keep-alive connection).
+    """
+
+    def __init__(self, base_url: str, *, max_connections: int = 16, connect_timeout: float = 10.0) -> None:
+        parts = urlsplit(base_url.rstrip("/"))
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {base_url}")
+        if not parts.hostname:
+            raise ValueError(f"URL has no host: {base_url}")
+        if max_connections < 1:
+            raise ValueError("max_connections must be >= 1.")
+
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.base_path = parts.path
+        self._ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        default_port = 443 if parts.scheme == "https" else 80
+        self._host_header = self.host if self.port == default_port else f"{self.host}:{self.port}"
+        self._connect_timeout = connect_timeout
+        self._slots = asyncio.Semaphore(max_connections)
+        self._idle: deque[_Connection] = deque()
+        self._closed = False
+        self.connections_opened = 0
+
+    async def __aenter__(self) -> "AsyncHttpPool":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        self._closed = True
+        while self._idle:
+            self._idle.popleft().close()
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+        timeout: float | None = None,
+    ) -> HttpResponse:
+        if self._closed:
+            raise RuntimeError("AsyncHttpPool is closed.")
+        async with self._slots:
+            return await asyncio.wait_for(self._request_with_reuse(method, path, body, headers or {}), timeout)
+
+    async def _request_with_reuse(
+        self, method: str, path: str, body: bytes | None, headers: dict[str, str]
+    ) -> HttpResponse:
+        conn = await self._acquire()
+        try:
+            return await self._roundtrip(conn, method, path, body, headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            conn.close()
+            if not conn.reused:
+                raise
+        except BaseException:
+            conn.close()
+            raise
+        # Stale keep-alive socket: retry exactly once on a fresh connection.
+        conn = await self._open()
+        try:
+            return await self._roundtrip(conn, method, path, body, headers)
+        except BaseException:
+            conn.close()
+            raise
+
+    async def _acquire(self) -> _Connection:
+        while self._idle:
+            conn = self._idle.pop()
+            if conn.is_usable():
+                conn.reused = True
+                return conn
+            conn.close()
+        return await self._open()
+
+    async def _open(self) -> _Connection:
+        with span("http.connect"):
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(
+                    self.host, self.port, ssl=self._ssl, server_hostname=self.host if self._ssl else None
+                ),
+                self._connect_timeout,
+            )
+        self.connections_opened += 1
+        return _Connection(reader, writer)
+
+    def _release(self, conn: _Connection, keep_alive: bool) -> None:
+        if keep_alive and not self._closed and conn.is_usable():
+            self._idle.append(conn)
+        else:
+            conn.close()
+
+    async def _roundtrip(
+        self, conn: _Connection, method: str, path: str, body: bytes | None, headers: dict[str, str]
+    ) -> HttpResponse:
+        with span("http.ttfb"):
+            await self._send(conn, method, path, body, headers)
+            status, resp_headers = await _read_head(conn.reader)
+        with span("http.body"):
+            payload = await _read_body(conn.reader, resp_headers)
+        count("http.requests")
+        keep_alive = resp_headers.get("connection", "").lower() != "close" and (
+            "content-length" in resp_headers or "chunked" in resp_headers.get("transfer-encoding", "").lower()
+        )
+        self._release(conn, keep_alive)
+        return HttpResponse(status=status, headers=resp_headers, body=payload)
+
+    async def _send(
+        self, conn: _Connection, method: str, path: str, body: bytes | None, headers: dict[str, str]
+    ) -> None:
+        data = body or b""
+        lines = [
+            f"{method} {self.base_path}{path} HTTP/1.1",
+            f"Host: {self._host_header}",
+            "Connection: keep-alive",
+            f"Content-Length: {len(data)}",
+        ]
+        lines.extend(f"{k}: {v}" for k, v in headers.items())
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        conn.writer.write(head + data)
+        await conn.writer.drain()
+
+
+async def _read_head(reader: asyncio.StreamReader) -> tuple[int, dict[str, str]]:
+    status_line = await reader.readline()
+    if not status_line:
+        raise _StaleConnection()
+    parts = status_line.decode("latin-1").split(" ", 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+        raise HttpProtocolError(f"Malformed status line: {status_line!r}")
+    try:
+        status = int(parts[1])
+    except ValueError as e:
+        raise HttpProtocolError(f"Malformed status line: {status_line!r}") from e
+
+    headers: dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise asyncio.IncompleteReadError(partial=b"", expected=None)
+        if line in (b"\r\n", b"\n"):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return status, headers
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: dict[str, str]) -> bytes:
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        chunks: list[bytes] = []
+        async for chunk in iter_chunked(reader):
+            chunks.append(chunk)
+        return b"".join(chunks)
+    if "content-length" in headers:
+        return await reader.readexactly(int(headers["content-length"]))
+    return await reader.read()
+
+
+async def iter_chunked(reader: asyncio.StreamReader):
+    while True:
+        size_line = await reader.readline()
+        if not size_line:
+            raise asyncio.IncompleteReadError(partial=b"", expected=None)
+        size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+        if size == 0:
+            # Consume optional trailers up to the terminating blank line.
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            return
+        yield await reader.readexactly(size)
+        await reader.readexactly(2)
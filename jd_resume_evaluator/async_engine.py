@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+
+from jd_resume_evaluator.aio_http import AsyncHttpPool, HttpResponse
+from jd_resume_evaluator.engines import (
+    EngineConfig,
+    EngineName,
+    EngineResult,
+    _auth_headers,
+    _chat_payload,
+    _completion_parts,
+)
+from jd_resume_evaluator.json_parse import parse_json_object
+from jd_resume_evaluator.rate_limit import RequestScheduler, _retry_after_seconds
+from jd_resume_evaluator.report import validate_report_dict
+from jd_resume_evaluator.text_prep import PreparedInputs
+from jd_resume_evaluator.timing import count, span
+
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+# TPM charge for the completion until the provider reports real usage (the payload sets no max_tokens).
+_EXPECTED_COMPLETION_TOKENS = 1_000
+
+
+class OpenAIHTTPError(RuntimeError):
+    def __init__(self, status: int, detail: str) -> None:
+        super().__init__(f"OpenAI HTTPError {status}: {detail}")
+        self.status = status
+
+
+class AsyncOpenAIEngine:
+    """
+    asyncio OpenAI-compatible engine sharing one keep-alive connection pool.
+
+    - `max_in_flight` caps concurrent requests (and therefore open sockets).
+    - `request_timeout` bounds each attempt, not the whole retry sequence.
+    - 429/5xx responses, timeouts and connection errors are retried up to `max_retries` times with
+      full-jitter exponential backoff; a `Retry-After` header is honoured when present.
+    - Every attempt goes through a RequestScheduler: RPM/TPM budgets, priority order and a concurrency
+      limit that adapts (up to `max_in_flight`) to latency and rate-limit responses.
+    """
+
+    def __init__(
+        self,
+        *,
+        base_url: str,
+        api_key: str,
+        max_in_flight: int = 8,
+        request_timeout: float = 120.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        prompt_layout: str = "classic",
+        response_format: str = "none",
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+    ) -> None:
+        if not api_key:
+            raise ValueError("api_key is required for the async OpenAI engine.")
+        if max_retries < 0:
+            raise ValueError("max_retries must be >= 0.")
+        self._pool = AsyncHttpPool(base_url, max_connections=max_in_flight)
+        self.base_url = base_url
+        self.scheduler = RequestScheduler(
+            max_concurrency=max_in_flight,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+        )
+        self._api_key = api_key
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.prompt_layout = prompt_layout
+        self.response_format = response_format
+        self.retries = 0
+
+    @classmethod
+    def from_config(cls, config: EngineConfig, *, max_in_flight: int) -> "AsyncOpenAIEngine | None":
+        """Shared engine for long-lived callers; None for engines that do not call the network."""
+        if config.engine not in (EngineName.openai, EngineName.openai_async):
+            return None
+        if config.stream:
+            raise ValueError("Streaming is not supported by the pooled async engine.")
+        if not config.openai_base_url:
+            raise ValueError(f"openai_base_url is required for --engine {config.engine.value}.")
+        return cls(
+            base_url=config.openai_base_url,
+            api_key=config.openai_api_key or "",
+            max_in_flight=max_in_flight,
+            request_timeout=config.request_timeout,
+            max_retries=config.max_retries,
+            prompt_layout=config.prompt_layout,
+            response_format=config.response_format,
+            requests_per_minute=config.requests_per_minute,
+            tokens_per_minute=config.tokens_per_minute,
+        )
+
+    async def __aenter__(self) -> "AsyncOpenAIEngine":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._pool.aclose()
+
+    @property
+    def connections_opened(self) -> int:
+        return self._pool.connections_opened
+
+    async def evaluate(self, prepared: PreparedInputs, *, model: str, temperature: float) -> EngineResult:
+        payload = _chat_payload(
+            prepared,
+            model=model,
+            temperature=temperature,
+            prompt_layout=self.prompt_layout,
+            response_format=self.response_format,
+        )
+        meta = prepared.meta
+        tokens = (meta.prompt_tokens_estimate or meta.prompt_chars_estimate // 4) + _EXPECTED_COMPLETION_TOKENS
+        body = await self.post_json("/chat/completions", payload, tokens=tokens)
+        content, usage = _completion_parts(body)
+        self.scheduler.settle(tokens, usage.get("total_tokens") or 0)
+        with span("parse_json_object"):
+            report_dict = parse_json_object(content, accept=validate_report_dict)
+        return EngineResult(report_dict=report_dict, raw_output=content)
+
+    async def post_json(self, path: str, payload: dict, *, tokens: int = 0) -> str:
+        """POST with retries; each attempt is admitted by the scheduler and charged `tokens` of TPM."""
+        data = json.dumps(payload).encode("utf-8")
+        headers = _auth_headers(self._api_key)
+        attempt = 0
+        while True:
+            grant = await self.scheduler.acquire(tokens)
+            try:
+                resp = await self._pool.request(
+                    "POST", path, body=data, headers=headers, timeout=self.request_timeout
+                )
+            except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError, OSError):
+                self.scheduler.release(grant, status=None, headers=None)
+                if attempt >= self.max_retries:
+                    raise
+                await self._sleep_before_retry(attempt, None)
+                attempt += 1
+                continue
+            except BaseException:
+                # Cancelled (or a protocol error): not a signal about provider load.
+                self.scheduler.release(grant, status=None, headers=None, sent=False)
+                raise
+            self.scheduler.release(grant, status=resp.status, headers=resp.headers)
+
+            if resp.status == 200:
+                return resp.body.decode("utf-8")
+
+            error = OpenAIHTTPError(resp.status, resp.body.decode("utf-8", errors="replace"))
+            if resp.status not in RETRYABLE_STATUSES or attempt >= self.max_retries:
+                raise error
+            await self._sleep_before_retry(attempt, resp)
+            attempt += 1
+
+    async def _sleep_before_retry(self, attempt: int, resp: HttpResponse | None) -> None:
+        self.retries += 1
+        count("http.retries")
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2**attempt)))
+        retry_after = _retry_after_seconds(resp.headers) if resp is not None else None
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        await asyncio.sleep(delay)
+
+
+def evaluate_openai_async_once(
+    *,
+    prepared: PreparedInputs,
+    model: str,
+    temperature: float,
+    base_url: str,
+    api_key: str,
+    request_timeout: float,
+    max_retries: int,
+    prompt_layout: str = "classic",
+    response_format: str = "none",
+) -> EngineResult:
+    async def run() -> EngineResult:
+        async with AsyncOpenAIEngine(
+            base_url=base_url,
+            api_key=api_key,
+            max_in_flight=1,
+            request_timeout=request_timeout,
+            max_retries=max_retries,
+            prompt_layout=prompt_layout,
+            response_format=response_format,
+        ) as engine:
+            return await engine.evaluate(prepared, model=model, temperature=temperature)
+
+    return asyncio.run(run())
@@ -0,0 +1,555 @@
+from __future__ import annotations
+
+import asyncio
+import glob
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Iterable
+
+from jd_resume_evaluator.async_engine import AsyncOpenAIEngine
+from jd_resume_evaluator.cache import ResponseCache, evaluate_with_cache, evaluate_with_cache_async
+from jd_resume_evaluator.chunking import (
+    ChunkedInputs,
+    evaluate_chunked,
+    evaluate_chunked_async,
+    prepare_chunked_inputs,
+)
+from jd_resume_evaluator.dedup import NearDuplicate
+from jd_resume_evaluator.engines import EngineConfig, EngineName, evaluate_with_engine
+from jd_resume_evaluator.evidence import EvidenceCheck, check_evidence, retry_unverified, retry_unverified_async
+from jd_resume_evaluator.ranking import LexicalIndex
+from jd_resume_evaluator.rate_limit import Priority, request_priority
+from jd_resume_evaluator.report import parse_report, validate_report_dict
+from jd_resume_evaluator.text_prep import (
+    InputBudgets,
+    InputMeta,
+    PreparedInputCache,
+    normalize_text,
+    prepare_inputs,
+    read_text,
+)
+from jd_resume_evaluator.timing import TimingRecorder, recording
+
+INPUT_SUFFIXES = (".md", ".markdown", ".txt")
+
+# Per-process: shared by thread/async workers; each process-pool worker gets its own.
+_PREP_CACHE = PreparedInputCache()
+
+
+@dataclass(frozen=True)
+class BatchPair:
+    jd_path: str
+    cv_path: str
+    prerank_score: float | None = None
+
+
+@dataclass(frozen=True)
+class PairOutcome:
+    jd_path: str
+    cv_path: str
+    ok: bool
+    seconds: float
+    report: dict | None = None
+    input_meta: dict | None = None
+    raw_output: str | None = None
+    error: str | None = None
+    cache_hit: bool = False
+    prerank_score: float | None = None
+    usage: dict | None = None
+    evidence: dict | None = None
+    # Model outputs that only parsed after JSON repair, and requests re-sent (HTTP retries, stream aborts).
+    json_repairs: int = 0
+    retries: int = 0
+    # Set when the report was reused from the near-duplicate CV `duplicate_of` instead of evaluated.
+    duplicate_of: str | None = None
+    duplicate_similarity: float | None = None
+
+
+@dataclass(frozen=True)
+class BatchSummary:
+    pairs_total: int
+    pairs_ok: int
+    pairs_failed: int
+    seconds: float
+    pairs_per_sec: float
+    cache_hits: int = 0
+    cache_misses: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    quotes_total: int = 0
+    quotes_unverified: int = 0
+    json_repairs: int = 0
+    retries: int = 0
+    pairs_deduplicated: int = 0
+
+
+def collect_inputs(specs: Iterable[str]) -> list[Path]:
+    """
+    Expand CLI input specs into a sorted, de-duplicated list of files.
+
+    - Directories contribute their Markdown/text files (non-recursive).
+    - Anything else is treated as a glob pattern (a plain path matches itself).
+    """
+    found: dict[str, Path] = {}
+    for spec in specs:
+        path = Path(spec)
+        if path.is_dir():
+            candidates = [p for p in path.iterdir() if p.is_file() and p.suffix.lower() in INPUT_SUFFIXES]
+        else:
+            candidates = [Path(p) for p in glob.glob(spec, recursive=True) if Path(p).is_file()]
+        if not candidates:
+            raise ValueError(f"No input files matched: {spec}")
+        for cand in candidates:
+            found.setdefault(str(cand), cand)
+    return [found[k] for k in sorted(found)]
+
+
+def make_pairs(jd_paths: list[Path], cv_paths: list[Path]) -> list[BatchPair]:
+    # JD-major order keeps consecutive pairs on the same JD (friendlier to any per-JD caching).
+    return [BatchPair(jd_path=str(jd), cv_path=str(cv)) for jd in jd_paths for cv in cv_paths]
+
+
+def make_preranked_pairs(
+    jd_paths: list[Path], cv_paths: list[Path], *, index: LexicalIndex, top_k: int
+) -> list[BatchPair]:
+    """Pair each JD only with its top-K CVs by BM25 (the index is updated incrementally first)."""
+    index.update(cv_paths)
+    pairs: list[BatchPair] = []
+    for jd in jd_paths:
+        jd_text = normalize_text(read_text(jd))
+        for ranked in index.rank(jd_text, top_k=top_k, among=cv_paths):
+            pairs.append(BatchPair(jd_path=str(jd), cv_path=ranked.path, prerank_score=ranked.score))
+    return pairs
+
+
+def evaluate_pair(
+    pair: BatchPair, budgets: InputBudgets, config: EngineConfig, cache: ResponseCache | None = None
+) -> PairOutcome:
+    # Module-level so it can be pickled into a ProcessPoolExecutor.
+    started = time.perf_counter()
+    try:
+        if budgets.cv_chunking:
+            inputs = prepare_chunked_inputs(Path(pair.jd_path), Path(pair.cv_path), budgets, _PREP_CACHE)
+
+            def evaluate(pair_cache: ResponseCache | None) -> tuple[dict, str | None, bool]:
+                result = evaluate_chunked(inputs, config=config, cache=pair_cache)
+                return result.report_dict, result.raw_output, result.cache_hit
+
+        else:
+            inputs = prepare_inputs(Path(pair.jd_path), Path(pair.cv_path), budgets=budgets, cache=_PREP_CACHE)
+
+            def evaluate(pair_cache: ResponseCache | None) -> tuple[dict, str | None, bool]:
+                result = evaluate_with_cache(
+                    pair_cache,
+                    engine=config.engine,
+                    prepared=inputs,
+                    model=config.model,
+                    temperature=config.temperature,
+                    openai_base_url=config.openai_base_url,
+                    openai_api_key=config.openai_api_key,
+                    request_timeout=config.request_timeout,
+                    max_retries=config.max_retries,
+                    stream=config.stream,
+                    prompt_layout=config.prompt_layout,
+                    response_format=config.response_format,
+                )
+                return result.report_dict, result.raw_output, result.cache_hit
+
+        with recording() as recorder:
+            report_dict, raw_output, cache_hit = evaluate(cache)
+            validate_report_dict(report_dict)
+            # Retries bypass the cache: replaying the cached report would not change its quotes.
+            report_dict, raw_output, evidence = retry_unverified(
+                report_dict,
+                raw_output,
+                jd_text=inputs.jd_text,
+                cv_text=inputs.cv_text,
+                retries=_evidence_retries(config),
+                reevaluate=lambda: evaluate(None)[:2],
+            )
+        return _finish_pair(
+            pair, started, inputs.meta, report_dict, raw_output, cache_hit, evidence=evidence, recorder=recorder
+        )
+    except Exception as e:  # noqa: BLE001 - one bad pair must not abort the batch
+        return _failed_pair(pair, started, e)
+
+
+async def _evaluate_pair_async(
+    pair: BatchPair,
+    budgets: InputBudgets,
+    config: EngineConfig,
+    engine: AsyncOpenAIEngine | None,
+    cache: ResponseCache | None,
+) -> PairOutcome:
+    started = time.perf_counter()
+    try:
+        prepare = prepare_chunked_inputs if budgets.cv_chunking else prepare_inputs
+        inputs = await asyncio.to_thread(prepare, Path(pair.jd_path), Path(pair.cv_path), budgets, _PREP_CACHE)
+        if engine is None:
+            # Mock engine: runs in a thread, never cached, and deterministic (no evidence retries).
+            if isinstance(inputs, ChunkedInputs):
+                result = await asyncio.to_thread(evaluate_chunked, inputs, config=config)
+                report_dict, raw_output = result.report_dict, result.raw_output
+            else:
+                report_dict, raw_output = await asyncio.to_thread(
+                    evaluate_with_engine,
+                    engine=config.engine,
+                    prepared=inputs,
+                    model=config.model,
+                    temperature=config.temperature,
+                )
+            validate_report_dict(report_dict)
+            evidence = check_evidence(report_dict, jd_text=inputs.jd_text, cv_text=inputs.cv_text)
+            return _finish_pair(pair, started, inputs.meta, report_dict, raw_output, evidence=evidence)
+
+        async def evaluate(pair_cache: ResponseCache | None) -> tuple[dict, str | None, bool]:
+            if isinstance(inputs, ChunkedInputs):
+                result = await evaluate_chunked_async(
+                    inputs, engine, cache=pair_cache, model=config.model, temperature=config.temperature
+                )
+            else:
+                result = await evaluate_with_cache_async(
+                    pair_cache, engine, prepared=inputs, model=config.model, temperature=config.temperature
+                )
+            return result.report_dict, result.raw_output, result.cache_hit
+
+        async def reevaluate() -> tuple[dict, str | None]:
+            return (await evaluate(None))[:2]
+
+        with recording() as recorder:
+            report_dict, raw_output, cache_hit = await evaluate(cache)
+            validate_report_dict(report_dict)
+            report_dict, raw_output, evidence = await retry_unverified_async(
+                report_dict,
+                raw_output,
+                jd_text=inputs.jd_text,
+                cv_text=inputs.cv_text,
+                retries=config.evidence_retries,
+                reevaluate=reevaluate,
+            )
+        return _finish_pair(
+            pair, started, inputs.meta, report_dict, raw_output, cache_hit, evidence=evidence, recorder=recorder
+        )
+    except Exception as e:  # noqa: BLE001 - one bad pair must not abort the batch
+        return _failed_pair(pair, started, e)
+
+
+def _finish_pair(
+    pair: BatchPair,
+    started: float,
+    meta: InputMeta,
+    report_dict: dict,
+    raw_output: str | None,
+    cache_hit: bool = False,
+    evidence: EvidenceCheck | None = None,
+    recorder: TimingRecorder | None = None,
+) -> PairOutcome:
+    report = parse_report(report_dict)
+    return PairOutcome(
+        jd_path=pair.jd_path,
+        cv_path=pair.cv_path,
+        prerank_score=pair.prerank_score,
+        ok=True,
+        seconds=time.perf_counter() - started,
+        report=asdict(report),
+        input_meta=asdict(meta),
+        raw_output=raw_output,
+        cache_hit=cache_hit,
+        usage=_usage(recorder) if recorder is not None else None,
+        evidence=evidence.summary() if evidence is not None else None,
+        json_repairs=int(recorder.counters.get("json.repairs", 0)) if recorder is not None else 0,
+        retries=_retries(recorder) if recorder is not None else 0,
+    )
+
+
+def _evidence_retries(config: EngineConfig) -> int:
+    # The mock engine is deterministic, so asking it again cannot help.
+    return 0 if config.engine == EngineName.mock else config.evidence_retries
+
+
+def _usage(recorder: TimingRecorder) -> dict | None:
+    # Token usage reported by the provider for this pair (None for mock runs and cache hits).
+    usage = {k.split(".", 1)[1]: int(v) for k, v in recorder.counters.items() if k.startswith("usage.")}
+    return usage or None
+
+
+def _retries(recorder: TimingRecorder) -> int:
+    return int(sum(recorder.counters.get(name, 0) for name in ("http.retries", "stream.schema_aborts")))
+
+
+def _failed_pair(pair: BatchPair, started: float, error: Exception) -> PairOutcome:
+    return PairOutcome(
+        jd_path=pair.jd_path,
+        cv_path=pair.cv_path,
+        prerank_score=pair.prerank_score,
+        ok=False,
+        seconds=time.perf_counter() - started,
+        error=f"{type(error).__name__}: {error}",
+    )
+
+
+class _DuplicateLinks:
+    """
+    Holds back pairs whose CV is a near-duplicate and answers them from their canonical CV's pair.
+
+    - A pair is held only when the same JD is also paired with the canonical CV (pre-ranking may
+      pick just one of the two); otherwise it is evaluated as usual.
+    - When the canonical pair succeeds, each held pair becomes an outcome reusing its report. When it
+      fails, the held pairs are handed back to be evaluated on their own.
+    - CV paths are matched resolved, as dedup keys them: pre-ranked pairs carry the index's resolved
+      paths, plain pairs the paths as given.
+    """
+
+    def __init__(self, pairs: list[BatchPair], duplicates: dict[str, NearDuplicate] | None) -> None:
+        self.to_run: list[BatchPair] = []
+        self._held: dict[tuple[str, str], list[tuple[BatchPair, NearDuplicate]]] = {}
+        planned = {(p.jd_path, _resolved(p.cv_path)) for p in pairs}
+        for pair in pairs:
+            dup = duplicates.get(_resolved(pair.cv_path)) if duplicates else None
+            if dup is not None and (pair.jd_path, dup.duplicate_of) in planned:
+                self._held.setdefault((pair.jd_path, dup.duplicate_of), []).append((pair, dup))
+            else:
+                self.to_run.append(pair)
+
+    def resolve(self, outcome: PairOutcome) -> tuple[list[PairOutcome], list[BatchPair]]:
+        """(linked outcomes, pairs to evaluate after all) for a finished pair."""
+        held = self._held.pop((outcome.jd_path, _resolved(outcome.cv_path)), [])
+        if not outcome.ok:
+            return [], [pair for pair, _ in held]
+        linked = [
+            PairOutcome(
+                jd_path=pair.jd_path,
+                cv_path=pair.cv_path,
+                prerank_score=pair.prerank_score,
+                ok=True,
+                seconds=0.0,
+                report=outcome.report,
+                duplicate_of=dup.duplicate_of,
+                duplicate_similarity=dup.similarity,
+            )
+            for pair, dup in held
+        ]
+        return linked, []
+
+
+def _resolved(path: str) -> str:
+    return str(Path(path).resolve())
+
+
+class JsonlResultWriter:
+    """Write one compact JSON line per finished pair and flush immediately."""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._fh = path.open("w", encoding="utf-8")
+
+    def write(self, outcome: PairOutcome) -> None:
+        line = json.dumps(asdict(outcome), ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._fh.write(line + "\n")
+            self._fh.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._fh.close()
+
+    def __enter__(self) -> "JsonlResultWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def _make_executor(kind: str, workers: int) -> Executor:
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=workers)
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    raise ValueError(f"Unknown executor kind: {kind}")
+
+
+_EXECUTOR_KINDS = ("thread", "process", "async")
+
+
+def check_batch_args(config: EngineConfig, *, workers: int, executor_kind: str) -> None:
+    """
+    Raise ValueError for settings run_batch() cannot run with.
+
+    - Call it before creating any output, so bad flags do not leave an empty results file behind.
+    - run_batch() calls it too, for library callers.
+    """
+    if workers < 1:
+        raise ValueError("workers must be >= 1.")
+    if executor_kind not in _EXECUTOR_KINDS:
+        raise ValueError(f"Unknown executor kind: {executor_kind}")
+    for flag, value in (("--rpm", config.requests_per_minute), ("--tpm", config.tokens_per_minute)):
+        if value is not None and value <= 0:
+            raise ValueError(f"{flag} must be > 0.")
+    rate_limited = config.requests_per_minute is not None or config.tokens_per_minute is not None
+    if rate_limited and executor_kind != "async" and config.engine != EngineName.mock:
+        raise ValueError("--rpm/--tpm are enforced by the pooled async engine; use --executor async.")
+    if config.stream and config.engine != EngineName.openai:
+        raise ValueError("Streaming is only supported by --engine openai.")
+    if config.stream and executor_kind == "async":
+        raise ValueError("Streaming is not supported with --executor async; use thread or process.")
+    if config.engine in (EngineName.openai, EngineName.openai_async):
+        if not config.openai_api_key:
+            raise ValueError(f"OPENAI_API_KEY is required for --engine {config.engine.value}.")
+        if not config.openai_base_url:
+            raise ValueError(f"openai_base_url is required for --engine {config.engine.value}.")
+
+
+def run_batch(
+    pairs: list[BatchPair],
+    *,
+    budgets: InputBudgets,
+    config: EngineConfig,
+    workers: int,
+    executor_kind: str = "thread",
+    cache: ResponseCache | None = None,
+    on_result: Callable[[PairOutcome], None],
+    on_progress: Callable[[int, int, float], None] | None = None,
+    duplicates: dict[str, NearDuplicate] | None = None,
+) -> BatchSummary:
+    """
+    Evaluate `pairs` on a worker pool, reporting each outcome to `on_result` as it finishes.
+
+    With `duplicates` (from dedup.find_near_duplicates), pairs of a near-duplicate CV reuse the report
+    of the same JD's pair with the canonical CV instead of being evaluated.
+    """
+    check_batch_args(config, workers=workers, executor_kind=executor_kind)
+    if executor_kind == "async":
+        return asyncio.run(
+            _run_batch_async(
+                pairs,
+                budgets=budgets,
+                config=config,
+                concurrency=workers,
+                cache=cache,
+                on_result=on_result,
+                on_progress=on_progress,
+                duplicates=duplicates,
+            )
+        )
+
+    started = time.perf_counter()
+    counts = _Counts(cache_enabled=cache is not None and config.engine != EngineName.mock)
+    links = _DuplicateLinks(pairs, duplicates)
+    pending = deque(links.to_run)
+    # Bound the number of queued futures so huge pair lists don't sit in memory as pending work.
+    max_pending = workers * 4
+
+    def finish(outcome: PairOutcome) -> None:
+        linked, requeued = links.resolve(outcome)
+        pending.extend(requeued)
+        for done in (outcome, *linked):
+            on_result(done)
+            counts.add(done)
+            if on_progress is not None:
+                on_progress(counts.done, len(pairs), time.perf_counter() - started)
+
+    with _make_executor(executor_kind, workers) as pool:
+        in_flight: set[Future[PairOutcome]] = set()
+        while True:
+            while pending and len(in_flight) < max_pending:
+                in_flight.add(pool.submit(evaluate_pair, pending.popleft(), budgets, config, cache))
+            if not in_flight:
+                break
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                finish(fut.result())
+
+    return counts.summary(len(pairs), time.perf_counter() - started)
+
+
+async def _run_batch_async(
+    pairs: list[BatchPair],
+    *,
+    budgets: InputBudgets,
+    config: EngineConfig,
+    concurrency: int,
+    cache: ResponseCache | None,
+    on_result: Callable[[PairOutcome], None],
+    on_progress: Callable[[int, int, float], None] | None,
+    duplicates: dict[str, NearDuplicate] | None = None,
+) -> BatchSummary:
+    # LLM calls share one pooled AsyncOpenAIEngine; `concurrency` caps requests in flight.
+    engine = AsyncOpenAIEngine.from_config(config, max_in_flight=concurrency)
+
+    started = time.perf_counter()
+    counts = _Counts(cache_enabled=cache is not None and config.engine != EngineName.mock)
+    links = _DuplicateLinks(pairs, duplicates)
+    pending = deque(links.to_run)
+
+    async def worker() -> None:
+        while pending:
+            with request_priority(Priority.bulk):
+                outcome = await _evaluate_pair_async(pending.popleft(), budgets, config, engine, cache)
+            linked, requeued = links.resolve(outcome)
+            pending.extend(requeued)
+            for done in (outcome, *linked):
+                on_result(done)
+                counts.add(done)
+                if on_progress is not None:
+                    on_progress(counts.done, len(pairs), time.perf_counter() - started)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        if engine is not None:
+            await engine.aclose()
+    return counts.summary(len(pairs), time.perf_counter() - started)
+
+
+@dataclass
+class _Counts:
+    cache_enabled: bool
+    done: int = 0
+    ok: int = 0
+    cache_hits: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    quotes_total: int = 0
+    quotes_unverified: int = 0
+    json_repairs: int = 0
+    retries: int = 0
+    deduplicated: int = 0
+
+    def add(self, outcome: PairOutcome) -> None:
+        self.done += 1
+        self.deduplicated += int(outcome.duplicate_of is not None)
+        self.ok += int(outcome.ok)
+        self.cache_hits += int(outcome.cache_hit)
+        self.json_repairs += outcome.json_repairs
+        self.retries += outcome.retries
+        if outcome.usage:
+            self.prompt_tokens += outcome.usage.get("prompt_tokens", 0)
+            self.cached_tokens += outcome.usage.get("cached_tokens", 0)
+        if outcome.evidence:
+            self.quotes_total += outcome.evidence["quotes_total"]
+            self.quotes_unverified += outcome.evidence["quotes_unverified"]
+
+    def summary(self, total: int, elapsed: float) -> BatchSummary:
+        return BatchSummary(
+            pairs_total=total,
+            pairs_ok=self.ok,
+            pairs_failed=total - self.ok,
+            seconds=elapsed,
+            pairs_per_sec=(total / elapsed) if elapsed > 0 else 0.0,
+            cache_hits=self.cache_hits,
+            cache_misses=(self.done - self.cache_hits - self.deduplicated) if self.cache_enabled else 0,
+            prompt_tokens=self.prompt_tokens,
+            cached_tokens=self.cached_tokens,
+            quotes_total=self.quotes_total,
+            quotes_unverified=self.quotes_unverified,
+            json_repairs=self.json_repairs,
+            retries=self.retries,
+            pairs_deduplicated=self.deduplicated,
+        )
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from jd_resume_evaluator.async_engine import AsyncOpenAIEngine
+from jd_resume_evaluator.engines import EngineName, evaluate_with_engine
+from jd_resume_evaluator.prompting import build_system_prompt, build_user_prompt
+from jd_resume_evaluator.report import validate_report_dict
+from jd_resume_evaluator.text_prep import PreparedInputs
+from jd_resume_evaluator.timing import span
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+
+@dataclass(frozen=True)
+class CachedEvaluation:
+    report_dict: dict
+    raw_output: str | None
+    cache_hit: bool
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of LLM responses.
+
+    - Key: sha256 over endpoint base URL, model, temperature, system prompt and user prompt (so any
+      prompt/input change, or the same model name on another server, is a new entry; nothing needs
+      explicit invalidation).
+    - Value: one JSON file per key under `root/<key[:2]>/<key>.json` holding the raw content and the
+      parsed report dict.
+    - Eviction: entries older than `max_age_seconds` are dropped on read; when the total size exceeds
+      `max_bytes`, least-recently-used entries (by mtime, refreshed on hit) are deleted.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        max_bytes: int = 512 * 1024 * 1024,
+        max_age_seconds: float | None = None,
+    ) -> None:
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be > 0.")
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None
+
+    def __getstate__(self) -> dict:
+        # Picklable for process pools; each process keeps its own counters.
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["stats"] = CacheStats()
+        state["_total_bytes"] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        *,
+        model: str,
+        temperature: float,
+        system_prompt: str,
+        user_prompt: str,
+        response_format: str = "none",
+        base_url: str | None = None,
+    ) -> str:
+        material = json.dumps(
+            [(base_url or "").rstrip("/"), model, float(temperature), system_prompt, user_prompt, response_format],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def key_for(
+        self,
+        prepared: PreparedInputs,
+        *,
+        model: str,
+        temperature: float,
+        prompt_layout: str = "classic",
+        response_format: str = "none",
+        base_url: str | None = None,
+    ) -> str:
+        return self.make_key(
+            model=model,
+            temperature=temperature,
+            system_prompt=build_system_prompt(),
+            user_prompt=build_user_prompt(prepared, layout=prompt_layout),
+            response_format=response_format,
+            base_url=base_url,
+        )
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> tuple[dict, str | None] | None:
+        path = self._path(key)
+        try:
+            st = path.stat()
+            if self.max_age_seconds is not None and time.time() - st.st_mtime > self.max_age_seconds:
+                self._remove(path, st.st_size)
+                self._count(misses=1)
+                return None
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            report_dict, raw_output = entry["report_dict"], entry.get("raw_output")
+        except FileNotFoundError:
+            self._count(misses=1)
+            return None
+        except (UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError):
+            # A torn or foreign entry: drop it so the next put() can replace it.
+            self._remove(path, st.st_size)
+            self._count(misses=1)
+            return None
+        os.utime(path)
+        self._count(hits=1)
+        return report_dict, raw_output
+
+    def put(self, key: str, report_dict: dict, raw_output: str | None) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(
+            {"report_dict": report_dict, "raw_output": raw_output, "created_at": time.time()},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        try:
+            # Overwriting an entry (concurrent miss on the same key) replaces its bytes, not adds to them.
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp, path)
+        with self._lock:
+            self.stats.writes += 1
+            if self._total_bytes is not None:
+                self._total_bytes += len(data) - replaced
+        self._evict_if_needed()
+
+    def _count(self, *, hits: int = 0, misses: int = 0) -> None:
+        with self._lock:
+            self.stats.hits += hits
+            self.stats.misses += misses
+
+    def _remove(self, path: Path, size: int) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self.stats.evictions += 1
+            if self._total_bytes is not None:
+                self._total_bytes -= size
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.root.glob("??/*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _evict_if_needed(self) -> None:
+        with self._lock:
+            total = self._total_bytes
+        if total is None:
+            total = sum(size for _, size, _ in self._entries())
+            with self._lock:
+                self._total_bytes = total
+        if total <= self.max_bytes:
+            return
+
+        # Drop least-recently-used entries until we are 10% under the limit, so we don't rescan per put.
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in sorted(self._entries()):
+            if total <= target:
+                break
+            self._remove(path, size)
+            total -= size
+        with self._lock:
+            self._total_bytes = total
+
+
+def evaluate_with_cache(
+    cache: ResponseCache | None,
+    *,
+    engine: EngineName,
+    prepared: PreparedInputs,
+    model: str,
+    temperature: float,
+    prompt_layout: str = "classic",
+    response_format: str = "none",
+    **engine_kwargs: object,
+) -> CachedEvaluation:
+    # The offline mock engine is cheaper than a cache lookup, so it is never cached.
+    if cache is None or engine == EngineName.mock:
+        report_dict, raw_output = evaluate_with_engine(
+            engine=engine,
+            prepared=prepared,
+            model=model,
+            temperature=temperature,
+            prompt_layout=prompt_layout,
+            response_format=response_format,
+            **engine_kwargs,
+        )
+        return CachedEvaluation(report_dict=report_dict, raw_output=raw_output, cache_hit=False)
+
+    with span("cache.lookup"):
+        key = cache.key_for(
+            prepared,
+            model=model,
+            temperature=temperature,
+            prompt_layout=prompt_layout,
+            response_format=response_format,
+            base_url=engine_kwargs.get("openai_base_url"),
+        )
+        hit = cache.get(key)
+    if hit is not None:
+        return CachedEvaluation(report_dict=hit[0], raw_output=hit[1], cache_hit=True)
+
+    report_dict, raw_output = evaluate_with_engine(
+        engine=engine,
+        prepared=prepared,
+        model=model,
+        temperature=temperature,
+        prompt_layout=prompt_layout,
+        response_format=response_format,
+        **engine_kwargs,
+    )
+    # Only schema-valid reports are cached; a bad generation must not be replayed forever.
+    validate_report_dict(report_dict)
+    with span("cache.store"):
+        cache.put(key, report_dict, raw_output)
+    return CachedEvaluation(report_dict=report_dict, raw_output=raw_output, cache_hit=False)
+
+
+async def evaluate_with_cache_async(
+    cache: ResponseCache | None,
+    engine: AsyncOpenAIEngine,
+    *,
+    prepared: PreparedInputs,
+    model: str,
+    temperature: float,
+) -> CachedEvaluation:
+    """evaluate_with_cache() for a shared, long-lived AsyncOpenAIEngine (batch async / server)."""
+    key = None
+    if cache is not None:
+        with span("cache.lookup"):
+            key = cache.key_for(
+                prepared,
+                model=model,
+                temperature=temperature,
+                prompt_layout=engine.prompt_layout,
+                response_format=engine.response_format,
+                base_url=engine.base_url,
+            )
+            hit = cache.get(key)
+        if hit is not None:
+            return CachedEvaluation(report_dict=hit[0], raw_output=hit[1], cache_hit=True)
+
+    result = await engine.evaluate(prepared, model=model, temperature=temperature)
+    if key is not None:
+        validate_report_dict(result.report_dict)
+        with span("cache.store"):
+            cache.put(key, result.report_dict, result.raw_output)
+    return CachedEvaluation(report_dict=result.report_dict, raw_output=result.raw_output, cache_hit=False)
+
+
+def cache_stats_dict(cache: ResponseCache | None) -> dict | None:
+    return None if cache is None else asdict(cache.stats)
@@ -0,0 +1,404 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+from jd_resume_evaluator.async_engine import AsyncOpenAIEngine
+from jd_resume_evaluator.cache import CachedEvaluation, ResponseCache, evaluate_with_cache, evaluate_with_cache_async
+from jd_resume_evaluator.engines import EngineConfig
+from jd_resume_evaluator.keywords import tokenize
+from jd_resume_evaluator.report import validate_report_dict
+from jd_resume_evaluator.text_prep import (
+    HEADING_PREFIX,
+    InputBudgets,
+    InputMeta,
+    PreparedDocument,
+    PreparedInputCache,
+    PreparedInputs,
+    finish_document,
+    fit_prompt_budget,
+    normalize_text,
+    prepare_document,
+    prepare_text_document,
+    prompt_overhead,
+)
+from jd_resume_evaluator.tokens import TokenCounter, get_token_counter
+
+# Gaps reported by different sections are treated as the same gap above this token overlap.
+_GAP_SIMILARITY = 0.5
+_MAX_FOLLOW_UPS = 10
+
+
+@dataclass(frozen=True)
+class ChunkedInputs:
+    chunks: list[PreparedInputs]
+    # Whole-pair view for input_meta.json: CV chars/tokens used are summed over chunks.
+    meta: InputMeta
+
+    @property
+    def jd_text(self) -> str:
+        return self.chunks[0].jd_text
+
+    @property
+    def cv_text(self) -> str:
+        # All CV text sent across the sections (used to verify evidence quotes).
+        return "\n".join(chunk.cv_text for chunk in self.chunks)
+
+
+@dataclass(frozen=True)
+class ChunkedEvaluation:
+    report_dict: dict
+    raw_output: str | None
+    cache_hits: int
+    chunk_scores: list[int]
+
+    @property
+    def cache_hit(self) -> bool:
+        return self.cache_hits == len(self.chunk_scores)
+
+
+def split_cv_sections(text: str, max_chars: int) -> list[str]:
+    """
+    Split a normalized CV into chunks of at most `max_chars`, along its heading structure.
+
+    - Consecutive sections are packed together while they fit.
+    - An oversized section is split on blank lines, then lines, then hard cuts; continuation
+      pieces repeat the section heading so each chunk stays self-describing.
+    """
+    if max_chars < 1:
+        raise ValueError("max_chars must be >= 1.")
+    sections: list[str] = []
+    current: list[str] = []
+    for line in text.splitlines(keepends=True):
+        if current and HEADING_PREFIX.match(line):
+            sections.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("".join(current))
+
+    pieces: list[str] = []
+    for section in sections:
+        if len(section) <= max_chars:
+            pieces.append(section)
+        else:
+            pieces.extend(_split_oversized(section, max_chars))
+
+    chunks: list[str] = []
+    buf = ""
+    for piece in pieces:
+        if buf and len(buf) + len(piece) > max_chars:
+            chunks.append(buf)
+            buf = ""
+        buf += piece
+    if buf:
+        chunks.append(buf)
+    return [c for c in chunks if c.strip()]
+
+
+def _split_oversized(section: str, max_chars: int) -> list[str]:
+    first, _, rest = section.partition("\n")
+    heading = ""
+    if HEADING_PREFIX.match(first) and len(first) + 1 <= max_chars // 4:
+        heading = first + "\n"
+    else:
+        rest = section
+
+    room = max_chars - len(heading)
+    units: list[str] = []
+    for para in rest.split("\n\n"):
+        para = para + "\n\n"
+        if len(para) <= room:
+            units.append(para)
+            continue
+        for line in para.splitlines(keepends=True):
+            while len(line) > room:
+                units.append(line[:room])
+                line = line[room:]
+            units.append(line)
+
+    out: list[str] = []
+    buf = ""
+    for unit in units:
+        if buf and len(buf) + len(unit) > room:
+            out.append(heading + buf)
+            buf = ""
+        buf += unit
+    if buf.strip():
+        out.append(heading + buf)
+    return out
+
+
+def prepare_chunked_inputs(
+    jd_path: Path,
+    cv_path: Path,
+    budgets: InputBudgets,
+    cache: PreparedInputCache | None = None,
+) -> ChunkedInputs:
+    """
+    Prepare one JD against a CV split into budget-sized sections instead of outlining/truncating it.
+
+    Each chunk is a normal PreparedInputs (same JD, one CV section) that fits the CV and prompt budgets.
+    Only CVs needing more than `budgets.max_cv_chunks` sections lose text, and that is noted.
+
+    The CV is read like any input (packed corpus, prepared-input cache, streaming above the threshold),
+    but never outlined, and only up to the most text `max_cv_chunks` sections can hold.
+    """
+    counter = get_token_counter(budgets.tokenizer)
+    jd_doc = prepare_document(
+        jd_path,
+        label="JD",
+        max_chars=budgets.max_jd_chars,
+        max_tokens=budgets.max_jd_tokens,
+        budgets=budgets,
+        counter=counter,
+        cache=cache,
+    )
+    cv_doc = prepare_document(
+        cv_path,
+        label="CV",
+        max_chars=budgets.max_cv_chunks * budgets.max_cv_chars,
+        max_tokens=None,
+        budgets=replace(budgets, outline_if_needed=False),
+        counter=counter,
+        cache=cache,
+    )
+    return _chunk_inputs(jd_doc, cv_doc, str(jd_path), str(cv_path), budgets, counter)
+
+
+def prepare_chunked_texts(
+    jd_text: str,
+    cv_text: str,
+    budgets: InputBudgets,
+    cache: PreparedInputCache | None = None,
+    *,
+    jd_name: str = "<jd>",
+    cv_name: str = "<cv>",
+) -> ChunkedInputs:
+    """prepare_chunked_inputs() for in-memory JD/CV text."""
+    counter = get_token_counter(budgets.tokenizer)
+    jd_doc = prepare_text_document(
+        jd_text,
+        label="JD",
+        max_chars=budgets.max_jd_chars,
+        max_tokens=budgets.max_jd_tokens,
+        budgets=budgets,
+        counter=counter,
+        cache=cache,
+    )
+    cv_raw = normalize_text(cv_text)
+    if not cv_raw.strip():
+        raise ValueError("CV text is empty after normalization.")
+    cv_doc = PreparedDocument(
+        text=cv_raw, notes=(), chars_original=len(cv_raw), tokens_original=counter.count(cv_raw)
+    )
+    return _chunk_inputs(jd_doc, cv_doc, jd_name, cv_name, budgets, counter)
+
+
+def _chunk_inputs(
+    jd_doc: PreparedDocument,
+    cv_doc: PreparedDocument,
+    jd_name: str,
+    cv_name: str,
+    budgets: InputBudgets,
+    counter: TokenCounter,
+) -> ChunkedInputs:
+    overhead_chars, overhead_tokens = prompt_overhead(list(jd_doc.notes), counter, budgets.prompt_layout)
+    target = min(budgets.max_cv_chars, budgets.max_prompt_chars - len(jd_doc.text) - overhead_chars)
+    cv_raw = cv_doc.text
+    cv_tokens_total = cv_doc.tokens_original
+    token_caps = [
+        cap for cap in (budgets.max_cv_tokens, _remaining_prompt_tokens(budgets, jd_doc, overhead_tokens, counter))
+        if cap is not None
+    ]
+    if token_caps and cv_tokens_total:
+        # Map the token cap onto this CV's chars/token ratio (with headroom for uneven sections).
+        target = min(target, int(cv_doc.chars_original * min(token_caps) / cv_tokens_total * 0.9))
+    target = max(target, 1_000)
+
+    sections = split_cv_sections(cv_raw, target)
+    notes = list(cv_doc.notes)
+    if len(sections) > 1:
+        notes.append(f"CV evaluated in {len(sections)} sections of <= {target} chars (chunked map-reduce).")
+    if len(sections) > budgets.max_cv_chunks:
+        dropped = sum(len(s) for s in sections[budgets.max_cv_chunks :])
+        notes.append(
+            f"CV needed {len(sections)} sections; only the first {budgets.max_cv_chunks} were evaluated "
+            f"({dropped} chars dropped, max_cv_chunks={budgets.max_cv_chunks})."
+        )
+        sections = sections[: budgets.max_cv_chunks]
+
+    chunks: list[PreparedInputs] = []
+    for section in sections:
+        doc = finish_document(
+            section,
+            [],
+            len(section),
+            counter.count(section),
+            label="CV",
+            max_tokens=budgets.max_cv_tokens,
+            budgets=budgets,
+            counter=counter,
+        )
+        chunks.append(fit_prompt_budget(jd_name, cv_name, jd_doc, doc, budgets, counter))
+
+    meta = replace(
+        chunks[0].meta,
+        cv_chars_original=cv_doc.chars_original,
+        cv_tokens_original=cv_tokens_total,
+        cv_chars_used=sum(c.meta.cv_chars_used for c in chunks),
+        cv_tokens_used=sum(c.meta.cv_tokens_used for c in chunks),
+        prompt_chars_estimate=sum(c.meta.prompt_chars_estimate for c in chunks),
+        prompt_tokens_estimate=sum(c.meta.prompt_tokens_estimate for c in chunks),
+        truncation_notes=_unique([n for c in chunks for n in c.meta.truncation_notes] + notes),
+    )
+    return ChunkedInputs(chunks=chunks, meta=meta)
+
+
+def _remaining_prompt_tokens(
+    budgets: InputBudgets, jd_doc: PreparedDocument, overhead_tokens: int, counter: TokenCounter
+) -> int | None:
+    if budgets.max_prompt_tokens is None:
+        return None
+    return max(budgets.max_prompt_tokens - overhead_tokens - counter.count(jd_doc.text), 1)
+
+
+def evaluate_chunked(
+    inputs: ChunkedInputs,
+    *,
+    config: EngineConfig,
+    cache: ResponseCache | None = None,
+) -> ChunkedEvaluation:
+    """
+    Map: evaluate every chunk concurrently (one thread each). Reduce: merge_chunk_reports().
+
+    Each thread runs in a copy of the caller's context, so the timing recorder and request priority apply.
+    """
+
+    def one(prepared: PreparedInputs) -> CachedEvaluation:
+        return evaluate_with_cache(
+            cache,
+            engine=config.engine,
+            prepared=prepared,
+            model=config.model,
+            temperature=config.temperature,
+            openai_base_url=config.openai_base_url,
+            openai_api_key=config.openai_api_key,
+            request_timeout=config.request_timeout,
+            max_retries=config.max_retries,
+            stream=config.stream,
+            prompt_layout=config.prompt_layout,
+            response_format=config.response_format,
+        )
+
+    if len(inputs.chunks) == 1:
+        results = [one(inputs.chunks[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=len(inputs.chunks)) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, one, chunk) for chunk in inputs.chunks]
+            results = [f.result() for f in futures]
+    return _reduce(results)
+
+
+async def evaluate_chunked_async(
+    inputs: ChunkedInputs,
+    engine: AsyncOpenAIEngine,
+    *,
+    cache: ResponseCache | None,
+    model: str,
+    temperature: float,
+) -> ChunkedEvaluation:
+    """evaluate_chunked() over a shared AsyncOpenAIEngine (its `max_in_flight` still applies)."""
+    results = await asyncio.gather(
+        *(
+            evaluate_with_cache_async(cache, engine, prepared=chunk, model=model, temperature=temperature)
+            for chunk in inputs.chunks
+        )
+    )
+    return _reduce(list(results))
+
+
+def _reduce(results: list[CachedEvaluation]) -> ChunkedEvaluation:
+    for idx, result in enumerate(results):
+        try:
+            validate_report_dict(result.report_dict)
+        except ValueError as e:
+            raise ValueError(f"CV section {idx + 1}/{len(results)}: {e}") from e
+    reports = [r.report_dict for r in results]
+    raws = [r.raw_output for r in results]
+    raw_output = None
+    if any(raw is not None for raw in raws):
+        raw_output = "\n".join(
+            f"===== CV section {i + 1}/{len(raws)} =====\n{raw or ''}" for i, raw in enumerate(raws)
+        )
+    return ChunkedEvaluation(
+        report_dict=merge_chunk_reports(reports),
+        raw_output=raw_output,
+        cache_hits=sum(r.cache_hit for r in results),
+        chunk_scores=[int(r["overall_score"]) for r in reports],
+    )
+
+
+def merge_chunk_reports(reports: list[dict]) -> dict:
+    """
+    Merge per-section reports (same JD, disjoint CV sections) into one schema-valid report.
+
+    - Evidence is a union: scores and breakdown entries take the best section; recommend_interview
+      is true if any section recommends.
+    - Strengths are de-duplicated by claim, with their evidence quotes combined.
+    - A gap survives only if every section reports it (by term overlap), i.e. no section of the
+      CV shows the missing evidence.
+    - Follow-up questions and risk flags are de-duplicated unions (questions capped at 10).
+    """
+    if not reports:
+        raise ValueError("No section reports to merge.")
+    if len(reports) == 1:
+        return reports[0]
+
+    breakdown: dict[str, int] = {}
+    for report in reports:
+        for key, value in report["score_breakdown"].items():
+            breakdown[key] = max(breakdown.get(key, value), value)
+
+    strengths: dict[str, dict] = {}
+    for report in reports:
+        for item in report["strengths"]:
+            key = " ".join(str(item["claim"]).lower().split())
+            merged = strengths.setdefault(key, {**item, "evidence_quotes": []})
+            merged["evidence_quotes"] = _unique(merged["evidence_quotes"] + list(item["evidence_quotes"]))
+
+    gaps: list[dict] = []
+    for item in reports[0]["gaps"]:
+        terms = set(tokenize(str(item["gap"])))
+        if all(any(_similar(terms, set(tokenize(str(o["gap"])))) for o in other["gaps"]) for other in reports[1:]):
+            gaps.append(item)
+
+    all_questions = [str(q) for r in reports for q in r["follow_up_questions"]]
+    follow_ups = _unique(all_questions)[:_MAX_FOLLOW_UPS]
+    if len(follow_ups) < 5:
+        # Sections repeated the same generic questions; pad back to the schema minimum.
+        follow_ups += all_questions[: 5 - len(follow_ups)]
+
+    return {
+        "overall_score": max(int(r["overall_score"]) for r in reports),
+        "recommend_interview": any(bool(r["recommend_interview"]) for r in reports),
+        "score_breakdown": breakdown,
+        "strengths": list(strengths.values()),
+        "gaps": gaps,
+        "follow_up_questions": follow_ups,
+        "risk_flags": _unique([str(f) for r in reports for f in r["risk_flags"]]),
+    }
+
+
+def _similar(a: set[str], b: set[str]) -> bool:
+    if not a or not b:
+        return a == b
+    # Overlap coefficient: tolerant of sections phrasing the same gap with extra words.
+    return len(a & b) / min(len(a), len(b)) >= _GAP_SIMILARITY
+
+
+def _unique(items: list) -> list:
+    return list(dict.fromkeys(items))
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+
+from jd_resume_evaluator.cache import ResponseCache
+from jd_resume_evaluator.engines import RESPONSE_FORMATS, EngineConfig, EngineName
+from jd_resume_evaluator.prompting import PROMPT_LAYOUTS
+from jd_resume_evaluator.result_store import ShardedResultStore
+from jd_resume_evaluator.text_prep import InputBudgets
+
+
+def add_engine_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--engine",
+        default="mock",
+        choices=[e.value for e in EngineName],
+        help=(
+            "Evaluation engine: mock (offline), openai (Chat Completions HTTP) or "
+            "openai_async (pooled keep-alive connections with retries)."
+        ),
+    )
+    parser.add_argument(
+        "--model",
+        default=os.environ.get("MODEL", "gpt-4o-mini"),
+        help="Model name (used by LLM engines).",
+    )
+    parser.add_argument(
+        "--temperature",
+        type=float,
+        default=0.0,
+        help="LLM temperature (LLM engines only).",
+    )
+    parser.add_argument(
+        "--openai-base-url",
+        default=os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+        help="Base URL for OpenAI-compatible API (LLM engines only).",
+    )
+    parser.add_argument(
+        "--openai-api-key",
+        default=os.environ.get("OPENAI_API_KEY"),
+        help="OpenAI API key (or set OPENAI_API_KEY).",
+    )
+    parser.add_argument(
+        "--request-timeout",
+        type=float,
+        default=120.0,
+        help="Per-request timeout in seconds (LLM engines only).",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=3,
+        help=(
+            "Retries with jittered backoff on 429/5xx/timeouts (openai_async engine), or retries after "
+            "an early off-schema abort (--stream)."
+        ),
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream completions (openai engine) and abort early when output is clearly off-schema.",
+    )
+    parser.add_argument(
+        "--prompt-layout",
+        default="classic",
+        choices=list(PROMPT_LAYOUTS),
+        help=(
+            "User prompt layout: classic, or prefix (schema + JD first, CV and notes last, so "
+            "one JD against many CVs shares a cacheable prompt prefix)."
+        ),
+    )
+    parser.add_argument(
+        "--response-format",
+        default="none",
+        choices=list(RESPONSE_FORMATS),
+        help=(
+            "Ask the provider for structured output: json_object (any JSON object) or json_schema (the "
+            "report schema, strict). Truncated/malformed JSON is repaired locally either way."
+        ),
+    )
+    parser.add_argument(
+        "--evidence-retries",
+        type=int,
+        default=0,
+        help=(
+            "Re-ask the model (bypassing the cache) up to N times when evidence quotes are not found "
+            "verbatim in the JD/CV; the attempt with the fewest unverified quotes is kept."
+        ),
+    )
+    parser.add_argument(
+        "--rpm",
+        type=int,
+        default=None,
+        help=(
+            "Provider requests-per-minute limit to schedule under "
+            "(pooled async engine: server.py, batch.py --executor async)."
+        ),
+    )
+    parser.add_argument(
+        "--tpm",
+        type=int,
+        default=None,
+        help="Provider tokens-per-minute limit; requests are charged their estimated prompt + completion tokens.",
+    )
+
+
+def add_budget_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--max-jd-chars",
+        type=int,
+        default=60_000,
+        help="Max characters to include from JD after compression/truncation.",
+    )
+    parser.add_argument(
+        "--max-cv-chars",
+        type=int,
+        default=140_000,
+        help="Max characters to include from CV after compression/truncation.",
+    )
+    parser.add_argument(
+        "--max-prompt-chars",
+        type=int,
+        default=220_000,
+        help="Max total prompt characters; inputs are compressed/truncated to fit.",
+    )
+    parser.add_argument(
+        "--outline-if-needed",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="When inputs exceed budgets, extract headings/bullets before truncation.",
+    )
+    parser.add_argument(
+        "--relevance-selection",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="When the CV exceeds its budget, keep the passages most relevant to the JD instead of an outline.",
+    )
+    parser.add_argument(
+        "--max-jd-tokens",
+        type=int,
+        default=None,
+        help="Optional JD token budget (applied after the character budget).",
+    )
+    parser.add_argument(
+        "--max-cv-tokens",
+        type=int,
+        default=None,
+        help="Optional CV token budget (applied after the character budget).",
+    )
+    parser.add_argument(
+        "--max-prompt-tokens",
+        type=int,
+        default=None,
+        help="Optional total prompt token budget, including measured system/schema overhead.",
+    )
+    parser.add_argument(
+        "--tokenizer",
+        default="approx",
+        help="Token counter: 'approx' (fast heuristic) or 'bpe:<path>' (local .tiktoken rank file).",
+    )
+    parser.add_argument(
+        "--stream-threshold-mb",
+        type=float,
+        default=32.0,
+        help="Files larger than this are ingested line by line and reading stops once the budget is filled.",
+    )
+    parser.add_argument(
+        "--cv-chunking",
+        action="store_true",
+        help=(
+            "Evaluate an over-budget CV as heading-aligned, budget-sized sections concurrently and merge "
+            "the section reports, instead of outlining/truncating it."
+        ),
+    )
+    parser.add_argument(
+        "--max-cv-chunks",
+        type=int,
+        default=8,
+        help="Upper bound on sections (LLM calls) per CV with --cv-chunking.",
+    )
+    parser.add_argument(
+        "--corpus-dir",
+        default=None,
+        help=(
+            "Packed corpus built by corpus.py; inputs packed there (and unchanged since) are read from "
+            "its memory map instead of one file at a time."
+        ),
+    )
+
+
+def budgets_from_args(args: argparse.Namespace) -> InputBudgets:
+    return InputBudgets(
+        max_jd_chars=args.max_jd_chars,
+        max_cv_chars=args.max_cv_chars,
+        max_prompt_chars=args.max_prompt_chars,
+        outline_if_needed=bool(args.outline_if_needed),
+        relevance_selection=bool(args.relevance_selection),
+        max_jd_tokens=args.max_jd_tokens,
+        max_cv_tokens=args.max_cv_tokens,
+        max_prompt_tokens=args.max_prompt_tokens,
+        tokenizer=args.tokenizer,
+        stream_threshold_bytes=int(args.stream_threshold_mb * 1024 * 1024),
+        cv_chunking=bool(args.cv_chunking),
+        max_cv_chunks=int(args.max_cv_chunks),
+        corpus_dir=args.corpus_dir,
+        prompt_layout=args.prompt_layout,
+    )
+
+
+def engine_config_from_args(args: argparse.Namespace) -> EngineConfig:
+    return EngineConfig(
+        engine=EngineName(args.engine),
+        model=args.model,
+        temperature=float(args.temperature),
+        openai_base_url=args.openai_base_url,
+        openai_api_key=args.openai_api_key,
+        request_timeout=float(args.request_timeout),
+        max_retries=int(args.max_retries),
+        stream=bool(args.stream),
+        prompt_layout=args.prompt_layout,
+        response_format=args.response_format,
+        evidence_retries=int(args.evidence_retries),
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+    )
+
+
+def add_cache_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Enable the on-disk LLM response cache in this directory (off by default).",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=512,
+        help="Evict least-recently-used cache entries beyond this total size.",
+    )
+    parser.add_argument(
+        "--cache-max-age-days",
+        type=float,
+        default=None,
+        help="Treat cache entries older than this as misses (default: no age limit).",
+    )
+
+
+def cache_from_args(args: argparse.Namespace) -> ResponseCache | None:
+    if not args.cache_dir:
+        return None
+    return ResponseCache(
+        Path(args.cache_dir),
+        max_bytes=args.cache_max_mb * 1024 * 1024,
+        max_age_seconds=None if args.cache_max_age_days is None else args.cache_max_age_days * 86_400,
+    )
+
+
+def add_store_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--store-dir",
+        default=None,
+        help=(
+            "Append results to a sharded JSONL result store in this directory instead of writing "
+            "one timestamped directory per evaluation."
+        ),
+    )
+    parser.add_argument(
+        "--store-shard-mb",
+        type=int,
+        default=256,
+        help="Start a new result-store shard once the current one reaches this size.",
+    )
+    parser.add_argument(
+        "--store-compress",
+        action="store_true",
+        help="Gzip result-store records (one gzip member per record; shards stay zcat-readable).",
+    )
+    parser.add_argument(
+        "--store-flush-records",
+        type=int,
+        default=64,
+        help="Write and fsync buffered result-store records in batches of this size.",
+    )
+
+
+def store_from_args(args: argparse.Namespace) -> ShardedResultStore | None:
+    if not args.store_dir:
+        return None
+    return ShardedResultStore(
+        Path(args.store_dir),
+        shard_max_bytes=args.store_shard_mb * 1024 * 1024,
+        compress=bool(args.store_compress),
+        flush_records=args.store_flush_records,
+    )
@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, replace
+
+from jd_resume_evaluator.async_engine import AsyncOpenAIEngine, OpenAIHTTPError
+from jd_resume_evaluator.cache import ResponseCache, evaluate_with_cache_async
+from jd_resume_evaluator.chunking import ChunkedInputs, evaluate_chunked, evaluate_chunked_async
+from jd_resume_evaluator.engines import EngineConfig, EngineName, evaluate_with_engine
+from jd_resume_evaluator.evidence import EvidenceCheck, check_evidence, retry_unverified_async
+from jd_resume_evaluator.report import parse_report
+from jd_resume_evaluator.text_prep import PreparedInputs
+from jd_resume_evaluator.timing import recording
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    label: str
+    engine: EngineName
+    model: str
+
+
+@dataclass(frozen=True)
+class ModelOutcome:
+    label: str
+    engine: str
+    model: str
+    status: str  # "ok", "failed" or "skipped" (cut off by the consensus policy)
+    seconds: float | None = None
+    http_retries: int = 0
+    evidence_retries: int = 0
+    json_repairs: int = 0
+    parse_failure: bool = False
+    cache_hit: bool = False
+    report: dict | None = None
+    raw_output: str | None = None
+    evidence: EvidenceCheck | None = None
+    usage: dict | None = None
+    error: str | None = None
+
+
+@dataclass(frozen=True)
+class Consensus:
+    min_agree: int | None
+    decision: bool | None  # the agreed recommend_interview, None when not reached
+    agreeing: list[str]
+    seconds: float | None  # when the policy cut the run short; None if every model finished
+
+
+def parse_model_specs(values: list[str], *, default_engine: EngineName) -> list[ModelSpec]:
+    """
+    Parse `[engine:]model` specs (`mock` alone is accepted).
+
+    Only a known engine name is treated as a prefix, so model names containing ':' still work.
+    Repeated specs get `#2`, `#3`… labels so every run is reported separately.
+    """
+    specs: list[ModelSpec] = []
+    seen: Counter[str] = Counter()
+    for value in values:
+        prefix, sep, rest = value.partition(":")
+        if value == EngineName.mock.value:
+            engine, model = EngineName.mock, EngineName.mock.value
+        elif sep and prefix in EngineName.__members__:
+            engine, model = EngineName(prefix), rest
+        else:
+            engine, model = default_engine, value
+        if not model:
+            raise ValueError(f"Model spec has no model name: {value!r}")
+        seen[value] += 1
+        label = value if seen[value] == 1 else f"{value}#{seen[value]}"
+        specs.append(ModelSpec(label=label, engine=engine, model=model))
+    if not specs:
+        raise ValueError("At least one model spec is required.")
+    return specs
+
+
+async def compare_models(
+    inputs: PreparedInputs | ChunkedInputs,
+    specs: list[ModelSpec],
+    *,
+    config: EngineConfig,
+    cache: ResponseCache | None = None,
+    min_agree: int | None = None,
+) -> tuple[list[ModelOutcome], Consensus]:
+    """
+    Evaluate one prepared pair with every model concurrently.
+
+    - `config` supplies everything but engine/model (base URL, retries, layout, evidence retries).
+    - With `min_agree`, the run stops as soon as that many models have returned the same
+      `recommend_interview`; models still running are cancelled and reported as "skipped".
+    - Outcomes come back in spec order.
+    """
+    if min_agree is not None and not 1 <= min_agree <= len(specs):
+        raise ValueError(f"min_agree must be between 1 and the number of models ({len(specs)}).")
+    if config.stream:
+        raise ValueError("Streaming is not supported in comparison runs.")
+
+    started = time.perf_counter()
+    tasks = {
+        asyncio.create_task(
+            _evaluate_model(inputs, spec, replace(config, engine=spec.engine, model=spec.model), cache)
+        ): spec
+        for spec in specs
+    }
+    outcomes: dict[str, ModelOutcome] = {}
+    consensus = Consensus(min_agree=min_agree, decision=None, agreeing=[], seconds=None)
+    pending = set(tasks)
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            outcome = task.result()
+            outcomes[outcome.label] = outcome
+        if min_agree is None:
+            continue
+        reached = _agreement(outcomes.values(), min_agree)
+        if reached is not None:
+            consensus = replace(reached, seconds=time.perf_counter() - started if pending else None)
+            break
+
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    for task in pending:
+        spec = tasks[task]
+        outcomes[spec.label] = ModelOutcome(
+            label=spec.label, engine=spec.engine.value, model=spec.model, status="skipped"
+        )
+    if consensus.decision is None and min_agree is None:
+        decisions = Counter(o.report["recommend_interview"] for o in outcomes.values() if o.status == "ok")
+        if len(decisions) == 1:
+            decision = next(iter(decisions))
+            agreeing = [o.label for o in outcomes.values() if o.status == "ok"]
+            consensus = Consensus(min_agree=None, decision=decision, agreeing=agreeing, seconds=None)
+    return [outcomes[spec.label] for spec in specs], consensus
+
+
+def _agreement(outcomes, min_agree: int) -> Consensus | None:
+    votes: dict[bool, list[str]] = {}
+    for outcome in outcomes:
+        if outcome.status == "ok":
+            votes.setdefault(outcome.report["recommend_interview"], []).append(outcome.label)
+    for decision, labels in votes.items():
+        if len(labels) >= min_agree:
+            return Consensus(min_agree=min_agree, decision=decision, agreeing=labels, seconds=None)
+    return None
+
+
+async def _evaluate_model(
+    inputs: PreparedInputs | ChunkedInputs,
+    spec: ModelSpec,
+    config: EngineConfig,
+    cache: ResponseCache | None,
+) -> ModelOutcome:
+    # Never raises (except on cancellation): a failing model is one column of the comparison.
+    chunked = isinstance(inputs, ChunkedInputs)
+    engine: AsyncOpenAIEngine | None = None
+    started = time.perf_counter()
+    try:
+        engine = AsyncOpenAIEngine.from_config(config, max_in_flight=len(inputs.chunks) if chunked else 1)
+        with recording() as recorder:
+            if engine is None:
+                # Mock: deterministic, never cached, nothing to retry.
+                if chunked:
+                    result = await asyncio.to_thread(evaluate_chunked, inputs, config=config)
+                    report_dict, raw_output = result.report_dict, result.raw_output
+                else:
+                    report_dict, raw_output = await asyncio.to_thread(
+                        evaluate_with_engine,
+                        engine=config.engine,
+                        prepared=inputs,
+                        model=config.model,
+                        temperature=config.temperature,
+                    )
+                cache_hit = False
+                report = parse_report(report_dict)
+                evidence = check_evidence(report_dict, jd_text=inputs.jd_text, cv_text=inputs.cv_text)
+            else:
+
+                async def evaluate(model_cache: ResponseCache | None) -> tuple[dict, str | None, bool]:
+                    if chunked:
+                        result = await evaluate_chunked_async(
+                            inputs, engine, cache=model_cache, model=config.model, temperature=config.temperature
+                        )
+                    else:
+                        result = await evaluate_with_cache_async(
+                            model_cache, engine, prepared=inputs, model=config.model, temperature=config.temperature
+                        )
+                    return result.report_dict, result.raw_output, result.cache_hit
+
+                async def reevaluate() -> tuple[dict, str | None]:
+                    return (await evaluate(None))[:2]
+
+                report_dict, raw_output, cache_hit = await evaluate(cache)
+                parse_report(report_dict)
+                report_dict, raw_output, evidence = await retry_unverified_async(
+                    report_dict,
+                    raw_output,
+                    jd_text=inputs.jd_text,
+                    cv_text=inputs.cv_text,
+                    retries=config.evidence_retries,
+                    reevaluate=reevaluate,
+                )
+                report = parse_report(report_dict)
+    except Exception as e:  # noqa: BLE001 - one failing model must not abort the comparison
+        return ModelOutcome(
+            label=spec.label,
+            engine=spec.engine.value,
+            model=spec.model,
+            status="failed",
+            seconds=time.perf_counter() - started,
+            http_retries=engine.retries if engine is not None else 0,
+            # JSON extraction and schema errors are ValueErrors; HTTP errors are not.
+            parse_failure=isinstance(e, ValueError) and not isinstance(e, OpenAIHTTPError),
+            error=f"{type(e).__name__}: {e}",
+        )
+    finally:
+        if engine is not None:
+            await engine.aclose()
+
+    usage = {k.split(".", 1)[1]: int(v) for k, v in recorder.counters.items() if k.startswith("usage.")}
+    return ModelOutcome(
+        label=spec.label,
+        engine=spec.engine.value,
+        model=spec.model,
+        status="ok",
+        seconds=time.perf_counter() - started,
+        http_retries=engine.retries if engine is not None else 0,
+        evidence_retries=evidence.retries,
+        json_repairs=int(recorder.counters.get("json.repairs", 0)),
+        cache_hit=cache_hit,
+        report=asdict(report),
+        raw_output=raw_output,
+        evidence=evidence,
+        usage=usage or None,
+    )
+
+
+def comparison_dict(outcomes: list[ModelOutcome], consensus: Consensus) -> dict:
+    """
+    Side-by-side diff of a comparison run.
+
+    - Per model: status, latency, retries, parse failure, cache hit, token usage, decision, scores
+      and evidence verification counts.
+    - Across models: score spread (overall and per breakdown dimension), whether the interview
+      decision is unanimous, and which verified quotes every model cited versus only one.
+    """
+    ok = [o for o in outcomes if o.status == "ok"]
+    dimensions = sorted({key for o in ok for key in o.report["score_breakdown"]})
+
+    def spread(values: list[int]) -> int | None:
+        return max(values) - min(values) if values else None
+
+    quotes = {o.label: _verified_quotes(o.evidence) for o in ok}
+    shared = set.intersection(*quotes.values()) if quotes else set()
+    decisions = {o.label: o.report["recommend_interview"] for o in ok}
+    return {
+        "models": [
+            {
+                "label": o.label,
+                "engine": o.engine,
+                "model": o.model,
+                "status": o.status,
+                "seconds": round(o.seconds, 6) if o.seconds is not None else None,
+                "http_retries": o.http_retries,
+                "evidence_retries": o.evidence_retries,
+                "json_repairs": o.json_repairs,
+                "parse_failure": o.parse_failure,
+                "cache_hit": o.cache_hit,
+                "usage": o.usage,
+                "error": o.error,
+                "recommend_interview": o.report["recommend_interview"] if o.report else None,
+                "overall_score": o.report["overall_score"] if o.report else None,
+                "evidence": o.evidence.summary() if o.evidence is not None else None,
+            }
+            for o in outcomes
+        ],
+        "consensus": {
+            "min_agree": consensus.min_agree,
+            "decision": consensus.decision,
+            "agreeing": consensus.agreeing,
+            "cut_off_after_seconds": round(consensus.seconds, 6) if consensus.seconds is not None else None,
+        },
+        "recommend_interview": {
+            "by_model": decisions,
+            "unanimous": len(set(decisions.values())) == 1 if decisions else None,
+        },
+        "overall_score": {
+            "by_model": {o.label: o.report["overall_score"] for o in ok},
+            "spread": spread([o.report["overall_score"] for o in ok]),
+        },
+        "score_breakdown": {
+            dim: {
+                "by_model": {o.label: o.report["score_breakdown"].get(dim) for o in ok},
+                "spread": spread([o.report["score_breakdown"][dim] for o in ok if dim in o.report["score_breakdown"]]),
+            }
+            for dim in dimensions
+        },
+        "evidence": {
+            "shared_quotes": sorted(shared),
+            "unique_quotes": {
+                label: sorted(own - set().union(*(q for other, q in quotes.items() if other != label)))
+                for label, own in quotes.items()
+            },
+        },
+    }
+
+
+def comparison_markdown(comparison: dict) -> str:
+    """Render comparison_dict() as one Markdown table with a column per model."""
+    models = comparison["models"]
+    breakdown = comparison["score_breakdown"]
+
+    def cell(value: object) -> str:
+        if value is None:
+            return "–"
+        if isinstance(value, bool):
+            return "yes" if value else "no"
+        return str(value).replace("|", "\\|")
+
+    rows: list[tuple[str, list[object]]] = [
+        ("engine", [m["engine"] for m in models]),
+        ("status", [m["status"] for m in models]),
+        ("recommend_interview", [m["recommend_interview"] for m in models]),
+        ("overall_score", [m["overall_score"] for m in models]),
+    ]
+    for dim, entry in breakdown.items():
+        rows.append((f"score_breakdown.{dim}", [entry["by_model"].get(m["label"]) for m in models]))
+    rows += [
+        (
+            "quotes verified",
+            [
+                f"{m['evidence']['quotes_verified']}/{m['evidence']['quotes_total']}" if m["evidence"] else None
+                for m in models
+            ],
+        ),
+        ("seconds", [f"{m['seconds']:.3f}" if m["seconds"] is not None else None for m in models]),
+        ("http retries", [m["http_retries"] for m in models]),
+        ("evidence retries", [m["evidence_retries"] for m in models]),
+        ("json repairs", [m["json_repairs"] for m in models]),
+        ("parse failure", [m["parse_failure"] for m in models]),
+        ("cache hit", [m["cache_hit"] for m in models]),
+    ]
+
+    lines = [
+        "| | " + " | ".join(cell(m["label"]) for m in models) + " |",
+        "|---|" + "---|" * len(models),
+    ]
+    lines += [f"| {name} | " + " | ".join(cell(v) for v in values) + " |" for name, values in rows]
+
+    consensus = comparison["consensus"]
+    lines.append("")
+    if consensus["decision"] is None:
+        lines.append("Consensus: not reached.")
+    else:
+        text = f"Consensus: recommend_interview={cell(consensus['decision'])} ({', '.join(consensus['agreeing'])})"
+        if consensus["cut_off_after_seconds"] is not None:
+            text += f", remaining models cut off after {consensus['cut_off_after_seconds']:.3f}s"
+        lines.append(text + ".")
+    lines.append(
+        f"Score spread: {cell(comparison['overall_score']['spread'])}; "
+        f"shared verified quotes: {len(comparison['evidence']['shared_quotes'])}."
+    )
+    errors = [m for m in models if m["error"]]
+    for m in errors:
+        lines.append(f"- {m['label']}: {m['error']}")
+    return "\n".join(lines) + "\n"
+
+
+def _verified_quotes(evidence: EvidenceCheck | None) -> set[str]:
+    if evidence is None:
+        return set()
+    return {q.quote.strip() for q in evidence.quotes if q.status == "verified"}
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from jd_resume_evaluator.text_prep import normalize_text, read_text
+
+_INDEX_FILE = "corpus.idx"
+_MAGIC = b"JDCP"
+_FORMAT_VERSION = 1
+# magic, format version, data file generation, entry count.
+_HEADER = struct.Struct("<4sIII")
+# data offset, data length, source size, source mtime_ns, sha256 of the normalized text, path length;
+# followed by the UTF-8 path itself.
+_ENTRY = struct.Struct("<QQQq32sI")
+
+_OPEN: dict[str, tuple[tuple[int, int], "PackedCorpus"]] = {}
+_OPEN_LOCK = threading.Lock()
+
+
+@dataclass(frozen=True)
+class CorpusEntry:
+    path: str
+    offset: int
+    length: int
+    size: int
+    mtime_ns: int
+    sha256: bytes
+
+
+@dataclass(frozen=True)
+class CorpusUpdate:
+    added: int
+    refreshed: int
+    unchanged: int
+    removed: int
+    documents: int
+    data_bytes: int
+    dead_bytes: int
+
+
+class PackedCorpus:
+    """
+    Pre-normalized documents packed into one file, read through mmap.
+
+    - `corpus-NNNNNN.bin` is the concatenated UTF-8 text of every document, already decoded and
+      normalized exactly as text_prep would; it is only ever appended to.
+    - `corpus.idx` names the current data file and holds one fixed-width entry per document (offset,
+      length, source size + mtime, sha256 of the text) plus its resolved path. It is replaced
+      atomically after the data is synced, so it is the single commit point of update() and compact().
+    - Readers map the data file read-only, so workers on one host share its pages, and slice a document
+      out of the map without opening its source file. An entry is used only while the source file still
+      has the recorded size and mtime; otherwise callers fall back to the loose file.
+    - Documents with identical normalized text share one copy of the data.
+    - One builder per directory. Readers keep a consistent view while it runs: appended bytes are
+      past the end of their map, and compact() writes the next data file instead of rewriting this one.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self.generation = 1
+        self._entries: dict[str, CorpusEntry] = {}
+        self._map: mmap.mmap | None = None
+        self._view = memoryview(b"")
+
+    @classmethod
+    def open(cls, root: Path) -> "PackedCorpus":
+        corpus = cls(root)
+        index_path = corpus.root / _INDEX_FILE
+        if not index_path.exists():
+            return corpus
+        corpus.generation, corpus._entries = _read_index(index_path)
+        with open(corpus.data_path, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size > 0:
+                corpus._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+                corpus._view = memoryview(corpus._map)
+        return corpus
+
+    @property
+    def data_path(self) -> Path:
+        return self.root / f"corpus-{self.generation:06d}.bin"
+
+    def close(self) -> None:
+        self._view.release()
+        self._view = memoryview(b"")
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, path: object) -> bool:
+        return str(Path(str(path)).resolve()) in self._entries
+
+    def entries(self) -> list[CorpusEntry]:
+        return list(self._entries.values())
+
+    def entry(self, path: Path) -> CorpusEntry | None:
+        return self._entries.get(str(Path(path).resolve()))
+
+    def text(self, entry: CorpusEntry) -> str:
+        # Slicing the memoryview is zero-copy; decoding is the only pass over the bytes.
+        return str(self._view[entry.offset : entry.offset + entry.length], "utf-8", "surrogatepass")
+
+    def normalized_text(self, path: Path) -> str | None:
+        """The packed text of `path`, or None when it is not packed or the file changed since."""
+        entry = self.entry(path)
+        if entry is None:
+            return None
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if st.st_size != entry.size or st.st_mtime_ns != entry.mtime_ns:
+            return None
+        return self.text(entry)
+
+    def update(self, paths: list[Path], *, prune: bool = False) -> CorpusUpdate:
+        """
+        Pack new/changed files; with `prune`, drop packed files not in `paths`.
+
+        Unchanged files (same size + mtime) are not read; a touched file whose normalized text is
+        unchanged only has its entry refreshed.
+        """
+        by_digest = {e.sha256: (e.offset, e.length) for e in self._entries.values()}
+        entries = dict(self._entries)
+        seen: set[str] = set()
+        added = refreshed = unchanged = 0
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.data_path, "ab") as data:
+            end = data.tell()
+            for path in paths:
+                key = str(Path(path).resolve())
+                seen.add(key)
+                st = os.stat(path)
+                current = entries.get(key)
+                if current is not None and current.size == st.st_size and current.mtime_ns == st.st_mtime_ns:
+                    unchanged += 1
+                    continue
+                raw = normalize_text(read_text(Path(path))).encode("utf-8", errors="surrogatepass")
+                digest = hashlib.sha256(raw).digest()
+                if current is not None and current.sha256 == digest:
+                    refreshed += 1
+                elif digest in by_digest:
+                    added += 1
+                else:
+                    data.write(raw)
+                    by_digest[digest] = (end, len(raw))
+                    end += len(raw)
+                    added += 1
+                offset, length = by_digest[digest]
+                entries[key] = CorpusEntry(key, offset, length, st.st_size, st.st_mtime_ns, digest)
+            data.flush()
+            os.fsync(data.fileno())
+
+        removed = 0
+        if prune:
+            for key in [k for k in entries if k not in seen]:
+                del entries[key]
+                removed += 1
+
+        if added or refreshed or removed or not (self.root / _INDEX_FILE).exists():
+            _write_index(self.root / _INDEX_FILE, self.generation, entries)
+        self._entries = entries
+        self._remap()
+        return self._summary(added=added, refreshed=refreshed, unchanged=unchanged, removed=removed)
+
+    def compact(self) -> CorpusUpdate:
+        """Rewrite the data file with only the text still referenced, dropping replaced/removed documents."""
+        old_path = self.data_path
+        self.generation += 1
+        moved: dict[bytes, tuple[int, int]] = {}
+        entries: dict[str, CorpusEntry] = {}
+        with open(self.data_path, "wb") as data:
+            for key, entry in sorted(self._entries.items()):
+                if entry.sha256 not in moved:
+                    moved[entry.sha256] = (data.tell(), entry.length)
+                    data.write(self._view[entry.offset : entry.offset + entry.length])
+                offset, length = moved[entry.sha256]
+                entries[key] = CorpusEntry(key, offset, length, entry.size, entry.mtime_ns, entry.sha256)
+            data.flush()
+            os.fsync(data.fileno())
+        # Until the index is replaced it still names the old data file, so a crash leaves only an orphan.
+        _write_index(self.root / _INDEX_FILE, self.generation, entries)
+        self._entries = entries
+        self._remap()
+        # Readers that still map the old file keep their pages until they reopen.
+        old_path.unlink(missing_ok=True)
+        return self._summary(added=0, refreshed=0, unchanged=len(entries), removed=0)
+
+    def _remap(self) -> None:
+        self.close()
+        reopened = PackedCorpus.open(self.root)
+        self._map, self._view = reopened._map, reopened._view
+
+    def _summary(self, *, added: int, refreshed: int, unchanged: int, removed: int) -> CorpusUpdate:
+        data_bytes = len(self._view)
+        live = sum({e.sha256: e.length for e in self._entries.values()}.values())
+        return CorpusUpdate(
+            added=added,
+            refreshed=refreshed,
+            unchanged=unchanged,
+            removed=removed,
+            documents=len(self._entries),
+            data_bytes=data_bytes,
+            dead_bytes=data_bytes - live,
+        )
+
+
+def open_corpus(root: str | Path) -> PackedCorpus:
+    """
+    Process-wide shared reader for `root`, reopened when the builder has replaced its index.
+
+    Costs one stat of `corpus.idx` per call; the map itself is opened once per index version.
+    """
+    key = str(Path(root).resolve())
+    try:
+        st = os.stat(Path(key) / _INDEX_FILE)
+        version = (st.st_size, st.st_mtime_ns)
+    except FileNotFoundError:
+        version = (0, 0)
+    with _OPEN_LOCK:
+        cached = _OPEN.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        # The previous reader is left to the garbage collector: other threads may still be slicing it.
+        corpus = PackedCorpus.open(Path(key))
+        _OPEN[key] = (version, corpus)
+        return corpus
+
+
+def _read_index(path: Path) -> tuple[int, dict[str, CorpusEntry]]:
+    data = path.read_bytes()
+    magic, version, generation, n_entries = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC or version != _FORMAT_VERSION:
+        raise ValueError(f"Unsupported corpus index format in {path}: {magic!r} v{version}")
+    entries: dict[str, CorpusEntry] = {}
+    pos = _HEADER.size
+    for _ in range(n_entries):
+        offset, length, size, mtime_ns, digest, path_len = _ENTRY.unpack_from(data, pos)
+        pos += _ENTRY.size
+        key = data[pos : pos + path_len].decode("utf-8", errors="surrogateescape")
+        pos += path_len
+        entries[key] = CorpusEntry(key, offset, length, size, mtime_ns, digest)
+    return generation, entries
+
+
+def _write_index(path: Path, generation: int, entries: dict[str, CorpusEntry]) -> None:
+    parts = [_HEADER.pack(_MAGIC, _FORMAT_VERSION, generation, len(entries))]
+    for key, entry in entries.items():
+        raw_path = key.encode("utf-8", errors="surrogateescape")
+        parts.append(
+            _ENTRY.pack(entry.offset, entry.length, entry.size, entry.mtime_ns, entry.sha256, len(raw_path))
+        )
+        parts.append(raw_path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(b"".join(parts))
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
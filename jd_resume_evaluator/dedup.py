@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from jd_resume_evaluator.keywords import tokenize
+from jd_resume_evaluator.text_prep import normalize_text, packed_text, read_text
+from jd_resume_evaluator.timing import span
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_WORDS = 3
+# LSH bands are sized so a pair exactly at the threshold is still a candidate with this probability.
+_MIN_RECALL = 0.95
+_MASK64 = (1 << 64) - 1
+
+
+@dataclass(frozen=True)
+class NearDuplicate:
+    path: str
+    duplicate_of: str
+    similarity: float
+
+
+def minhash_signature(
+    text: str, *, num_perm: int = DEFAULT_NUM_PERM, shingle_words: int = DEFAULT_SHINGLE_WORDS
+) -> tuple[int, ...] | None:
+    """
+    One-permutation MinHash of the text's word shingles; None when the text has no terms.
+
+    - Shingles are runs of `shingle_words` terms from keywords.tokenize(), so case, punctuation,
+      numbers (phone, dates) and layout changes do not count as edits.
+    - Each shingle is hashed once: the hash picks one of `num_perm` bins and the bin keeps its minimum.
+      Empty bins borrow the next non-empty bin's value (rotation densification), so short texts still
+      get a full signature.
+    - The fraction of equal slots of two signatures estimates the Jaccard similarity of their shingle sets.
+    """
+    terms = tokenize(text)
+    if not terms:
+        return None
+    width = min(shingle_words, len(terms))
+    bins: list[int | None] = [None] * num_perm
+    seen: set[str] = set()
+    for i in range(len(terms) - width + 1):
+        shingle = " ".join(terms[i : i + width])
+        if shingle in seen:
+            continue
+        seen.add(shingle)
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+        slot, value = h % num_perm, h // num_perm
+        current = bins[slot]
+        if current is None or value < current:
+            bins[slot] = value
+    return _densify(bins)
+
+
+def _densify(bins: list[int | None]) -> tuple[int, ...]:
+    n = len(bins)
+    signature: list[int] = []
+    for slot, value in enumerate(bins):
+        distance = 0
+        while value is None:
+            distance += 1
+            value = bins[(slot + distance) % n]
+        # Offsetting by the distance keeps a borrowed value from matching a genuine one by accident.
+        signature.append((value + distance * 0x9E3779B97F4A7C15) & _MASK64)
+    return tuple(signature)
+
+
+def signature_similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def _lsh_params(threshold: float, num_perm: int) -> tuple[int, int]:
+    # The most rows per band (fewest false candidates) that still meets _MIN_RECALL at the threshold.
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if 1.0 - (1.0 - threshold**rows) ** bands >= _MIN_RECALL:
+            best = (bands, rows)
+    return best
+
+
+class NearDuplicateIndex:
+    """
+    Banded LSH over MinHash signatures: finds documents above a similarity threshold without a full scan.
+
+    - A signature is cut into `bands` runs of `rows` slots; documents sharing any whole band are
+      candidates. Candidates are then checked against the threshold on the full signature.
+    - Only documents added with add() are matched, so callers add canonical documents only and
+      near-duplicate chains cannot drift away from their original.
+    """
+
+    def __init__(self, *, threshold: float, num_perm: int = DEFAULT_NUM_PERM) -> None:
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1].")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = _lsh_params(threshold, num_perm)
+        self._buckets: dict[tuple[int, tuple[int, ...]], list[str]] = {}
+        self._signatures: dict[str, tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: tuple[int, ...]):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows : (band + 1) * self.rows]
+
+    def add(self, key: str, signature: tuple[int, ...]) -> None:
+        self._signatures[key] = signature
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, []).append(key)
+
+    def query(self, signature: tuple[int, ...]) -> tuple[str, float] | None:
+        """The most similar indexed document at or above the threshold, with its estimated similarity."""
+        candidates: set[str] = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self._buckets.get(band_key, ()))
+        best: tuple[str, float] | None = None
+        for key in sorted(candidates):
+            similarity = signature_similarity(signature, self._signatures[key])
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        return best
+
+
+def find_near_duplicates(
+    paths: list[Path],
+    *,
+    threshold: float,
+    corpus_dir: str | None = None,
+    max_bytes: int | None = None,
+) -> dict[str, NearDuplicate]:
+    """
+    Map each near-duplicate file to the earlier file in `paths` it duplicates, both as resolved paths.
+
+    - Files are compared on their normalized text (from the packed corpus when it is current), so
+      encoding and whitespace differences never matter.
+    - The first file of each group is canonical; later ones link to the canonical file they match best.
+    - Files larger than `max_bytes` (the streaming threshold) are never treated as duplicates.
+    """
+    index = NearDuplicateIndex(threshold=threshold)
+    duplicates: dict[str, NearDuplicate] = {}
+    with span("dedup"):
+        for path in paths:
+            if max_bytes is not None and os.stat(path).st_size > max_bytes:
+                continue
+            text = packed_text(Path(path), corpus_dir) if corpus_dir else None
+            if text is None:
+                text = normalize_text(read_text(Path(path)))
+            signature = minhash_signature(text, num_perm=index.num_perm)
+            if signature is None:
+                continue
+            key = str(Path(path).resolve())
+            match = index.query(signature)
+            if match is None:
+                index.add(key, signature)
+            else:
+                duplicates[key] = NearDuplicate(key, match[0], round(match[1], 4))
+    return duplicates
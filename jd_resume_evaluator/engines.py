@@ -1,20 +1,48 @@
 from __future__ import annotations
 
+import contextlib
 import json
-import re
 import urllib.error
 import urllib.request
 from dataclasses import dataclass
 from enum import Enum
 
-from jd_resume_evaluator.json_parse import parse_json_object
+from jd_resume_evaluator.json_parse import IncrementalJsonObjectParser, SchemaAbort, parse_json_object
+from jd_resume_evaluator.keywords import extract_keywords
 from jd_resume_evaluator.prompting import build_system_prompt, build_user_prompt
+from jd_resume_evaluator.report import report_json_schema, validate_report_dict, validate_report_field
 from jd_resume_evaluator.text_prep import PreparedInputs
+from jd_resume_evaluator.timing import count, span
+
+
+# Provider-side structured output: "json_object" asks for any JSON object, "json_schema" for the report
+# schema itself (OpenAI strict structured outputs); "none" relies on the prompt and local repair alone.
+RESPONSE_FORMATS = ("none", "json_object", "json_schema")
 
 
 class EngineName(str, Enum):
     mock = "mock"
     openai = "openai"
+    openai_async = "openai_async"
+
+
+@dataclass(frozen=True)
+class EngineConfig:
+    engine: EngineName
+    model: str
+    temperature: float
+    openai_base_url: str | None = None
+    openai_api_key: str | None = None
+    request_timeout: float = 120.0
+    max_retries: int = 3
+    stream: bool = False
+    prompt_layout: str = "classic"
+    response_format: str = "none"
+    # Re-ask the model up to this many times when evidence quotes are not found in the JD/CV.
+    evidence_retries: int = 0
+    # Provider rate limits enforced by the pooled async engine's scheduler (None = unlimited).
+    requests_per_minute: int | None = None
+    tokens_per_minute: int | None = None
 
 
 @dataclass(frozen=True)
@@ -31,22 +59,67 @@ def evaluate_with_engine(
     temperature: float,
     openai_base_url: str | None = None,
     openai_api_key: str | None = None,
+    request_timeout: float = 120.0,
+    max_retries: int = 3,
+    stream: bool = False,
+    prompt_layout: str = "classic",
+    response_format: str = "none",
 ) -> tuple[dict, str | None]:
     if engine == EngineName.mock:
         result = _evaluate_mock(prepared)
         return result.report_dict, result.raw_output
 
-    if engine == EngineName.openai:
+    if engine in (EngineName.openai, EngineName.openai_async):
         if not openai_api_key:
-            raise ValueError("OPENAI_API_KEY is required for --engine openai.")
+            raise ValueError(f"OPENAI_API_KEY is required for --engine {engine.value}.")
         if not openai_base_url:
-            raise ValueError("openai_base_url is required for --engine openai.")
+            raise ValueError(f"openai_base_url is required for --engine {engine.value}.")
+
+    if stream and engine != EngineName.openai:
+        raise ValueError("Streaming is only supported by --engine openai.")
+
+    if engine == EngineName.openai and stream:
+        result = _evaluate_openai_stream(
+            prepared=prepared,
+            model=model,
+            temperature=temperature,
+            base_url=openai_base_url.rstrip("/"),
+            api_key=openai_api_key,
+            timeout=request_timeout,
+            abort_retries=max_retries,
+            prompt_layout=prompt_layout,
+            response_format=response_format,
+        )
+        return result.report_dict, result.raw_output
+
+    if engine == EngineName.openai:
         result = _evaluate_openai_http(
             prepared=prepared,
             model=model,
             temperature=temperature,
             base_url=openai_base_url.rstrip("/"),
             api_key=openai_api_key,
+            timeout=request_timeout,
+            prompt_layout=prompt_layout,
+            response_format=response_format,
+        )
+        return result.report_dict, result.raw_output
+
+    if engine == EngineName.openai_async:
+        # One-shot use of the pooled async engine; long-lived callers should hold an
+        # AsyncOpenAIEngine themselves so connections stay warm across requests.
+        from jd_resume_evaluator.async_engine import evaluate_openai_async_once
+
+        result = evaluate_openai_async_once(
+            prepared=prepared,
+            model=model,
+            temperature=temperature,
+            base_url=openai_base_url,
+            api_key=openai_api_key,
+            request_timeout=request_timeout,
+            max_retries=max_retries,
+            prompt_layout=prompt_layout,
+            response_format=response_format,
         )
         return result.report_dict, result.raw_output
 
@@ -60,48 +133,172 @@ def _evaluate_openai_http(
     temperature: float,
     base_url: str,
     api_key: str,
+    timeout: float = 120.0,
+    prompt_layout: str = "classic",
+    response_format: str = "none",
+) -> EngineResult:
+    payload = _chat_payload(
+        prepared, model=model, temperature=temperature, prompt_layout=prompt_layout, response_format=response_format
+    )
+    data = json.dumps(payload).encode("utf-8")
+
+    with _post_completion(base_url, data, api_key=api_key, timeout=timeout) as resp:
+        with span("http.body"):
+            body = resp.read().decode("utf-8")
+
+    content = _completion_content(body)
+    with span("parse_json_object"):
+        report_dict = parse_json_object(content, accept=validate_report_dict)
+    return EngineResult(report_dict=report_dict, raw_output=content)
+
+
+@contextlib.contextmanager
+def _post_completion(base_url: str, data: bytes, *, api_key: str, timeout: float):
+    """
+    POST to `/chat/completions` and yield the response once its headers are in.
+
+    Goes through urllib, so HTTP(S)_PROXY/NO_PROXY and redirects behave as before; the `http.ttfb`
+    span therefore covers connect + time-to-first-byte. 4xx/5xx statuses raise RuntimeError with the
+    response body as detail.
+    """
+    req = urllib.request.Request(
+        url=f"{base_url}/chat/completions", method="POST", data=data, headers=_auth_headers(api_key)
+    )
+    try:
+        with span("http.ttfb"):
+            resp = urllib.request.urlopen(req, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        count("http.requests")
+        detail = e.read().decode("utf-8", errors="replace")
+        raise RuntimeError(f"OpenAI HTTPError {e.code}: {detail}") from e
+    count("http.requests")
+    # Leaving the `with` block mid-stream (e.g. on SchemaAbort) closes the socket, which cancels the generation.
+    with resp:
+        yield resp
+
+
+def _evaluate_openai_stream(
+    *,
+    prepared: PreparedInputs,
+    model: str,
+    temperature: float,
+    base_url: str,
+    api_key: str,
+    timeout: float,
+    abort_retries: int,
+    prompt_layout: str = "classic",
+    response_format: str = "none",
 ) -> EngineResult:
-    system = build_system_prompt()
-    user = build_user_prompt(prepared)
+    payload = _chat_payload(
+        prepared, model=model, temperature=temperature, prompt_layout=prompt_layout, response_format=response_format
+    )
+    payload["stream"] = True
+    # Usage arrives as a last chunk with no choices; providers that ignore the option just send none.
+    payload["stream_options"] = {"include_usage": True}
+    data = json.dumps(payload).encode("utf-8")
+
+    attempt = 0
+    while True:
+        parser = IncrementalJsonObjectParser(validate_report_field)
+        try:
+            with _post_completion(base_url, data, api_key=api_key, timeout=timeout) as resp:
+                with span("http.body"):
+                    _consume_sse(resp, parser)
+        except SchemaAbort as e:
+            if attempt >= abort_retries:
+                raise ValueError(f"Streamed output aborted as off-schema: {e}") from e
+            attempt += 1
+            count("stream.schema_aborts")
+            continue
+
+        content = parser.text
+        report_dict = parser.finish(accept=validate_report_dict)
+        return EngineResult(report_dict=report_dict, raw_output=content)
 
+
+def _consume_sse(resp, parser: IncrementalJsonObjectParser) -> None:
+    for raw_line in resp:
+        line = raw_line.decode("utf-8").strip()
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        event = json.loads(data)
+        _record_usage(event.get("usage"))
+        choices = event.get("choices") or []
+        if not choices:
+            continue
+        delta = choices[0].get("delta") or {}
+        parser.feed(delta.get("content") or "")
+
+
+def _chat_payload(
+    prepared: PreparedInputs,
+    *,
+    model: str,
+    temperature: float,
+    prompt_layout: str = "classic",
+    response_format: str = "none",
+) -> dict:
+    with span("build_user_prompt"):
+        user_prompt = build_user_prompt(prepared, layout=prompt_layout)
     payload = {
         "model": model,
         "temperature": temperature,
         "messages": [
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
+            {"role": "system", "content": build_system_prompt()},
+            {"role": "user", "content": user_prompt},
         ],
     }
+    if response_format == "json_object":
+        payload["response_format"] = {"type": "json_object"}
+    elif response_format == "json_schema":
+        payload["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": "evaluation_report", "strict": True, "schema": report_json_schema()},
+        }
+    elif response_format != "none":
+        raise ValueError(
+            f"Unknown response format: {response_format!r} (expected one of {', '.join(RESPONSE_FORMATS)})."
+        )
+    return payload
 
-    req = urllib.request.Request(
-        url=f"{base_url}/chat/completions",
-        method="POST",
-        data=json.dumps(payload).encode("utf-8"),
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        },
-    )
 
-    try:
-        with urllib.request.urlopen(req, timeout=120) as resp:
-            body = resp.read().decode("utf-8")
-    except urllib.error.HTTPError as e:
-        detail = e.read().decode("utf-8", errors="replace")
-        raise RuntimeError(f"OpenAI HTTPError {e.code}: {detail}") from e
+def _auth_headers(api_key: str) -> dict[str, str]:
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+
+
+def _completion_content(body: str) -> str:
+    return _completion_parts(body)[0]
 
+
+def _completion_parts(body: str) -> tuple[str, dict]:
+    # Message content and the provider-reported usage ({} when absent).
     parsed = json.loads(body)
-    content = parsed["choices"][0]["message"]["content"]
+    usage = parsed.get("usage") or {}
+    _record_usage(usage)
+    return parsed["choices"][0]["message"]["content"], usage
 
-    report_dict = parse_json_object(content)
-    return EngineResult(report_dict=report_dict, raw_output=content)
+
+def _record_usage(usage: dict | None) -> None:
+    # Provider-reported token usage; cached_tokens measures prompt-prefix cache hits.
+    if not usage:
+        return
+    count("usage.prompt_tokens", usage.get("prompt_tokens") or 0)
+    count("usage.completion_tokens", usage.get("completion_tokens") or 0)
+    details = usage.get("prompt_tokens_details") or {}
+    count("usage.cached_tokens", details.get("cached_tokens") or 0)
 
 
 def _evaluate_mock(prepared: PreparedInputs) -> EngineResult:
     jd = prepared.jd_text
     cv = prepared.cv_text
 
-    jd_keywords = _extract_keywords(jd, max_keywords=12)
+    jd_keywords = extract_keywords(jd, max_keywords=12)
     hits = []
     misses = []
     for kw in jd_keywords:
@@ -158,36 +355,6 @@ def _evaluate_mock(prepared: PreparedInputs) -> EngineResult:
     return EngineResult(report_dict=report, raw_output=None)
 
 
-_TOKEN = re.compile(r"[A-Za-z][A-Za-z0-9_+.#/-]{1,30}")
-
-
-def _extract_keywords(text: str, max_keywords: int) -> list[str]:
-    # Prefer backticked keywords if present.
-    backticked = re.findall(r"`([^`]{1,40})`", text)
-    candidates = [c.strip() for c in backticked if c.strip()]
-
-    # Otherwise, fall back to token-ish words.
-    if not candidates:
-        candidates = _TOKEN.findall(text)
-
-    # Normalize and de-duplicate while keeping order.
-    seen: set[str] = set()
-    keywords: list[str] = []
-    for cand in candidates:
-        key = cand.strip()
-        if not key:
-            continue
-        if key.lower() in {"the", "and", "with", "for", "you", "your"}:
-            continue
-        if key.lower() in seen:
-            continue
-        seen.add(key.lower())
-        keywords.append(key)
-        if len(keywords) >= max_keywords:
-            break
-    return keywords
-
-
 def _first_line_containing(text: str, needle: str) -> str | None:
     needle_lower = needle.lower()
     for line in text.splitlines():
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import functools
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Awaitable, Callable
+
+from jd_resume_evaluator.report import validate_report_dict
+from jd_resume_evaluator.timing import count, span
+
+# Typographic variants a model tends to "fix" when copying a quote.
+_FOLD_TABLE = str.maketrans(
+    {
+        "“": '"',
+        "”": '"',
+        "‘": "'",
+        "’": "'",
+        "–": "-",
+        "—": "-",
+        "\u00a0": " ",
+    }
+)
+_QUOTE_TRIM = " \"'…."
+
+
+@dataclass(frozen=True)
+class QuoteCheck:
+    field: str
+    quote: str
+    status: str  # "verified" or "hallucinated"
+    source: str | None = None  # "cv" or "jd"
+    line: int | None = None  # 1-based line in the prompt text of `source`
+    offset: int | None = None  # char offset in the whitespace-folded text of `source`
+
+
+@dataclass(frozen=True)
+class EvidenceCheck:
+    quotes_total: int
+    quotes_verified: int
+    quotes_unverified: int
+    retries: int
+    quotes: list[QuoteCheck]
+
+    def summary(self) -> dict:
+        return {
+            "quotes_total": self.quotes_total,
+            "quotes_verified": self.quotes_verified,
+            "quotes_unverified": self.quotes_unverified,
+            "retries": self.retries,
+        }
+
+
+@dataclass(frozen=True)
+class _FoldedDocument:
+    text: str
+    # Folded offset at which each non-blank original line starts, and that line's 1-based number.
+    line_offsets: list[int]
+    line_numbers: list[int]
+
+    def line_at(self, offset: int) -> int:
+        return self.line_numbers[bisect_right(self.line_offsets, offset) - 1]
+
+
+def _fold(text: str) -> str:
+    return " ".join(text.translate(_FOLD_TABLE).casefold().split())
+
+
+@functools.lru_cache(maxsize=128)
+def _folded_document(text: str) -> _FoldedDocument:
+    # Cached per document text: a JD is folded once however many CVs it is screened against.
+    parts: list[str] = []
+    offsets: list[int] = []
+    numbers: list[int] = []
+    pos = 0
+    for number, line in enumerate(text.splitlines(), start=1):
+        piece = _fold(line)
+        if not piece:
+            continue
+        if parts:
+            pos += 1
+        offsets.append(pos)
+        numbers.append(number)
+        parts.append(piece)
+        pos += len(piece)
+    return _FoldedDocument(text=" ".join(parts), line_offsets=offsets, line_numbers=numbers)
+
+
+class _AhoCorasick:
+    """
+    Aho-Corasick automaton over a set of patterns.
+
+    - Built once per report from its folded quotes; each document is then scanned in a single pass.
+    - `first_matches()` reports the end offset of each pattern's first occurrence and stops early
+      once every pattern has been seen.
+    """
+
+    def __init__(self, patterns: list[str]) -> None:
+        self.size = len(patterns)
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(pattern_id)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def first_matches(self, text: str) -> dict[int, int]:
+        goto, fail, out = self._goto, self._fail, self._out
+        found: dict[int, int] = {}
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for pattern_id in out[state]:
+                    found.setdefault(pattern_id, i)
+                if len(found) == self.size:
+                    break
+        return found
+
+
+def check_evidence(report_dict: dict, *, jd_text: str, cv_text: str) -> EvidenceCheck:
+    """
+    Check that every evidence quote in a (schema-valid) report occurs in the JD or CV.
+
+    - Quotes and documents are compared whitespace-folded and case-folded, with curly quotes and
+      dashes normalized; wrapping quote marks and trailing ellipses on a quote are ignored.
+    - Matches are located in the CV first, then the JD. A quote found in neither is "hallucinated".
+    """
+    with span("verify_evidence"):
+        fields: list[tuple[str, str]] = []
+        for kind in ("strengths", "gaps"):
+            for i, item in enumerate(report_dict.get(kind, [])):
+                for j, quote in enumerate(item.get("evidence_quotes", [])):
+                    fields.append((f"{kind}[{i}].evidence_quotes[{j}]", quote))
+
+        folded_quotes = [_fold(quote).strip(_QUOTE_TRIM) for _, quote in fields]
+        patterns = sorted({q for q in folded_quotes if q})
+        pattern_ids = {p: i for i, p in enumerate(patterns)}
+        documents = [("cv", _folded_document(cv_text)), ("jd", _folded_document(jd_text))]
+        located: dict[int, tuple[str, _FoldedDocument, int]] = {}
+        if patterns:
+            matcher = _AhoCorasick(patterns)
+            for source, doc in documents:
+                for pattern_id, end in matcher.first_matches(doc.text).items():
+                    located.setdefault(pattern_id, (source, doc, end - len(patterns[pattern_id]) + 1))
+                if len(located) == len(patterns):
+                    break
+
+        quotes: list[QuoteCheck] = []
+        for (field, quote), folded in zip(fields, folded_quotes):
+            hit = located.get(pattern_ids[folded]) if folded else None
+            if hit is None:
+                quotes.append(QuoteCheck(field=field, quote=quote, status="hallucinated"))
+                continue
+            source, doc, start = hit
+            quotes.append(
+                QuoteCheck(
+                    field=field, quote=quote, status="verified", source=source, line=doc.line_at(start), offset=start
+                )
+            )
+
+    verified = sum(1 for q in quotes if q.status == "verified")
+    return EvidenceCheck(
+        quotes_total=len(quotes),
+        quotes_verified=verified,
+        quotes_unverified=len(quotes) - verified,
+        retries=0,
+        quotes=quotes,
+    )
+
+
+def retry_unverified(
+    report_dict: dict,
+    raw_output: str | None,
+    *,
+    jd_text: str,
+    cv_text: str,
+    retries: int,
+    reevaluate: Callable[[], tuple[dict, str | None]],
+) -> tuple[dict, str | None, EvidenceCheck]:
+    """
+    Verify a report and, while it has unverified quotes, ask the engine again up to `retries` times.
+
+    The attempt with the fewest unverified quotes wins; a retry that fails validation is discarded.
+    A retry that raises (network error, unparseable output) ends the retries and keeps the best report so far.
+    """
+    check = check_evidence(report_dict, jd_text=jd_text, cv_text=cv_text)
+    attempt = 0
+    while check.quotes_unverified and attempt < retries:
+        attempt += 1
+        count("evidence.retries")
+        try:
+            candidate, candidate_raw = reevaluate()
+        except Exception:  # noqa: BLE001 - a failed retry must not lose the report already in hand
+            count("evidence.retry_errors")
+            break
+        report_dict, raw_output, check = _keep_better(
+            report_dict, raw_output, check, candidate, candidate_raw, jd_text=jd_text, cv_text=cv_text
+        )
+    return report_dict, raw_output, replace(check, retries=attempt)
+
+
+async def retry_unverified_async(
+    report_dict: dict,
+    raw_output: str | None,
+    *,
+    jd_text: str,
+    cv_text: str,
+    retries: int,
+    reevaluate: Callable[[], Awaitable[tuple[dict, str | None]]],
+) -> tuple[dict, str | None, EvidenceCheck]:
+    """retry_unverified() for async engines."""
+    check = check_evidence(report_dict, jd_text=jd_text, cv_text=cv_text)
+    attempt = 0
+    while check.quotes_unverified and attempt < retries:
+        attempt += 1
+        count("evidence.retries")
+        try:
+            candidate, candidate_raw = await reevaluate()
+        except Exception:  # noqa: BLE001 - a failed retry must not lose the report already in hand
+            count("evidence.retry_errors")
+            break
+        report_dict, raw_output, check = _keep_better(
+            report_dict, raw_output, check, candidate, candidate_raw, jd_text=jd_text, cv_text=cv_text
+        )
+    return report_dict, raw_output, replace(check, retries=attempt)
+
+
+def _keep_better(
+    report_dict: dict,
+    raw_output: str | None,
+    check: EvidenceCheck,
+    candidate: dict,
+    candidate_raw: str | None,
+    *,
+    jd_text: str,
+    cv_text: str,
+) -> tuple[dict, str | None, EvidenceCheck]:
+    try:
+        validate_report_dict(candidate)
+    except ValueError:
+        return report_dict, raw_output, check
+    candidate_check = check_evidence(candidate, jd_text=jd_text, cv_text=cv_text)
+    if candidate_check.quotes_unverified < check.quotes_unverified:
+        return candidate, candidate_raw, candidate_check
+    return report_dict, raw_output, check
+
@@ -1,14 +1,32 @@
 from __future__ import annotations
 
 import json
+import re
+from typing import Callable
 
+from jd_resume_evaluator.timing import count
 
-def parse_json_object(text: str) -> dict:
+_FENCED_BLOCK = re.compile(r"```[A-Za-z0-9_-]*[ \t]*\n?(.*?)```", re.DOTALL)
+_CLOSERS = {"{": "}", "[": "]"}
+_STRING_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_LITERALS = ("true", "false", "null")
+_STRING_RUN = re.compile(r'[^"\\\n\r\t]+')
+_PLAIN_RUN = re.compile(r'[^"{}\[\],:]+')
+_ASCII_LETTERS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_PARTIAL_UNICODE_ESCAPE = re.compile(r"\\u[0-9a-fA-F]{0,3}$")
+
+
+def parse_json_object(text: str, accept: Callable[[dict], object] | None = None) -> dict:
     """
-    Parse a JSON object from model output.
+    Parse a JSON object from model output, repairing it when that avoids a new request.
 
     - Accepts raw JSON or JSON fenced in Markdown.
-    - Best-effort extracts the first {...} block if extra text exists.
+    - Otherwise tries every fenced block, then the text from its first `{`; each candidate is parsed
+      as-is and, failing that, through repair_json() (truncated output, trailing commas).
+    - With `accept`, the first candidate it does not reject (by raising ValueError) wins, so the
+      block that is a valid report is picked among several; if it rejects all, the first parsed
+      candidate is returned for the caller's validation to report on.
+    - Each repaired result is counted as `json.repairs` in the active timing recorder.
     """
     stripped = text.strip()
     if stripped.startswith("```"):
@@ -21,19 +39,324 @@ def parse_json_object(text: str) -> dict:
 
     try:
         obj = json.loads(stripped)
-        if isinstance(obj, dict):
+        if isinstance(obj, dict) and _accepted(obj, accept):
             return obj
     except json.JSONDecodeError:
         pass
 
-    start = stripped.find("{")
-    end = stripped.rfind("}")
-    if start == -1 or end == -1 or end <= start:
+    fallback: tuple[dict, bool] | None = None
+    for candidate in [m.group(1) for m in _FENCED_BLOCK.finditer(text)] + [text]:
+        parsed = _parse_candidate(candidate)
+        if parsed is None:
+            continue
+        if _accepted(parsed[0], accept):
+            fallback = parsed
+            break
+        if fallback is None:
+            fallback = parsed
+    if fallback is None:
         raise ValueError("No JSON object found in output.")
-
-    candidate = stripped[start : end + 1]
-    obj = json.loads(candidate)
-    if not isinstance(obj, dict):
-        raise ValueError("Parsed JSON is not an object.")
+    obj, repaired = fallback
+    if repaired:
+        count("json.repairs")
     return obj
 
+
+def _accepted(obj: dict, accept: Callable[[dict], object] | None) -> bool:
+    if accept is None:
+        return True
+    try:
+        accept(obj)
+    except ValueError:
+        return False
+    return True
+
+
+def _parse_candidate(candidate: str) -> tuple[dict, bool] | None:
+    # (object, whether it needed repair), or None when the candidate holds no object at all.
+    start = candidate.find("{")
+    if start == -1:
+        return None
+    end = candidate.rfind("}")
+    if end > start:
+        try:
+            obj = json.loads(candidate[start : end + 1])
+            if isinstance(obj, dict):
+                return obj, False
+        except json.JSONDecodeError:
+            pass
+    try:
+        obj = json.loads(repair_json(candidate[start:]))
+    except (json.JSONDecodeError, ValueError):
+        return None
+    return (obj, True) if isinstance(obj, dict) else None
+
+
+def repair_json(text: str) -> str:
+    """
+    Best-effort valid JSON for a damaged object, in one pass over `text`.
+
+    - Starts at the first `{` and stops after its matching close, ignoring any trailing prose.
+    - Drops commas directly before `}`/`]` (and repeated commas), escapes raw newlines/tabs inside
+      strings, and closes a mismatched `]`/`}` as whatever is actually open.
+    - For truncated input: closes an open string, then drops a dangling key, `:` or `,`, finishes a
+      cut-off literal (`tru` → `true`) or number (`1.` → `1`), and closes every open array/object.
+      A string cut inside an object key is dropped; one cut inside a value is kept as far as it got.
+    """
+    start = text.find("{")
+    if start == -1:
+        raise ValueError("No JSON object found in output.")
+    out: list[str] = []
+    # One frame per open container: [closer, whether an object is expecting a key].
+    stack: list[list] = []
+    in_string = escape = key_string = False
+    string_start = 0
+    i, n = start, len(text)
+    while i < n:
+        # Runs without structural characters are copied in one step.
+        run = (_STRING_RUN if in_string else _PLAIN_RUN).match(text, i)
+        if run is not None:
+            out.append(run.group())
+            i = run.end()
+            escape = False
+            continue
+        ch = text[i]
+        i += 1
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            out.append(_STRING_ESCAPES.get(ch, ch))
+            continue
+        if ch == '"':
+            in_string = True
+            key_string = stack[-1][0] == "}" and stack[-1][1]
+            string_start = len(out)
+            out.append(ch)
+        elif ch in _CLOSERS:
+            stack.append([_CLOSERS[ch], ch == "{"])
+            out.append(ch)
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            out.append(stack.pop()[0])
+            if not stack:
+                return "".join(out)
+        elif ch == ",":
+            _drop_trailing_comma(out)
+            out.append(ch)
+            if stack[-1][0] == "}":
+                stack[-1][1] = True
+        elif ch == ":":
+            out.append(ch)
+            stack[-1][1] = False
+        else:
+            out.append(ch)
+
+    if in_string:
+        value = "" if key_string else "".join(out[string_start:])
+        del out[string_start:]
+        if value:
+            # A cut-off escape (`\` or `\u12`) is dropped with the rest of the lost text.
+            out.append(_PARTIAL_UNICODE_ESCAPE.sub("", value[:-1] if escape else value) + '"')
+    repaired = _trim_incomplete_tail("".join(out), stack)
+    for frame in reversed(stack):
+        repaired = repaired.rstrip().removesuffix(",") + frame[0]
+    return repaired
+
+
+def _drop_trailing_comma(out: list[str]) -> None:
+    i = len(out) - 1
+    while i >= 0 and out[i].isspace():
+        i -= 1
+    if i >= 0 and out[i] == ",":
+        del out[i:]
+
+
+def _trim_incomplete_tail(text: str, stack: list[list]) -> str:
+    # Peel off whatever cannot end a value, until the text ends in a complete one (or an opener).
+    # Only the end of the text is inspected, so this stays cheap on long outputs.
+    while True:
+        before = text
+        text = text.rstrip()
+        if text.endswith(","):
+            text = text[:-1]
+            stack[-1][1] = False
+        elif text.endswith(":"):
+            text = _strip_tail_string(text[:-1].rstrip())
+            stack[-1][1] = True
+        elif text.endswith('"') and stack[-1][0] == "}" and stack[-1][1]:
+            # A complete key with no colon after it.
+            text = _strip_tail_string(text)
+        elif text and text[-1] in _ASCII_LETTERS and not text.endswith(_LITERALS):
+            stem = text.rstrip(_ASCII_LETTERS)
+            word = text[len(stem) :]
+            text = stem + next((lit for lit in _LITERALS if lit.startswith(word)), "")
+        else:
+            stem = text.rstrip("-+.eE")
+            if stem != text and (stem[-1:].isdigit() or not stem[-1:].isalnum()):
+                text = stem
+        if text == before:
+            return text
+
+
+def _strip_tail_string(text: str) -> str:
+    # Drop the string literal `text` ends with; its opening quote is the last one not escaped.
+    j = len(text) - 2
+    while j >= 0:
+        if text[j] == '"':
+            k = j - 1
+            while k >= 0 and text[k] == "\\":
+                k -= 1
+            if (j - 1 - k) % 2 == 0:
+                return text[:j]
+        j -= 1
+    return text
+
+
+class SchemaAbort(ValueError):
+    """Raised by IncrementalJsonObjectParser when a stream is clearly not going to be a valid report."""
+
+
+class IncrementalJsonObjectParser:
+    """
+    Incremental scanner for a streamed JSON object (e.g. SSE completion deltas).
+
+    - The first significant output must be `{`, optionally inside a ```json fence; anything else
+      (Markdown prose, apologies) raises SchemaAbort immediately.
+    - Each top-level `"key": value` pair is decoded as soon as its value closes and passed to
+      `validate_field(key, value)`; a ValueError from it is re-raised as SchemaAbort.
+    - `finish()` parses the complete text with parse_json_object() (repairing a truncated stream).
+    """
+
+    def __init__(self, validate_field: Callable[[str, object], None] | None = None) -> None:
+        self._validate_field = validate_field
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._fence_open = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._expect_key = False
+        self._key: str | None = None
+        self._value_start = -1
+        self.complete = False
+        self.fields_seen: list[str] = []
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def feed(self, chunk: str) -> None:
+        if not chunk:
+            return
+        self._text += chunk
+        if self.complete:
+            return
+        if not self._started and not self._scan_preamble():
+            return
+        self._scan()
+
+    def finish(self, accept: Callable[[dict], object] | None = None) -> dict:
+        return parse_json_object(self._text, accept)
+
+    def _scan_preamble(self) -> bool:
+        stripped = self._text.lstrip()
+        if not stripped:
+            return False
+        if stripped.startswith("`"):
+            if len(stripped) < 3:
+                return False
+            if not stripped.startswith("```"):
+                raise SchemaAbort("Output does not start with a JSON object.")
+            newline = stripped.find("\n")
+            if newline == -1:
+                return False
+            body = stripped[newline + 1 :].lstrip()
+            if not body:
+                return False
+            if not body.startswith("{"):
+                raise SchemaAbort("Fenced output does not contain a JSON object.")
+            self._pos = len(self._text) - len(body)
+        elif stripped.startswith("{"):
+            self._pos = len(self._text) - len(stripped)
+        else:
+            raise SchemaAbort(f"Output does not start with a JSON object: {stripped[:40]!r}")
+        self._started = True
+        return True
+
+    def _scan(self) -> None:
+        text = self._text
+        i = self._pos
+        n = len(text)
+        while i < n:
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect_key:
+                        self._key = json.loads(text[self._string_start : i + 1])
+                        self._expect_key = False
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._expect_key = True
+            elif ch in "}]":
+                if self._depth == 1:
+                    self._close_value(i)
+                self._depth -= 1
+                if self._depth == 0:
+                    self.complete = True
+                    self._pos = i + 1
+                    return
+            elif self._depth == 1:
+                if ch == ":" and self._key is not None:
+                    self._value_start = i + 1
+                elif ch == ",":
+                    self._close_value(i)
+                    self._expect_key = True
+            i += 1
+        self._pos = i
+
+    def _close_value(self, end: int) -> None:
+        if self._key is None or self._value_start < 0:
+            return
+        key, raw = self._key, self._text[self._value_start : end]
+        self._key = None
+        self._value_start = -1
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError as e:
+            # Same repairs finish() applies (and counts) to the whole object; abort only if they fail.
+            value = _repair_value(raw)
+            if value is _UNREPAIRABLE:
+                raise SchemaAbort(f"Field {key!r} is not valid JSON: {e}") from e
+        self.fields_seen.append(key)
+        if self._validate_field is not None:
+            try:
+                self._validate_field(key, value)
+            except ValueError as e:
+                raise SchemaAbort(str(e)) from e
+
+
+_UNREPAIRABLE = object()
+
+
+def _repair_value(raw: str) -> object:
+    # repair_json() works on objects, so the value is repaired as the only field of a wrapper object.
+    try:
+        wrapped = json.loads(repair_json('{"v":' + raw + "}"))
+    except (json.JSONDecodeError, ValueError):
+        return _UNREPAIRABLE
+    return wrapped["v"] if isinstance(wrapped, dict) and "v" in wrapped else _UNREPAIRABLE
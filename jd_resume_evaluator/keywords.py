@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import re
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9_+.#/-]{1,30}")
+STOPWORDS = frozenset({"the", "and", "with", "for", "you", "your"})
+
+
+def extract_keywords(text: str, max_keywords: int) -> list[str]:
+    # Prefer backticked keywords if present.
+    backticked = re.findall(r"`([^`]{1,40})`", text)
+    candidates = [c.strip() for c in backticked if c.strip()]
+
+    # Otherwise, fall back to token-ish words.
+    if not candidates:
+        candidates = TOKEN_PATTERN.findall(text)
+
+    # Normalize and de-duplicate while keeping order.
+    seen: set[str] = set()
+    keywords: list[str] = []
+    for cand in candidates:
+        key = cand.strip()
+        if not key:
+            continue
+        if key.lower() in STOPWORDS:
+            continue
+        if key.lower() in seen:
+            continue
+        seen.add(key.lower())
+        keywords.append(key)
+        if len(keywords) >= max_keywords:
+            break
+    return keywords
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased index terms using the same token shape and stopwords as keyword extraction."""
+    return [t for t in (m.lower().rstrip(".") for m in TOKEN_PATTERN.findall(text)) if t and t not in STOPWORDS]
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import math
+from collections import Counter
+from dataclasses import dataclass
+
+from jd_resume_evaluator.keywords import extract_keywords, tokenize
+from jd_resume_evaluator.text_prep import BULLET_PREFIX, HEADING_PREFIX
+
+# Replaces the outline header when passages were picked by relevance.
+SELECTION_HEADER = (
+    "[NOTE] Input too large; kept the passages most relevant to the JD, in original order. "
+    "Evidence quotes must come from the included excerpts.\n"
+)
+
+_KEYWORD_WEIGHT = 2.0
+_TF_SATURATION = 1.2
+# Unstructured paragraphs are split into line groups of about this size so they can compete.
+_MAX_PASSAGE_CHARS = 1_500
+_MAX_LISTED = 6
+
+
+@dataclass(frozen=True)
+class PassageQuery:
+    """Weighted JD terms; `digest` identifies the query in preparation cache keys."""
+
+    weights: tuple[tuple[str, float], ...]
+    digest: str
+
+
+@dataclass(frozen=True)
+class _Passage:
+    section: int  # index into the heading list, -1 before the first heading
+    text: str
+
+
+@functools.lru_cache(maxsize=64)
+def passage_query(jd_text: str) -> PassageQuery:
+    """
+    Query terms for ranking CV passages against one JD.
+
+    - Every JD term (keywords.tokenize) counts once; terms of the extracted JD keywords count double.
+    - Term rarity is applied per CV at selection time (IDF over that CV's passages).
+    """
+    weights = dict.fromkeys(tokenize(jd_text), 1.0)
+    for keyword in extract_keywords(jd_text, max_keywords=40):
+        for term in tokenize(keyword):
+            weights[term] = _KEYWORD_WEIGHT
+    items = tuple(sorted(weights.items()))
+    return PassageQuery(weights=items, digest=hashlib.sha256(repr(items).encode("utf-8")).hexdigest())
+
+
+def _split_passages(text: str) -> tuple[list[str], list[_Passage]]:
+    """
+    Split normalized text into (headings, passages).
+
+    - A passage is one bullet (with its wrapped continuation lines) or one blank-line-separated paragraph.
+    - Headings are not passages; each passage records the section it belongs to.
+    """
+    headings: list[str] = []
+    passages: list[_Passage] = []
+    current: list[str] = []
+
+    def flush() -> None:
+        if not current:
+            return
+        section = len(headings) - 1
+        group: list[str] = []
+        size = 0
+        for line in current:
+            if group and size + len(line) + 1 > _MAX_PASSAGE_CHARS:
+                passages.append(_Passage(section=section, text="\n".join(group) + "\n"))
+                group, size = [], 0
+            group.append(line)
+            size += len(line) + 1
+        passages.append(_Passage(section=section, text="\n".join(group) + "\n"))
+        current.clear()
+
+    for line in text.splitlines():
+        if HEADING_PREFIX.match(line):
+            flush()
+            headings.append(line.strip())
+        elif not line.strip():
+            flush()
+        else:
+            if BULLET_PREFIX.match(line):
+                flush()
+            current.append(line)
+    flush()
+    return headings, passages
+
+
+def select_passages(text: str, max_chars: int, query: PassageQuery, label: str) -> tuple[str, list[str]] | None:
+    """
+    Fill `max_chars` with the passages of `text` that are most relevant to `query`.
+
+    - Passages are scored BM25-style against the weighted JD terms (saturated term frequency x IDF).
+    - The budget is filled greedily by score per character. A passage that does not fit is skipped,
+      so smaller ones further down the ranking can still use the remaining room.
+    - Output keeps the original order and repeats each kept passage's section heading once.
+    - Returns None when no passage shares a term with the JD (the caller falls back to the outline).
+    """
+    if text.startswith(SELECTION_HEADER):
+        text = text[len(SELECTION_HEADER) :]
+    headings, passages = _split_passages(text)
+    weights = dict(query.weights)
+    term_counts = [Counter(t for t in tokenize(p.text) if t in weights) for p in passages]
+
+    n = len(passages)
+    df = Counter(term for counts in term_counts for term in counts)
+    idf = {term: math.log(1.0 + (n - d + 0.5) / (d + 0.5)) for term, d in df.items()}
+    contributions = [
+        {
+            term: weights[term] * idf[term] * tf * (_TF_SATURATION + 1) / (tf + _TF_SATURATION)
+            for term, tf in counts.items()
+        }
+        for counts in term_counts
+    ]
+    scores = [sum(c.values()) for c in contributions]
+    ranked = sorted((i for i in range(n) if scores[i] > 0), key=lambda i: (-scores[i] / len(passages[i].text), i))
+    if not ranked:
+        return None
+
+    room = max_chars - len(SELECTION_HEADER)
+    used = 0
+    picked: list[int] = []
+    opened: set[int] = set()
+    for i in ranked:
+        passage = passages[i]
+        # +1 covers the blank line that may separate this passage from the previous kept one.
+        cost = len(passage.text) + 1
+        if passage.section >= 0 and passage.section not in opened:
+            cost += len(headings[passage.section]) + 1
+        if used + cost > room:
+            continue
+        used += cost
+        picked.append(i)
+        opened.add(passage.section)
+    if not picked:
+        return None
+    picked.sort()
+
+    out = [SELECTION_HEADER]
+    last_section: int | None = None
+    previous = -2
+    for i in picked:
+        passage = passages[i]
+        if passage.section != last_section:
+            if len(out) > 1:
+                out.append("\n")
+            if passage.section >= 0:
+                out.append(headings[passage.section] + "\n")
+            last_section = passage.section
+        elif i != previous + 1:
+            out.append("\n")
+        out.append(passage.text)
+        previous = i
+    selected = "".join(out)
+
+    unmatched = n - len(ranked)
+    notes = [
+        f"{label} passages ranked by JD relevance: kept {len(picked)} of {n} "
+        f"({len(selected)} of {len(text)} chars; {unmatched} shared no JD terms)."
+    ]
+    dropped = [_heading_name(headings[s]) for s in sorted({p.section for p in passages} - opened) if s >= 0]
+    if dropped:
+        notes.append(f"{label} sections with no kept passages: {_listing(dropped)}.")
+    matched: Counter[str] = Counter()
+    for i in picked:
+        matched.update(contributions[i])
+    if matched:
+        notes.append(f"{label} strongest JD terms in kept passages: {_listing([t for t, _ in matched.most_common()])}.")
+    return selected, notes
+
+
+def _heading_name(heading: str) -> str:
+    return heading.lstrip("#").strip()
+
+
+def _listing(names: list[str]) -> str:
+    shown = ", ".join(names[:_MAX_LISTED])
+    if len(names) > _MAX_LISTED:
+        shown += f" (+{len(names) - _MAX_LISTED} more)"
+    return shown
@@ -1,9 +1,22 @@
 from __future__ import annotations
 
+import functools
 import json
 
+from jd_resume_evaluator.report import schema_example
 from jd_resume_evaluator.text_prep import PreparedInputs
 
+# "classic": notes, JD, CV, then schema. "prefix": system text, schema and JD form a byte-identical
+# leading prefix per JD (provider prompt caching), per-CV content and notes come last.
+PROMPT_LAYOUTS = ("classic", "prefix")
+
+_SCORING_GUIDANCE = (
+    "Scoring guidance:\n"
+    "- overall_score: integer 0..100\n"
+    "- Provide 5+ follow_up_questions focused on uncertainties.\n"
+    "- Keep evidence_quotes short (1-3 sentences each) and copied verbatim.\n"
+)
+
 
 def build_system_prompt() -> str:
     return (
@@ -16,34 +29,20 @@ def build_system_prompt() -> str:
     )
 
 
+@functools.lru_cache(maxsize=1)
 def _schema_text() -> str:
-    schema = {
-        "overall_score": 0,
-        "recommend_interview": True,
-        "score_breakdown": {
-            "must_haves": 0,
-            "nice_to_haves": 0,
-            "llm_engineering": 0,
-            "mlops": 0,
-            "system_design": 0,
-            "impact_and_ownership": 0,
-        },
-        "strengths": [{"claim": "...", "evidence_quotes": ["..."]}],
-        "gaps": [{"gap": "...", "impact": "...", "evidence_quotes": ["..."]}],
-        "follow_up_questions": ["..."],
-        "risk_flags": ["..."],
-    }
-    return json.dumps(schema, ensure_ascii=False, indent=2)
-
-
-def build_user_prompt(prepared: PreparedInputs) -> str:
+    return json.dumps(schema_example(), ensure_ascii=False, indent=2)
+
+
+def build_user_prompt(prepared: PreparedInputs, layout: str = "classic") -> str:
+    if layout == "prefix":
+        return _prefix_for_jd(prepared.jd_text) + _cv_suffix(prepared)
+    if layout != "classic":
+        raise ValueError(f"Unknown prompt layout: {layout!r} (expected one of {', '.join(PROMPT_LAYOUTS)}).")
+
     meta_hint = ""
     if prepared.meta.truncation_notes:
-        meta_hint = (
-            "Input notes (may indicate truncation/excerpts):\n- "
-            + "\n- ".join(prepared.meta.truncation_notes)
-            + "\n\n"
-        )
+        meta_hint = _notes_text(prepared.meta.truncation_notes) + "\n"
 
     return (
         f"{meta_hint}"
@@ -57,9 +56,32 @@ def build_user_prompt(prepared: PreparedInputs) -> str:
         "</CV>\n\n"
         "Return JSON with exactly this schema (field names must match):\n"
         f"{_schema_text()}\n\n"
-        "Scoring guidance:\n"
-        "- overall_score: integer 0..100\n"
-        "- Provide 5+ follow_up_questions focused on uncertainties.\n"
-        "- Keep evidence_quotes short (1-3 sentences each) and copied verbatim.\n"
+        f"{_SCORING_GUIDANCE}"
     )
 
+
+@functools.lru_cache(maxsize=64)
+def _prefix_for_jd(jd_text: str) -> str:
+    # Everything before the CV depends only on the JD, so screening one JD against many CVs
+    # sends the same leading bytes every time.
+    return (
+        "Return JSON with exactly this schema (field names must match):\n"
+        f"{_schema_text()}\n\n"
+        f"{_SCORING_GUIDANCE}\n"
+        "Job Description (JD):\n"
+        "<JD>\n"
+        f"{jd_text}"
+        "</JD>\n\n"
+    )
+
+
+def _cv_suffix(prepared: PreparedInputs) -> str:
+    suffix = f"Candidate CV/Resume:\n<CV>\n{prepared.cv_text}</CV>\n"
+    if prepared.meta.truncation_notes:
+        suffix += "\n" + _notes_text(prepared.meta.truncation_notes)
+    return suffix
+
+
+def _notes_text(notes: list[str]) -> str:
+    return "Input notes (may indicate truncation/excerpts):\n- " + "\n- ".join(notes) + "\n"
+
@@ -0,0 +1,373 @@
+from __future__ import annotations
+
+import heapq
+import json
+import math
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from jd_resume_evaluator.keywords import extract_keywords, tokenize
+from jd_resume_evaluator.text_prep import normalize_text, read_text
+
+try:
+    import numpy as np
+except ImportError:  # optional: scoring falls back to a loop over the same arrays
+    np = None
+
+if TYPE_CHECKING:
+    from jd_resume_evaluator.corpus import PackedCorpus
+
+_INDEX_FILE = "index.json"
+_FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class RankedDocument:
+    path: str
+    score: float
+    rank: int
+
+
+@dataclass
+class _Segment:
+    # CSR layout: postings for terms[i] are doc_ids/tfs[offsets[i]:offsets[i + 1]].
+    terms: array
+    offsets: array
+    doc_ids: array
+    tfs: array
+
+    def bounds(self, term_id: int) -> tuple[int, int] | None:
+        i = bisect_left(self.terms, term_id)
+        if i == len(self.terms) or self.terms[i] != term_id:
+            return None
+        return self.offsets[i], self.offsets[i + 1]
+
+    def postings(self, term_id: int) -> tuple[array, array] | None:
+        bounds = self.bounds(term_id)
+        if bounds is None:
+            return None
+        lo, hi = bounds
+        return self.doc_ids[lo:hi], self.tfs[lo:hi]
+
+
+class LexicalIndex:
+    """
+    Persistent BM25 index over a CV corpus, used to pick the top-K CVs per JD before any LLM call.
+
+    - Terms come from keywords.tokenize(), i.e. the same token shape as the mock engine's JD keywords.
+    - Postings are compact `array('I')` CSR segments (no per-posting Python objects); scoring a JD
+      touches only the postings of its query terms and accumulates into one `array('d')`. With NumPy
+      installed that is one vectorized pass per segment over zero-copy views of the arrays.
+    - Document frequencies are stored in `index.json` and updated as segments are appended; document
+      lengths are kept per document. Neither needs a pass over the postings on open() or update().
+    - `update()` is incremental: unchanged files (same size + mtime) are skipped, new/changed files
+      are written as a new segment, and replaced/removed documents are tombstoned. Tombstoned
+      documents score 0 but still count in df and the document count (as in Lucene) until compact()
+      rewrites the segments without them.
+    """
+
+    def __init__(self, root: Path, *, k1: float = 1.2, b: float = 0.75) -> None:
+        self.root = Path(root)
+        self.k1 = k1
+        self.b = b
+        # docs[i] = [path, size, mtime_ns, length, live]
+        self.docs: list[list] = []
+        self.vocab: dict[str, int] = {}
+        self.segment_names: list[str] = []
+        self._segments: list[_Segment] = []
+        self._by_path: dict[str, int] = {}
+        # df[term_id]: documents (tombstoned ones included until compact()) containing the term.
+        self._df = array("I")
+        self._norms = array("d")
+
+    @classmethod
+    def open(cls, root: Path) -> "LexicalIndex":
+        index = cls(root)
+        meta_path = Path(root) / _INDEX_FILE
+        if not meta_path.exists():
+            return index
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("version") != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported index format in {meta_path}: {meta.get('version')}")
+        index.k1 = meta["k1"]
+        index.b = meta["b"]
+        index.docs = meta["docs"]
+        index.vocab = {term: i for i, term in enumerate(meta["vocab"])}
+        index.segment_names = meta["segments"]
+        index._segments = [_read_segment(index.root / name) for name in index.segment_names]
+        index._by_path = {doc[0]: i for i, doc in enumerate(index.docs) if doc[4]}
+        # Indexes written before df was stored get it counted once; the next save persists it.
+        index._df = array("I", meta["df"]) if "df" in meta else index._count_df()
+        index._refresh_norms()
+        return index
+
+    @property
+    def live_count(self) -> int:
+        return len(self._by_path)
+
+    def update(
+        self, paths: list[Path], *, prune: bool = False, corpus: PackedCorpus | None = None
+    ) -> tuple[int, int]:
+        """
+        Index new/changed files; with `prune`, tombstone indexed files not in `paths`. Returns (added, removed).
+
+        Files that are packed (and unchanged) in `corpus` are read from it instead of from disk.
+        """
+        pending: dict[int, Counter] = {}
+        seen: set[str] = set()
+        removed = 0
+        for path in paths:
+            key = str(Path(path).resolve())
+            seen.add(key)
+            st = os.stat(path)
+            existing = self._by_path.get(key)
+            if existing is not None:
+                doc = self.docs[existing]
+                if doc[1] == st.st_size and doc[2] == st.st_mtime_ns:
+                    continue
+                doc[4] = False
+                removed += 1
+
+            text = corpus.normalized_text(Path(path)) if corpus is not None else None
+            if text is None:
+                text = normalize_text(read_text(Path(path)))
+            counts = Counter(tokenize(text))
+            doc_id = len(self.docs)
+            self.docs.append([key, st.st_size, st.st_mtime_ns, sum(counts.values()), True])
+            self._by_path[key] = doc_id
+            pending[doc_id] = counts
+
+        if prune:
+            for key, doc_id in list(self._by_path.items()):
+                if key not in seen:
+                    self.docs[doc_id][4] = False
+                    del self._by_path[key]
+                    removed += 1
+
+        if pending:
+            self._append_segment(pending)
+        if pending or removed:
+            self._save()
+            self._refresh_norms()
+        return len(pending), removed
+
+    def compact(self) -> int:
+        """
+        Rewrite all segments as one without tombstoned documents; returns how many were dropped.
+
+        Document ids are renumbered and df becomes exact again. This is the one operation that reads
+        every posting, so run it after large prunes rather than after every update.
+        """
+        dropped = len(self.docs) - self.live_count
+        if not dropped and len(self._segments) <= 1:
+            return 0
+        remap: dict[int, int] = {}
+        docs: list[list] = []
+        for doc_id, doc in enumerate(self.docs):
+            if doc[4]:
+                remap[doc_id] = len(docs)
+                docs.append(doc)
+        by_term: dict[int, list[tuple[int, int]]] = {}
+        for seg in self._segments:
+            for i, term_id in enumerate(seg.terms):
+                lo, hi = seg.offsets[i], seg.offsets[i + 1]
+                for doc_id, tf in zip(seg.doc_ids[lo:hi], seg.tfs[lo:hi]):
+                    new_id = remap.get(doc_id)
+                    if new_id is not None:
+                        by_term.setdefault(term_id, []).append((new_id, tf))
+
+        old_names = self.segment_names
+        self.docs = docs
+        self._by_path = {doc[0]: i for i, doc in enumerate(docs)}
+        self.segment_names, self._segments = [], []
+        self._write_new_segment(by_term, first_number=_segment_number(old_names[-1]) + 1 if old_names else 1)
+        self._df = self._count_df()
+        # Until index.json names the new segment the old ones stay valid, so a crash leaves only an orphan.
+        self._save()
+        for name in old_names:
+            (self.root / name).unlink(missing_ok=True)
+        self._refresh_norms()
+        return dropped
+
+    def _append_segment(self, pending: dict[int, Counter]) -> None:
+        by_term: dict[int, list[tuple[int, int]]] = {}
+        for doc_id, counts in pending.items():
+            for term, tf in counts.items():
+                term_id = self.vocab.setdefault(term, len(self.vocab))
+                by_term.setdefault(term_id, []).append((doc_id, tf))
+        self._df.extend([0] * (len(self.vocab) - len(self._df)))
+        for term_id, postings in by_term.items():
+            self._df[term_id] += len(postings)
+        last = _segment_number(self.segment_names[-1]) if self.segment_names else 0
+        self._write_new_segment(by_term, first_number=last + 1)
+
+    def _write_new_segment(self, by_term: dict[int, list[tuple[int, int]]], *, first_number: int) -> None:
+        terms, offsets, doc_ids, tfs = array("I"), array("I", [0]), array("I"), array("I")
+        for term_id in sorted(by_term):
+            terms.append(term_id)
+            for doc_id, tf in by_term[term_id]:
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+            offsets.append(len(doc_ids))
+        segment = _Segment(terms=terms, offsets=offsets, doc_ids=doc_ids, tfs=tfs)
+
+        name = f"seg-{first_number:06d}.bin"
+        self.root.mkdir(parents=True, exist_ok=True)
+        _write_segment(self.root / name, segment)
+        self.segment_names.append(name)
+        self._segments.append(segment)
+
+    def _count_df(self) -> array:
+        # Postings per term, from the CSR offsets (no pass over the postings themselves).
+        df = array("I", bytes(array("I").itemsize * len(self.vocab)))
+        for seg in self._segments:
+            offsets = seg.offsets
+            for i, term_id in enumerate(seg.terms):
+                df[term_id] += offsets[i + 1] - offsets[i]
+        return df
+
+    def _refresh_norms(self) -> None:
+        # BM25 length norms (one per document, not per posting); tombstoned documents get an
+        # infinite norm, so their postings add nothing.
+        lengths = [doc[3] for doc in self.docs if doc[4]]
+        avg_len = (sum(lengths) / len(lengths) if lengths else 0.0) or 1.0
+        k1, b = self.k1, self.b
+        self._norms = array(
+            "d", (k1 * (1 - b + b * doc[3] / avg_len) if doc[4] else math.inf for doc in self.docs)
+        )
+
+    def _save(self) -> None:
+        vocab = [""] * len(self.vocab)
+        for term, i in self.vocab.items():
+            vocab[i] = term
+        meta = {
+            "version": _FORMAT_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "docs": self.docs,
+            "vocab": vocab,
+            "segments": self.segment_names,
+            "df": self._df.tolist(),
+        }
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / (_INDEX_FILE + ".tmp")
+        tmp.write_text(json.dumps(meta, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.root / _INDEX_FILE)
+
+    def query_terms(self, jd_text: str, max_terms: int = 64) -> list[str]:
+        terms: list[str] = []
+        for kw in extract_keywords(jd_text, max_keywords=max_terms):
+            terms.extend(tokenize(kw))
+        return list(dict.fromkeys(terms))
+
+    def score(self, terms: list[str]) -> array:
+        """BM25 scores for every document id (tombstoned documents score 0)."""
+        scores = array("d", bytes(8 * len(self.docs)))
+        n_docs, k1 = len(self.docs), self.k1
+        weights: list[tuple[int, float]] = []
+        for term in terms:
+            term_id = self.vocab.get(term)
+            if term_id is None or not self._df[term_id]:
+                continue
+            df = self._df[term_id]
+            weights.append((term_id, math.log(1 + (n_docs - df + 0.5) / (df + 0.5)) * (k1 + 1)))
+        if not weights or not self.live_count:
+            return scores
+        if np is not None:
+            _score_vectorized(scores, weights, self._segments, self._norms)
+            return scores
+
+        norms = self._norms
+        for term_id, weight in weights:
+            for seg in self._segments:
+                postings = seg.postings(term_id)
+                if postings is None:
+                    continue
+                for d, tf in zip(*postings):
+                    scores[d] += weight * tf / (tf + norms[d])
+        return scores
+
+    def rank(self, jd_text: str, *, top_k: int, among: list[Path] | None = None) -> list[RankedDocument]:
+        scores = self.score(self.query_terms(jd_text))
+        if among is not None:
+            candidates = [self._by_path[k] for k in (str(Path(p).resolve()) for p in among) if k in self._by_path]
+        else:
+            candidates = list(self._by_path.values())
+        # The top_k largest scores (ties by path), without sorting every candidate.
+        top = heapq.nsmallest(top_k, candidates, key=lambda d: (-scores[d], self.docs[d][0]))
+        return [
+            RankedDocument(path=self.docs[d][0], score=round(scores[d], 6), rank=i + 1) for i, d in enumerate(top)
+        ]
+
+
+def _score_vectorized(
+    scores: array, weights: list[tuple[int, float]], segments: list[_Segment], norms: array
+) -> None:
+    # NumPy views share memory with the arrays, so `scores` is updated in place.
+    out = np.frombuffer(scores, dtype=np.float64)
+    norm = np.frombuffer(norms, dtype=np.float64)
+    id_type = np.dtype(f"u{array('I').itemsize}")
+    for seg in segments:
+        doc_ids = np.frombuffer(seg.doc_ids, dtype=id_type)
+        tfs = np.frombuffer(seg.tfs, dtype=id_type)
+        ids_parts, weight_parts = [], []
+        for term_id, weight in weights:
+            bounds = seg.bounds(term_id)
+            if bounds is None:
+                continue
+            ids = doc_ids[bounds[0] : bounds[1]]
+            tf = tfs[bounds[0] : bounds[1]].astype(np.float64)
+            ids_parts.append(ids)
+            weight_parts.append(weight * tf / (tf + norm[ids]))
+        if ids_parts:
+            # bincount sums contributions of every query term to a document in one pass.
+            out += np.bincount(np.concatenate(ids_parts), np.concatenate(weight_parts), minlength=len(out))
+
+
+def _segment_number(name: str) -> int:
+    return int(name[len("seg-") : -len(".bin")])
+
+
+def _write_segment(path: Path, segment: _Segment) -> None:
+    header = array("I", [len(segment.terms), len(segment.doc_ids)])
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as fh:
+        for arr in (header, segment.terms, segment.offsets, segment.doc_ids, segment.tfs):
+            fh.write(_to_le(arr).tobytes())
+    os.replace(tmp, path)
+
+
+def _read_segment(path: Path) -> _Segment:
+    data = path.read_bytes()
+    itemsize = array("I").itemsize
+    header = _from_le(data[: 2 * itemsize])
+    n_terms, n_postings = header[0], header[1]
+    sizes = [n_terms, n_terms + 1, n_postings, n_postings]
+    arrays = []
+    pos = 2 * itemsize
+    for n in sizes:
+        arrays.append(_from_le(data[pos : pos + n * itemsize]))
+        pos += n * itemsize
+    return _Segment(*arrays)
+
+
+def _to_le(arr: array) -> array:
+    if sys.byteorder == "little":
+        return arr
+    swapped = array(arr.typecode, arr)
+    swapped.byteswap()
+    return swapped
+
+
+def _from_le(data: bytes) -> array:
+    arr = array("I")
+    arr.frombytes(data)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Iterator
+
+from jd_resume_evaluator.timing import count
+
+
+class Priority(IntEnum):
+    # Lower value is served first.
+    interactive = 0
+    bulk = 1
+
+
+_PRIORITY: ContextVar[Priority] = ContextVar("jd_resume_request_priority", default=Priority.interactive)
+
+# Pause used for a 429 that carries neither Retry-After nor a rate-limit reset header.
+_DEFAULT_BACKOFF_SECONDS = 1.0
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+@contextlib.contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """
+    Queue LLM requests made in this context at `priority`.
+
+    Only asyncio tasks and asyncio.to_thread() copy the context. Requests from a plain thread or an
+    executor worker run at the default priority unless submitted via contextvars.copy_context().run.
+    """
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+class _TokenBucket:
+    """Continuously refilled bucket of `per_minute` units holding at most `burst_seconds` worth."""
+
+    def __init__(self, per_minute: float, burst_seconds: float) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def wait_seconds(self, amount: float, now: float) -> float:
+        self._refill(now)
+        # A request larger than the bucket only waits for a full bucket (and leaves it in debt).
+        need = min(amount, self.capacity)
+        return 0.0 if self.level >= need else (need - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+    def cap(self, remaining: float, now: float) -> None:
+        # The provider's view wins when it has less left than we think (other clients, clock skew).
+        self._refill(now)
+        self.level = min(self.level, remaining)
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+@dataclass(frozen=True)
+class Grant:
+    started: float
+    tokens: int
+
+
+class RequestScheduler:
+    """
+    Admission control in front of an async LLM engine (one event loop).
+
+    - Requests-per-minute and tokens-per-minute token buckets; each request is charged its estimated
+      tokens up front and settle() corrects the TPM bucket once the provider reports real usage.
+    - Waiters are served strictly by Priority, FIFO within a level; the head of the line is never
+      overtaken, so a large request is not starved by smaller ones behind it.
+    - Concurrency adapts between 1 and `max_concurrency`: it grows by about one per window of
+      healthy responses and is cut when short-term latency rises well above its long-term average,
+      on 5xx/timeouts, and halved on 429.
+    - A 429 pauses all dispatch for its `Retry-After`; `x-ratelimit-remaining-*` headers cap the
+      buckets, and an exhausted limit pauses until its `x-ratelimit-reset-*`.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        burst_seconds: float = 10.0,
+        latency_tolerance: float = 2.0,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1.")
+        for name, value in (("requests_per_minute", requests_per_minute), ("tokens_per_minute", tokens_per_minute)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be > 0.")
+        self.max_concurrency = max_concurrency
+        self.latency_tolerance = latency_tolerance
+        self._requests = _TokenBucket(requests_per_minute, burst_seconds) if requests_per_minute else None
+        self._tokens = _TokenBucket(tokens_per_minute, burst_seconds) if tokens_per_minute else None
+        self._limit = float(max_concurrency)
+        self._in_flight = 0
+        self._waiters: list[tuple[int, int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+        self._latency_fast: float | None = None
+        self._latency_slow: float | None = None
+        self._last_decrease = 0.0
+        self.throttled = 0
+        self.granted = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    async def acquire(self, tokens: int) -> Grant:
+        """Wait for a slot and for RPM/TPM budget at the current context's priority."""
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(_PRIORITY.get()), next(self._seq), tokens, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as the caller was cancelled: hand the slot back.
+                self.release(future.result(), status=None, headers=None, sent=False)
+            raise
+        return future.result()
+
+    def release(
+        self,
+        grant: Grant,
+        *,
+        status: int | None,
+        headers: dict[str, str] | None,
+        sent: bool = True,
+    ) -> None:
+        """
+        Return a slot and feed the outcome back into the limits.
+
+        `status` is None when no response arrived (timeout/connection error); `sent=False` refunds
+        a grant whose request never went out.
+        """
+        self._in_flight -= 1
+        now = time.monotonic()
+        if not sent:
+            if self._requests is not None:
+                self._requests.give(1)
+            if self._tokens is not None:
+                self._tokens.give(grant.tokens)
+        else:
+            if status == 429 and self._tokens is not None:
+                # Rejected requests do not consume tokens.
+                self._tokens.give(grant.tokens)
+            self._observe(now, now - grant.started, status, headers or {})
+        self._dispatch()
+
+    def settle(self, charged: int, actual: int) -> None:
+        """Correct the TPM bucket once the provider has reported the tokens a request really used."""
+        if self._tokens is None or actual <= 0:
+            return
+        if actual > charged:
+            self._tokens.take(actual - charged)
+        else:
+            self._tokens.give(charged - actual)
+
+    def stats(self) -> dict:
+        return {
+            "concurrency_limit": self.limit,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "waiting": sum(1 for *_, f in self._waiters if not f.done()),
+            "granted": self.granted,
+            "throttled": self.throttled,
+            "paused_seconds": round(max(0.0, self._paused_until - time.monotonic()), 3),
+        }
+
+    def _observe(self, now: float, latency: float, status: int | None, headers: dict[str, str]) -> None:
+        self._apply_headers(now, headers)
+        if status == 429:
+            self.throttled += 1
+            count("scheduler.throttled")
+            retry_after = _retry_after_seconds(headers)
+            self._pause(now, _DEFAULT_BACKOFF_SECONDS if retry_after is None else retry_after)
+            self._decrease(now, 0.5)
+        elif status is None or status >= 500:
+            self._decrease(now, 0.9)
+        elif status < 400:
+            fast = latency if self._latency_fast is None else 0.7 * self._latency_fast + 0.3 * latency
+            slow = latency if self._latency_slow is None else 0.95 * self._latency_slow + 0.05 * latency
+            self._latency_fast, self._latency_slow = fast, slow
+            if fast > self.latency_tolerance * slow:
+                self._decrease(now, 0.9)
+            else:
+                self._limit = min(float(self.max_concurrency), self._limit + 1.0 / self._limit)
+
+    def _decrease(self, now: float, factor: float) -> None:
+        # Responses to requests already in flight report the same overload; cut once per round trip.
+        if now - self._last_decrease < (self._latency_fast or 0.0):
+            return
+        self._last_decrease = now
+        self._limit = max(1.0, self._limit * factor)
+
+    def _pause(self, now: float, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, now + seconds)
+
+    def _apply_headers(self, now: float, headers: dict[str, str]) -> None:
+        for bucket, kind in ((self._requests, "requests"), (self._tokens, "tokens")):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is None:
+                continue
+            try:
+                left = float(remaining)
+            except ValueError:
+                continue
+            if bucket is not None:
+                bucket.cap(left, now)
+            if left <= 0:
+                reset = _duration_seconds(headers.get(f"x-ratelimit-reset-{kind}", ""))
+                self._pause(now, reset if reset is not None else _DEFAULT_BACKOFF_SECONDS)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self._in_flight >= self.limit:
+                return
+            now = time.monotonic()
+            wait = max(
+                self._paused_until - now,
+                self._requests.wait_seconds(1, now) if self._requests is not None else 0.0,
+                self._tokens.wait_seconds(tokens, now) if self._tokens is not None else 0.0,
+            )
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            if self._requests is not None:
+                self._requests.take(1)
+            if self._tokens is not None:
+                self._tokens.take(tokens)
+            self._in_flight += 1
+            self.granted += 1
+            future.set_result(Grant(started=now, tokens=tokens))
+
+
+def _retry_after_seconds(headers: dict[str, str]) -> float | None:
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        # HTTP-date form is rare for API rate limits.
+        return None
+
+
+def _duration_seconds(value: str) -> float | None:
+    # OpenAI-style reset durations: "20ms", "1s", "6m0s", "1h2m3.5s".
+    parts = _DURATION_PART.findall(value.strip())
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
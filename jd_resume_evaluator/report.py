@@ -1,22 +1,23 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Callable
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class EvidenceBackedClaim:
     claim: str
     evidence_quotes: list[str]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Gap:
     gap: str
     impact: str
     evidence_quotes: list[str]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class EvaluationReport:
     overall_score: int
     recommend_interview: bool
@@ -28,68 +29,186 @@ class EvaluationReport:
 
     @staticmethod
     def from_dict(data: dict) -> "EvaluationReport":
-        strengths = [EvidenceBackedClaim(**item) for item in data.get("strengths", [])]
-        gaps = [Gap(**item) for item in data.get("gaps", [])]
-        return EvaluationReport(
-            overall_score=int(data["overall_score"]),
-            recommend_interview=bool(data["recommend_interview"]),
-            score_breakdown={str(k): int(v) for k, v in data.get("score_breakdown", {}).items()},
-            strengths=strengths,
-            gaps=gaps,
-            follow_up_questions=[str(q) for q in data.get("follow_up_questions", [])],
-            risk_flags=[str(r) for r in data.get("risk_flags", [])],
-        )
+        return parse_report(data)
 
 
-def validate_report_dict(data: dict) -> None:
-    if not isinstance(data, dict):
-        raise ValueError("Report must be a JSON object.")
+@dataclass(frozen=True, slots=True)
+class FieldSpec:
+    """
+    One top-level report field: the single definition used for validation, construction and the prompt.
 
-    required_top = [
-        "overall_score",
-        "recommend_interview",
-        "score_breakdown",
-        "strengths",
-        "gaps",
-        "follow_up_questions",
-        "risk_flags",
-    ]
-    missing = [k for k in required_top if k not in data]
-    if missing:
-        raise ValueError(f"Missing required fields: {missing}")
+    - `example` is the field's value in the JSON scaffold shown to the model.
+    - `parse(value, report)` validates and converts in one step. `report` is the whole report dict,
+      or None when a field is checked on its own (streaming).
+    - `schema` is the field's JSON Schema for provider-side structured output. It is kept to the
+      subset strict providers accept; ranges and minimum lengths stay in `parse`.
+    """
+
+    name: str
+    example: object
+    parse: Callable[[object, dict | None], object]
+    schema: dict
 
-    score = data["overall_score"]
-    if not isinstance(score, int) or not (0 <= score <= 100):
+
+def _parse_overall_score(value: object, report: dict | None) -> int:
+    if not isinstance(value, int) or not (0 <= value <= 100):
         raise ValueError("overall_score must be an integer 0..100.")
+    return int(value)
+
 
-    if not isinstance(data["recommend_interview"], bool):
+def _parse_recommend_interview(value: object, report: dict | None) -> bool:
+    if not isinstance(value, bool):
         raise ValueError("recommend_interview must be boolean.")
+    return value
+
 
-    if not isinstance(data["score_breakdown"], dict):
+def _parse_score_breakdown(value: object, report: dict | None) -> dict[str, int]:
+    if not isinstance(value, dict):
         raise ValueError("score_breakdown must be an object.")
+    scores: dict[str, int] = {}
+    for k, v in value.items():
+        if type(v) is not int or not (0 <= v <= 100):
+            raise ValueError(f"score_breakdown[{k!r}] must be an integer 0..100.")
+        scores[str(k)] = v
+    return scores
 
-    if not isinstance(data["strengths"], list) or not isinstance(data["gaps"], list):
+
+def _check_arrays(value: object, report: dict | None) -> list:
+    # Strengths and gaps share one message; with the whole report both are checked up front.
+    if not isinstance(value, list) or (report is not None and not isinstance(report.get("gaps"), list)):
         raise ValueError("strengths and gaps must be arrays.")
+    return value
+
 
-    for idx, item in enumerate(data["strengths"]):
+def _parse_strengths(value: object, report: dict | None) -> list[EvidenceBackedClaim]:
+    claims = []
+    for idx, item in enumerate(_check_arrays(value, report)):
         if not isinstance(item, dict):
             raise ValueError(f"strengths[{idx}] must be an object.")
         if "claim" not in item or "evidence_quotes" not in item:
             raise ValueError(f"strengths[{idx}] must contain claim and evidence_quotes.")
-        if not isinstance(item["evidence_quotes"], list) or not item["evidence_quotes"]:
-            raise ValueError(f"strengths[{idx}].evidence_quotes must be a non-empty array.")
+        quotes = item["evidence_quotes"]
+        if not isinstance(quotes, list) or not quotes or not all(isinstance(q, str) for q in quotes):
+            raise ValueError(f"strengths[{idx}].evidence_quotes must be a non-empty array of strings.")
+        claims.append(EvidenceBackedClaim(claim=item["claim"], evidence_quotes=quotes))
+    return claims
+
 
-    for idx, item in enumerate(data["gaps"]):
+def _parse_gaps(value: object, report: dict | None) -> list[Gap]:
+    if not isinstance(value, list):
+        raise ValueError("strengths and gaps must be arrays.")
+    gaps = []
+    for idx, item in enumerate(value):
         if not isinstance(item, dict):
             raise ValueError(f"gaps[{idx}] must be an object.")
         for key in ("gap", "impact", "evidence_quotes"):
             if key not in item:
                 raise ValueError(f"gaps[{idx}] missing {key}.")
-        if not isinstance(item["evidence_quotes"], list) or not item["evidence_quotes"]:
-            raise ValueError(f"gaps[{idx}].evidence_quotes must be a non-empty array.")
+        quotes = item["evidence_quotes"]
+        if not isinstance(quotes, list) or not quotes or not all(isinstance(q, str) for q in quotes):
+            raise ValueError(f"gaps[{idx}].evidence_quotes must be a non-empty array of strings.")
+        gaps.append(Gap(gap=item["gap"], impact=item["impact"], evidence_quotes=quotes))
+    return gaps
+
 
-    if not isinstance(data["follow_up_questions"], list) or len(data["follow_up_questions"]) < 5:
+def _parse_follow_up_questions(value: object, report: dict | None) -> list[str]:
+    if not isinstance(value, list) or len(value) < 5:
         raise ValueError("follow_up_questions must be an array with at least 5 items.")
-    if not isinstance(data["risk_flags"], list):
+    return [str(q) for q in value]
+
+
+def _parse_risk_flags(value: object, report: dict | None) -> list[str]:
+    if not isinstance(value, list):
         raise ValueError("risk_flags must be an array.")
+    return [str(r) for r in value]
+
+
+def _object_schema(properties: dict[str, dict]) -> dict:
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+def _array_schema(items: dict, description: str | None = None) -> dict:
+    schema = {"type": "array", "items": items}
+    if description is not None:
+        schema["description"] = description
+    return schema
+
+
+_STRING = {"type": "string"}
+_SCORE_DIMENSIONS = ("must_haves", "nice_to_haves", "llm_engineering", "mlops", "system_design", "impact_and_ownership")
+
+# The report schema, in the order fields are validated and shown to the model.
+REPORT_FIELDS: tuple[FieldSpec, ...] = (
+    FieldSpec("overall_score", 0, _parse_overall_score, {"type": "integer", "description": "0..100"}),
+    FieldSpec("recommend_interview", True, _parse_recommend_interview, {"type": "boolean"}),
+    FieldSpec(
+        "score_breakdown",
+        {name: 0 for name in _SCORE_DIMENSIONS},
+        _parse_score_breakdown,
+        _object_schema({name: {"type": "integer"} for name in _SCORE_DIMENSIONS}),
+    ),
+    FieldSpec(
+        "strengths",
+        [{"claim": "...", "evidence_quotes": ["..."]}],
+        _parse_strengths,
+        _array_schema(_object_schema({"claim": _STRING, "evidence_quotes": _array_schema(_STRING)})),
+    ),
+    FieldSpec(
+        "gaps",
+        [{"gap": "...", "impact": "...", "evidence_quotes": ["..."]}],
+        _parse_gaps,
+        _array_schema(_object_schema({"gap": _STRING, "impact": _STRING, "evidence_quotes": _array_schema(_STRING)})),
+    ),
+    FieldSpec("follow_up_questions", ["..."], _parse_follow_up_questions, _array_schema(_STRING, "At least 5 items.")),
+    FieldSpec("risk_flags", ["..."], _parse_risk_flags, _array_schema(_STRING)),
+)
+
+REQUIRED_TOP_LEVEL = tuple(spec.name for spec in REPORT_FIELDS)
+_FIELDS_BY_NAME = {spec.name: spec for spec in REPORT_FIELDS}
+
+
+def schema_example() -> dict:
+    """The JSON scaffold shown to the model (field names and value shapes)."""
+    return {spec.name: spec.example for spec in REPORT_FIELDS}
+
+
+def report_json_schema() -> dict:
+    """JSON Schema of the whole report, for provider-side structured output (`response_format`)."""
+    return _object_schema({spec.name: spec.schema for spec in REPORT_FIELDS})
+
+
+def parse_report(data: object) -> EvaluationReport:
+    """
+    Validate a report dict and build the (slotted) EvaluationReport in a single pass.
+
+    Raises ValueError naming the first offending field, exactly as validate_report_dict() does.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Report must be a JSON object.")
+
+    missing = [k for k in REQUIRED_TOP_LEVEL if k not in data]
+    if missing:
+        raise ValueError(f"Missing required fields: {missing}")
+
+    return EvaluationReport(*[spec.parse(data[spec.name], data) for spec in REPORT_FIELDS])
+
+
+def validate_report_dict(data: dict) -> None:
+    parse_report(data)
+
+
+def validate_report_field(name: str, value: object) -> None:
+    """
+    Validate one top-level report field in isolation.
 
+    Used by the streaming parser, which checks fields as soon as they arrive. Unknown field names
+    are accepted (the report schema does not forbid extra keys).
+    """
+    spec = _FIELDS_BY_NAME.get(name)
+    if spec is not None:
+        spec.parse(value, None)
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import re
+import struct
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: the single-writer rule is not enforced
+    fcntl = None
+
+_INDEX_FILE = "index.bin"
+_LOCK_FILE = "writer.lock"
+# jd digest prefix, cv digest prefix, shard number, byte offset, byte length.
+_INDEX_ENTRY = struct.Struct("<8s8sIQI")
+_SHARD_NAME = re.compile(r"^shard-(\d{6})\.jsonl(\.gz)?$")
+
+
+@dataclass(frozen=True)
+class RecordLocation:
+    shard: str
+    offset: int
+    length: int
+
+
+def content_digest(data: bytes | str) -> str:
+    """sha256 hex of an input document (file bytes, or UTF-8 text for in-memory inputs)."""
+    if isinstance(data, str):
+        data = data.encode("utf-8", errors="surrogatepass")
+    return hashlib.sha256(data).hexdigest()
+
+
+class ShardedResultStore:
+    """
+    Append-only store of evaluation records in size-rotated JSONL shards.
+
+    - One compact JSON line per record in `shard-NNNNNN.jsonl`. With `compress=True` the shard is
+      `.jsonl.gz` and each record is its own gzip member, so `zcat` still reads the whole shard and a
+      single record can be decompressed on its own.
+    - `index.bin` holds fixed-width entries (JD/CV digest prefixes → shard, offset, length) and is
+      loaded into memory on open for lookups by JD/CV hash.
+    - Appends are buffered and written + fsynced every `flush_records` records or `flush_bytes`
+      bytes (and on flush()/close()); shard data is synced before the index entries that point at it.
+    - On open, index entries past the end of their shard and shard bytes past the last indexed record
+      (a crash mid-flush) are trimmed, so the store reopens consistent.
+    - One writer per directory: a writable open takes an exclusive flock on `writer.lock` and raises
+      RuntimeError if another store (in any process) holds it, since two writers would interleave
+      offsets and each would trim the other's unindexed records on open. The lock is held until close().
+      Concurrent appends from threads of the one writer are serialized.
+    - Readers next to a live writer use `read_only=True`, which never locks, trims or creates files.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        shard_max_bytes: int = 256 * 1024 * 1024,
+        compress: bool = False,
+        flush_records: int = 64,
+        flush_bytes: int = 4 * 1024 * 1024,
+        read_only: bool = False,
+    ) -> None:
+        if shard_max_bytes <= 0:
+            raise ValueError("shard_max_bytes must be > 0.")
+        if flush_records < 1:
+            raise ValueError("flush_records must be >= 1.")
+        self.root = Path(root)
+        self.shard_max_bytes = shard_max_bytes
+        self.compress = compress
+        self.flush_records = flush_records
+        self.flush_bytes = flush_bytes
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._index: dict[tuple[bytes, bytes], list[tuple[int, int, int]]] = {}
+        self._locations: list[tuple[int, int, int]] = []
+        self._shard_sizes: dict[int, int] = {}
+        self._buffer: list[bytes] = []
+        self._buffer_bytes = 0
+        self._pending_entries: list[bytes] = []
+        self._shard_fh = None
+        self._index_fh = None
+        self._lock_fh = None
+
+        if read_only:
+            if not self.root.is_dir():
+                raise ValueError(f"Result store not found: {self.root}")
+            self._recover(trim=False)
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock_fh = _lock_writer(self.root)
+        try:
+            self._recover(trim=True)
+            self._shard = self._open_shard()
+            self._index_fh = open(self.root / _INDEX_FILE, "ab")
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self) -> "ShardedResultStore":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def append(self, record: dict, *, jd_sha256: str, cv_sha256: str) -> RecordLocation:
+        """Buffer one record; it is durable after the next flush (automatic, flush() or close())."""
+        if self.read_only:
+            raise RuntimeError("Result store was opened read-only.")
+        line = json.dumps(
+            {"jd_sha256": jd_sha256, "cv_sha256": cv_sha256, **record}, ensure_ascii=False, separators=(",", ":")
+        )
+        data = line.encode("utf-8") + b"\n"
+        if self.compress:
+            data = gzip.compress(data, compresslevel=6, mtime=0)
+
+        with self._lock:
+            end = self._shard_sizes[self._shard] + self._buffer_bytes
+            if end and end + len(data) > self.shard_max_bytes:
+                self._flush_locked()
+                self._shard_fh.close()
+                self._shard = self._open_shard(self._shard + 1)
+                end = 0
+            entry = _INDEX_ENTRY.pack(
+                bytes.fromhex(jd_sha256)[:8], bytes.fromhex(cv_sha256)[:8], self._shard, end, len(data)
+            )
+            self._buffer.append(data)
+            self._buffer_bytes += len(data)
+            self._pending_entries.append(entry)
+            location = RecordLocation(shard=self._shard_name(self._shard), offset=end, length=len(data))
+            if len(self._buffer) >= self.flush_records or self._buffer_bytes >= self.flush_bytes:
+                self._flush_locked()
+        return location
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            if self._shard_fh is not None:
+                self._shard_fh.close()
+                self._shard_fh = None
+            if self._index_fh is not None:
+                self._index_fh.close()
+                self._index_fh = None
+            if self._lock_fh is not None:
+                # Closing the descriptor releases the flock.
+                self._lock_fh.close()
+                self._lock_fh = None
+
+    def lookup(self, jd_sha256: str, cv_sha256: str) -> list[dict]:
+        """All flushed records for a JD/CV pair, oldest first."""
+        key = (bytes.fromhex(jd_sha256)[:8], bytes.fromhex(cv_sha256)[:8])
+        with self._lock:
+            locations = list(self._index.get(key, ()))
+        records = [self._read(shard, offset, length) for shard, offset, length in locations]
+        # Prefixes can collide; the record carries the full digests.
+        return [r for r in records if r["jd_sha256"] == jd_sha256 and r["cv_sha256"] == cv_sha256]
+
+    def iter_records(self) -> Iterator[dict]:
+        """Every indexed record in append order (each shard is opened once and read front to back)."""
+        with self._lock:
+            locations = list(self._locations)
+        for shard, group in itertools.groupby(locations, key=lambda loc: loc[0]):
+            path = self.root / self._shard_name(shard)
+            with open(path, "rb") as fh:
+                for _, offset, length in group:
+                    fh.seek(offset)
+                    yield _decode(fh.read(length), path)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._locations)
+
+    def _flush_locked(self) -> None:
+        if self.read_only or not self._buffer:
+            return
+        self._shard_fh.write(b"".join(self._buffer))
+        self._shard_fh.flush()
+        os.fsync(self._shard_fh.fileno())
+        self._shard_sizes[self._shard] += self._buffer_bytes
+
+        self._index_fh.write(b"".join(self._pending_entries))
+        self._index_fh.flush()
+        os.fsync(self._index_fh.fileno())
+        for entry in self._pending_entries:
+            jd, cv, shard, offset, length = _INDEX_ENTRY.unpack(entry)
+            self._index.setdefault((jd, cv), []).append((shard, offset, length))
+            self._locations.append((shard, offset, length))
+
+        self._buffer.clear()
+        self._pending_entries.clear()
+        self._buffer_bytes = 0
+
+    def _read(self, shard: int, offset: int, length: int) -> dict:
+        path = self.root / self._shard_name(shard)
+        with open(path, "rb") as fh:
+            fh.seek(offset)
+            return _decode(fh.read(length), path)
+
+    def _shard_name(self, number: int) -> str:
+        for name in (f"shard-{number:06d}.jsonl", f"shard-{number:06d}.jsonl.gz"):
+            if (self.root / name).exists():
+                return name
+        return f"shard-{number:06d}.jsonl" + (".gz" if self.compress else "")
+
+    def _open_shard(self, number: int | None = None) -> int:
+        if number is None:
+            number = max(self._shard_sizes, default=1)
+            # Keep appending to the newest shard only if its format matches this writer's.
+            if number in self._shard_sizes and self._shard_name(number).endswith(".gz") != self.compress:
+                number += 1
+        path = self.root / self._shard_name(number)
+        is_new = not path.exists()
+        self._shard_fh = open(path, "ab")
+        self._shard_sizes.setdefault(number, path.stat().st_size)
+        if is_new:
+            _fsync_dir(self.root)
+        return number
+
+    def _recover(self, *, trim: bool) -> None:
+        for path in self.root.iterdir():
+            match = _SHARD_NAME.match(path.name)
+            if match:
+                self._shard_sizes[int(match.group(1))] = path.stat().st_size
+
+        index_path = self.root / _INDEX_FILE
+        raw = index_path.read_bytes() if index_path.exists() else b""
+        valid = 0
+        indexed_end: dict[int, int] = {}
+        for pos in range(0, len(raw) - _INDEX_ENTRY.size + 1, _INDEX_ENTRY.size):
+            jd, cv, shard, offset, length = _INDEX_ENTRY.unpack_from(raw, pos)
+            if offset + length > self._shard_sizes.get(shard, -1):
+                break
+            self._index.setdefault((jd, cv), []).append((shard, offset, length))
+            self._locations.append((shard, offset, length))
+            indexed_end[shard] = max(indexed_end.get(shard, 0), offset + length)
+            valid = pos + _INDEX_ENTRY.size
+        if not trim:
+            return
+        if valid != len(raw):
+            with open(index_path, "r+b") as fh:
+                fh.truncate(valid)
+                os.fsync(fh.fileno())
+
+        if self._shard_sizes:
+            last = max(self._shard_sizes)
+            end = indexed_end.get(last, 0)
+            if self._shard_sizes[last] > end:
+                # Shard bytes written without their index entries (crash between the two fsyncs).
+                with open(self.root / self._shard_name(last), "r+b") as fh:
+                    fh.truncate(end)
+                    os.fsync(fh.fileno())
+                self._shard_sizes[last] = end
+
+
+def _lock_writer(root: Path):
+    fh = open(root / _LOCK_FILE, "a+b")
+    if fcntl is None:
+        return fh
+    try:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        fh.close()
+        raise RuntimeError(
+            f"Result store {root} is already open for writing (by main.py, server.py or another store). "
+            "Only one writer may use a store at a time; read it with read_only=True / store.py."
+        ) from None
+    return fh
+
+
+def _decode(data: bytes, path: Path) -> dict:
+    if path.suffix == ".gz":
+        data = gzip.decompress(data)
+    return json.loads(data)
+
+
+def _fsync_dir(path: Path) -> None:
+    # Makes a newly created shard's directory entry durable; not supported on every platform.
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,479 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import math
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+from jd_resume_evaluator.aio_http import HttpProtocolError, iter_chunked
+from jd_resume_evaluator.async_engine import AsyncOpenAIEngine
+from jd_resume_evaluator.cache import ResponseCache, cache_stats_dict, evaluate_with_cache_async
+from jd_resume_evaluator.chunking import (
+    ChunkedInputs,
+    evaluate_chunked,
+    evaluate_chunked_async,
+    prepare_chunked_inputs,
+    prepare_chunked_texts,
+)
+from jd_resume_evaluator.engines import EngineConfig, evaluate_with_engine
+from jd_resume_evaluator.evidence import check_evidence, retry_unverified_async
+from jd_resume_evaluator.rate_limit import Priority, request_priority
+from jd_resume_evaluator.report import parse_report, validate_report_dict
+from jd_resume_evaluator.result_store import ShardedResultStore, content_digest
+from jd_resume_evaluator.text_prep import (
+    InputBudgets,
+    PreparedInputCache,
+    PreparedInputs,
+    prepare_inputs,
+    prepare_texts,
+    read_text,
+)
+from jd_resume_evaluator.timing import recording
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+_LATENCY_WINDOW = 4096
+_STORE_FLUSH_SECONDS = 1.0
+
+
+@dataclass(frozen=True)
+class _Request:
+    method: str
+    path: str
+    headers: dict[str, str]
+    body: bytes
+    keep_alive: bool
+
+
+@dataclass
+class _Job:
+    payload: dict
+    enqueued: float
+    future: asyncio.Future = field(repr=False)
+
+
+class EvaluationServer:
+    """
+    Long-running HTTP/JSON evaluation API on one asyncio event loop.
+
+    - `POST /v1/evaluate` runs prepare → engine → validate for one JD/CV pair (text or paths).
+    - Work goes through a bounded queue drained by `workers` tasks; when the queue is full the
+      request is rejected immediately with 429 + `Retry-After` instead of piling up.
+    - Requests carry a `priority` ("interactive", the default, or "bulk"); interactive work is taken
+      off the queue first and goes first at the LLM rate-limit scheduler too.
+    - Prepared inputs (per JD text/file), the response cache and LLM keep-alive connections stay
+      warm across requests.
+    - `GET /metrics` reports queue depth, in-flight work, counters and latency percentiles.
+    - With a `store`, every completed evaluation is also appended to the sharded result store
+      (buffered; flushed in batches and at least every `_STORE_FLUSH_SECONDS`).
+    """
+
+    def __init__(
+        self,
+        *,
+        budgets: InputBudgets,
+        config: EngineConfig,
+        workers: int = 8,
+        max_queue: int = 64,
+        cache: ResponseCache | None = None,
+        max_body_bytes: int = 16 * 1024 * 1024,
+        store: ShardedResultStore | None = None,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("workers must be >= 1.")
+        if max_queue < 1:
+            raise ValueError("max_queue must be >= 1.")
+        self.budgets = budgets
+        self.config = config
+        self.workers = workers
+        self.max_queue = max_queue
+        self.cache = cache
+        self.max_body_bytes = max_body_bytes
+        self.store = store
+        self.prep_cache = PreparedInputCache()
+
+        self._queue: asyncio.PriorityQueue[tuple[int, int, _Job]] | None = None
+        self._job_seq = itertools.count()
+        self._engine: AsyncOpenAIEngine | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._started = time.monotonic()
+        self._latencies: deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self._queue_waits: deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.in_flight = 0
+        self.requests_total = 0
+        self.completed_total = 0
+        self.failed_total = 0
+        self.rejected_total = 0
+        self.usage: dict[str, int] = {}
+        self.json_repairs = 0
+        self.quotes_total = 0
+        self.quotes_unverified = 0
+
+    async def start(self) -> None:
+        self._queue = asyncio.PriorityQueue(maxsize=self.max_queue)
+        self._engine = AsyncOpenAIEngine.from_config(self.config, max_in_flight=self.workers)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self.store is not None:
+            self._tasks.append(asyncio.create_task(self._flush_store_periodically()))
+
+    async def aclose(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._engine is not None:
+            await self._engine.aclose()
+        if self.store is not None:
+            await asyncio.to_thread(self.store.close)
+
+    async def _flush_store_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(_STORE_FLUSH_SECONDS)
+            await asyncio.to_thread(self.store.flush)
+
+    async def serve(self, host: str, port: int) -> None:
+        await self.start()
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.aclose()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader, self.max_body_bytes)
+                except _PayloadTooLarge as e:
+                    _write_response(writer, 413, {"error": str(e)}, keep_alive=False)
+                    await writer.drain()
+                    return
+                except (ValueError, HttpProtocolError) as e:
+                    # A line over the reader's limit, a bad chunk size or Content-Length, a bad request line.
+                    _write_response(writer, 400, {"error": f"Malformed HTTP request: {e}"}, keep_alive=False)
+                    await writer.drain()
+                    return
+                if request is None:
+                    return
+                status, body, headers = await self._dispatch(request)
+                _write_response(writer, status, body, keep_alive=request.keep_alive, headers=headers)
+                await writer.drain()
+                if not request.keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: _Request) -> tuple[int, dict, dict[str, str]]:
+        if request.path == "/v1/evaluate":
+            if request.method != "POST":
+                return 405, {"error": "Use POST."}, {"Allow": "POST"}
+            return await self._evaluate(request)
+        if request.path == "/metrics":
+            return 200, self.metrics(), {}
+        if request.path == "/healthz":
+            return 200, {"ok": True}, {}
+        return 404, {"error": f"Unknown path: {request.path}"}, {}
+
+    async def _evaluate(self, request: _Request) -> tuple[int, dict, dict[str, str]]:
+        try:
+            payload = json.loads(request.body or b"{}")
+            _check_payload(payload)
+        except ValueError as e:
+            return 400, {"error": str(e)}, {}
+
+        self.requests_total += 1
+        job = _Job(payload=payload, enqueued=time.perf_counter(), future=asyncio.get_running_loop().create_future())
+        try:
+            priority = Priority[payload.get("priority", "interactive")]
+            self._queue.put_nowait((priority, next(self._job_seq), job))
+        except asyncio.QueueFull:
+            self.rejected_total += 1
+            return 429, {"error": "Server is at capacity; retry later."}, {"Retry-After": "1"}
+
+        try:
+            result = await job.future
+        except Exception as e:  # noqa: BLE001 - report the failure to this client only
+            return 500, {"error": f"{type(e).__name__}: {e}"}, {}
+        return 200, result, {}
+
+    async def _worker(self) -> None:
+        while True:
+            priority, _, job = await self._queue.get()
+            started = time.perf_counter()
+            self._queue_waits.append(started - job.enqueued)
+            self.in_flight += 1
+            try:
+                with request_priority(priority):
+                    result = await self._run_job(job.payload)
+            except Exception as e:  # noqa: BLE001 - one bad request must not kill the worker
+                self.failed_total += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                self.completed_total += 1
+                result["seconds"] = round(time.perf_counter() - job.enqueued, 6)
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                self.in_flight -= 1
+                self._latencies.append(time.perf_counter() - job.enqueued)
+                self._queue.task_done()
+
+    async def _run_job(self, payload: dict) -> dict:
+        config = self.config
+        model = str(payload.get("model") or config.model)
+        temperature = payload.get("temperature")
+        temperature = float(config.temperature if temperature is None else temperature)
+        prepared = await asyncio.to_thread(self._prepare, payload)
+        chunked = isinstance(prepared, ChunkedInputs)
+
+        if self._engine is not None:
+            engine = self._engine
+
+            async def evaluate(cache: ResponseCache | None) -> tuple[dict, str | None, bool]:
+                if chunked:
+                    result = await evaluate_chunked_async(
+                        prepared, engine, cache=cache, model=model, temperature=temperature
+                    )
+                else:
+                    result = await evaluate_with_cache_async(
+                        cache, engine, prepared=prepared, model=model, temperature=temperature
+                    )
+                return result.report_dict, result.raw_output, result.cache_hit
+
+            async def reevaluate() -> tuple[dict, str | None]:
+                return (await evaluate(None))[:2]
+
+            with recording() as recorder:
+                report_dict, raw_output, cache_hit = await evaluate(self.cache)
+                validate_report_dict(report_dict)
+                report_dict, raw_output, evidence = await retry_unverified_async(
+                    report_dict,
+                    raw_output,
+                    jd_text=prepared.jd_text,
+                    cv_text=prepared.cv_text,
+                    retries=config.evidence_retries,
+                    reevaluate=reevaluate,
+                )
+            for name, value in recorder.counters.items():
+                if name.startswith("usage."):
+                    key = name[len("usage.") :]
+                    self.usage[key] = self.usage.get(key, 0) + int(value)
+            self.json_repairs += int(recorder.counters.get("json.repairs", 0))
+        else:
+            if chunked:
+                evaluation = await asyncio.to_thread(evaluate_chunked, prepared, config=config)
+                report_dict, raw_output = evaluation.report_dict, evaluation.raw_output
+            else:
+                report_dict, raw_output = await asyncio.to_thread(
+                    evaluate_with_engine, engine=config.engine, prepared=prepared, model=model, temperature=temperature
+                )
+            cache_hit = False
+            validate_report_dict(report_dict)
+            evidence = check_evidence(report_dict, jd_text=prepared.jd_text, cv_text=prepared.cv_text)
+
+        self.quotes_total += evidence.quotes_total
+        self.quotes_unverified += evidence.quotes_unverified
+        report = parse_report(report_dict)
+        result = {
+            "report": asdict(report),
+            "input_meta": asdict(prepared.meta),
+            "engine": config.engine.value,
+            "model": model,
+            "cache_hit": cache_hit,
+            "evidence_check": asdict(evidence),
+        }
+        if chunked:
+            result["cv_chunks"] = len(prepared.chunks)
+        if self.store is not None:
+            result["record_id"] = await asyncio.to_thread(self._store_result, payload, result, raw_output)
+        if payload.get("include_raw_output"):
+            result["raw_output"] = raw_output
+        return result
+
+    def _store_result(self, payload: dict, result: dict, raw_output: str | None) -> str:
+        record_id = uuid.uuid4().hex
+        record = {
+            "id": record_id,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            **result,
+            "raw_output": raw_output,
+        }
+        self.store.append(
+            record, jd_sha256=_input_digest(payload, "jd"), cv_sha256=_input_digest(payload, "cv")
+        )
+        return record_id
+
+    def _prepare(self, payload: dict) -> PreparedInputs | ChunkedInputs:
+        if self.budgets.cv_chunking:
+            from_paths, from_texts = prepare_chunked_inputs, prepare_chunked_texts
+        else:
+            from_paths, from_texts = prepare_inputs, prepare_texts
+
+        jd_text, cv_text = payload.get("jd_text"), payload.get("cv_text")
+        if jd_text is None and cv_text is None:
+            return from_paths(Path(payload["jd_path"]), Path(payload["cv_path"]), self.budgets, self.prep_cache)
+        # Text or mixed inputs: decode any path side here so both go through the same text path.
+        if jd_text is None:
+            jd_text = read_text(Path(payload["jd_path"]))
+        if cv_text is None:
+            cv_text = read_text(Path(payload["cv_path"]))
+        return from_texts(
+            jd_text,
+            cv_text,
+            self.budgets,
+            self.prep_cache,
+            jd_name=payload.get("jd_path", "<jd>"),
+            cv_name=payload.get("cv_path", "<cv>"),
+        )
+
+    def metrics(self) -> dict:
+        return {
+            "uptime_seconds": round(time.monotonic() - self._started, 3),
+            "engine": self.config.engine.value,
+            "model": self.config.model,
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_capacity": self.max_queue,
+            "in_flight": self.in_flight,
+            "requests_total": self.requests_total,
+            "completed_total": self.completed_total,
+            "failed_total": self.failed_total,
+            "rejected_total": self.rejected_total,
+            "latency_ms": _percentiles_ms(self._latencies),
+            "queue_wait_ms": _percentiles_ms(self._queue_waits),
+            "prepared_input_cache": {"hits": self.prep_cache.hits, "misses": self.prep_cache.misses},
+            "response_cache": cache_stats_dict(self.cache),
+            "llm_connections_opened": self._engine.connections_opened if self._engine is not None else 0,
+            "llm_retries": self._engine.retries if self._engine is not None else 0,
+            "llm_scheduler": self._engine.scheduler.stats() if self._engine is not None else None,
+            "llm_usage": dict(self.usage),
+            "llm_json_repairs": self.json_repairs,
+            "evidence_quotes": {"total": self.quotes_total, "unverified": self.quotes_unverified},
+        }
+
+
+class _PayloadTooLarge(ValueError):
+    pass
+
+
+def _check_payload(payload: object) -> None:
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object.")
+    for side in ("jd", "cv"):
+        text, path = payload.get(f"{side}_text"), payload.get(f"{side}_path")
+        if (text is None) == (path is None):
+            raise ValueError(f"Provide exactly one of {side}_text or {side}_path.")
+        value = text if text is not None else path
+        if not isinstance(value, str):
+            raise ValueError(f"{side}_text/{side}_path must be a string.")
+        if not value.strip():
+            raise ValueError(f"{side}_text/{side}_path must not be empty.")
+    model = payload.get("model")
+    if model is not None and (not isinstance(model, str) or not model.strip()):
+        raise ValueError("model must be a non-empty string.")
+    temperature = payload.get("temperature")
+    if temperature is not None and (
+        isinstance(temperature, bool) or not isinstance(temperature, (int, float)) or not math.isfinite(temperature)
+    ):
+        raise ValueError("temperature must be a number.")
+    if payload.get("priority", "interactive") not in Priority.__members__:
+        raise ValueError(f"priority must be one of {list(Priority.__members__)}.")
+
+
+def _input_digest(payload: dict, side: str) -> str:
+    # Same hash main.py stores: file bytes for paths, UTF-8 text for inline inputs.
+    text = payload.get(f"{side}_text")
+    if text:
+        return content_digest(text)
+    return content_digest(Path(payload[f"{side}_path"]).read_bytes())
+
+
+def _percentiles_ms(samples: deque[float]) -> dict:
+    if not samples:
+        return {"count": 0, "p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(samples)
+    n = len(ordered)
+
+    def pick(q: float) -> float:
+        # Nearest-rank percentile over the recent window.
+        return round(ordered[min(n - 1, max(0, int(q * n + 0.5) - 1))] * 1e3, 3)
+
+    return {"count": n, "p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(ordered[-1] * 1e3, 3)}
+
+
+async def _read_request(reader: asyncio.StreamReader, max_body_bytes: int) -> _Request | None:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    parts = request_line.decode("latin-1").strip().split(" ")
+    if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+        raise HttpProtocolError(f"Malformed request line: {request_line!r}")
+    method, target, version = parts
+
+    headers: dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise asyncio.IncompleteReadError(partial=b"", expected=None)
+        if line in (b"\r\n", b"\n"):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        chunks: list[bytes] = []
+        size = 0
+        async for chunk in iter_chunked(reader):
+            size += len(chunk)
+            if size > max_body_bytes:
+                raise _PayloadTooLarge(f"Request body exceeds {max_body_bytes} bytes.")
+            chunks.append(chunk)
+        body = b"".join(chunks)
+    else:
+        length = int(headers.get("content-length") or 0)
+        if length > max_body_bytes:
+            raise _PayloadTooLarge(f"Request body exceeds {max_body_bytes} bytes.")
+        body = await reader.readexactly(length) if length else b""
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    return _Request(
+        method=method.upper(), path=target.split("?", 1)[0], headers=headers, body=body, keep_alive=keep_alive
+    )
+
+
+def _write_response(
+    writer: asyncio.StreamWriter,
+    status: int,
+    payload: dict,
+    *,
+    keep_alive: bool,
+    headers: dict[str, str] | None = None,
+) -> None:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    lines = [
+        f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}",
+        "Content-Type: application/json; charset=utf-8",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    lines.extend(f"{k}: {v}" for k, v in (headers or {}).items())
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
@@ -1,8 +1,21 @@
 from __future__ import annotations
 
+import codecs
+import hashlib
+import io
+import os
 import re
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+from jd_resume_evaluator.timing import span
+from jd_resume_evaluator.tokens import TokenCounter, get_token_counter
+
+if TYPE_CHECKING:
+    from jd_resume_evaluator.passages import PassageQuery
 
 
 @dataclass(frozen=True)
@@ -11,6 +24,25 @@ class InputBudgets:
     max_cv_chars: int
     max_prompt_chars: int
     outline_if_needed: bool = True
+    # Optional token budgets, applied after the character budgets (None = no token limit).
+    max_jd_tokens: int | None = None
+    max_cv_tokens: int | None = None
+    max_prompt_tokens: int | None = None
+    # Tokenizer spec for get_token_counter(): "approx" or "bpe:<path to .tiktoken file>".
+    tokenizer: str = "approx"
+    # Files larger than this are ingested line by line and reading stops once the budget is filled,
+    # so peak memory tracks the budget rather than the file size.
+    stream_threshold_bytes: int = 32 * 1024 * 1024
+    # Evaluate an over-budget CV as budget-sized sections (map-reduce) instead of outlining/truncating it.
+    cv_chunking: bool = False
+    max_cv_chunks: int = 8
+    # Fill an over-budget CV with the passages most relevant to the JD instead of a headings/bullets outline.
+    relevance_selection: bool = True
+    # Packed corpus directory (corpus.py); files packed there and unchanged since are sliced from its mmap
+    # instead of being opened and decoded one by one.
+    corpus_dir: str | None = None
+    # Prompt layout the engine will use (prompting.PROMPT_LAYOUTS); the prompt-size estimate measures it.
+    prompt_layout: str = "classic"
 
 
 @dataclass(frozen=True)
@@ -23,6 +55,12 @@ class InputMeta:
     cv_chars_used: int
     prompt_chars_estimate: int
     truncation_notes: list[str]
+    tokenizer: str = "approx"
+    jd_tokens_original: int = 0
+    cv_tokens_original: int = 0
+    jd_tokens_used: int = 0
+    cv_tokens_used: int = 0
+    prompt_tokens_estimate: int = 0
 
 
 @dataclass(frozen=True)
@@ -32,13 +70,53 @@ class PreparedInputs:
     meta: InputMeta
 
 
-_BULLET_PREFIX = re.compile(r"^\s*([-*•]|\d+\.)\s+")
-_HEADING_PREFIX = re.compile(r"^\s{0,3}#{1,6}\s+")
+BULLET_PREFIX = re.compile(r"^\s*([-*•]|\d+\.)\s+")
+HEADING_PREFIX = re.compile(r"^\s{0,3}#{1,6}\s+")
+
+
+_TRAILING_WS = re.compile(r"[ \t]+\n")
+_EXCESS_BLANK_LINES = re.compile(r"\n{4,}")
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+_FALLBACK_ENCODINGS = ("utf-8", "gb18030", "latin-1")
+_SNIFF_BYTES = 64 * 1024
 
 
-def _read_text(path: Path) -> str:
+def _detect_encoding(raw: bytes, complete: bool | None = None) -> str:
+    """
+    Pick an encoding from a BOM or a prefix sample, so the whole file is decoded once.
+
+    The sample is decoded incrementally (final=False) so a multi-byte character cut at the sample
+    boundary does not count as an error.
+    """
+    for bom, enc in _BOMS:
+        if raw.startswith(bom):
+            return enc
+    sample = raw[:_SNIFF_BYTES]
+    final = (len(raw) <= _SNIFF_BYTES) if complete is None else complete
+    for enc in _FALLBACK_ENCODINGS[:-1]:
+        try:
+            codecs.getincrementaldecoder(enc)().decode(sample, final=final)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return _FALLBACK_ENCODINGS[-1]
+
+
+def read_text(path: Path) -> str:
+    """Decode a JD/CV file (BOM, UTF-8, then the fallback encodings); shared by every input reader."""
     raw = path.read_bytes()
-    for enc in ("utf-8", "utf-8-sig", "gb18030", "latin-1"):
+    enc = _detect_encoding(raw)
+    try:
+        return raw.decode(enc)
+    except UnicodeDecodeError:
+        pass
+    # The prefix sample looked fine but the rest did not; fall back to the full cascade.
+    for enc in _FALLBACK_ENCODINGS:
         try:
             return raw.decode(enc)
         except UnicodeDecodeError:
@@ -46,30 +124,35 @@ def _read_text(path: Path) -> str:
     return raw.decode("utf-8", errors="replace")
 
 
-def _normalize(text: str) -> str:
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
-    text = text.replace("\u0000", "")
-    text = re.sub(r"[ \t]+\n", "\n", text)
-    text = re.sub(r"\n{4,}", "\n\n\n", text)
+def normalize_text(text: str) -> str:
+    """Canonical text every consumer sees: newlines, NULs, trailing whitespace and blank-line runs."""
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    if "\u0000" in text:
+        text = text.replace("\u0000", "")
+    text = _TRAILING_WS.sub("\n", text)
+    text = _EXCESS_BLANK_LINES.sub("\n\n\n", text)
     return text.strip() + "\n"
 
 
-def _outline_extract(text: str, max_chars: int) -> str:
+# Keep a small header to make truncation explicit.
+_OUTLINE_HEADER = (
+    "[NOTE] Input too large; extracted headings/bullets to fit prompt limits. "
+    "Evidence quotes must come from the included excerpts.\n"
+)
+
+
+def outline_extract(text: str, max_chars: int) -> str:
     lines = text.splitlines()
 
     picked: list[str] = []
     for line in lines:
-        if _HEADING_PREFIX.match(line) or _BULLET_PREFIX.match(line):
+        if HEADING_PREFIX.match(line) or BULLET_PREFIX.match(line):
             cleaned = line.strip()
             if cleaned:
                 picked.append(cleaned)
 
-    # Keep a small header to make truncation explicit.
-    header = (
-        "[NOTE] Input too large; extracted headings/bullets to fit prompt limits. "
-        "Evidence quotes must come from the included excerpts.\n"
-    )
-    out = header + "\n".join(picked) + "\n"
+    out = _OUTLINE_HEADER + "\n".join(picked) + "\n"
 
     if len(out) <= max_chars:
         return out
@@ -87,13 +170,24 @@ def _truncate(text: str, max_chars: int, label: str) -> tuple[str, list[str]]:
     return truncated, [note]
 
 
-def _apply_budgets(text: str, max_chars: int, label: str, outline_if_needed: bool) -> tuple[str, list[str]]:
+def _apply_budgets(
+    text: str, max_chars: int, label: str, outline_if_needed: bool, query: PassageQuery | None = None
+) -> tuple[str, list[str]]:
     if len(text) <= max_chars:
         return text, []
 
     notes: list[str] = [f"{label} exceeded budget ({len(text)} > {max_chars})."]
-    if outline_if_needed:
-        outlined = _outline_extract(text, max_chars=max_chars)
+    selected = None
+    if query is not None:
+        # Imported lazily: passages depends on this module for the heading/bullet patterns.
+        from jd_resume_evaluator.passages import select_passages
+
+        selected = select_passages(text, max_chars, query, label)
+    if selected is not None:
+        text, more = selected
+        notes.extend(more)
+    elif outline_if_needed:
+        outlined = outline_extract(text, max_chars=max_chars)
         if len(outlined) < len(text):
             notes.append(f"{label} converted to outline excerpts.")
         text = outlined
@@ -103,33 +197,529 @@ def _apply_budgets(text: str, max_chars: int, label: str, outline_if_needed: boo
     return text, notes
 
 
-def prepare_inputs(jd_path: Path, cv_path: Path, budgets: InputBudgets) -> PreparedInputs:
-    jd_raw = _normalize(_read_text(jd_path))
-    cv_raw = _normalize(_read_text(cv_path))
-    if not jd_raw.strip():
-        raise ValueError(f"JD file is empty after normalization: {jd_path}")
-    if not cv_raw.strip():
-        raise ValueError(f"CV file is empty after normalization: {cv_path}")
+_STREAM_CHUNK_BYTES = 1024 * 1024
+# A streamed file is read up to this many char budgets, so relevance selection and the outline
+# still have text to choose from.
+_STREAM_WINDOW_BUDGETS = 4
+
+
+def _iter_normalized_lines(path: Path):
+    """
+    Yield (line, bytes_read_so_far) with the same cleanup as normalize_text(), decoding incrementally.
+
+    Trailing whitespace is stripped, NULs dropped, CR/CRLF folded, leading whitespace skipped and
+    runs of blank lines capped at two. Trailing blank lines are left to the caller.
+    """
+    with open(path, "rb") as fh:
+        head = fh.read(_SNIFF_BYTES)
+        enc = _detect_encoding(head, complete=len(head) < _SNIFF_BYTES)
+        # IncrementalNewlineDecoder folds CRLF/CR even when a CRLF pair straddles two chunks.
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(enc)(errors="replace"), translate=True)
+        bytes_read = len(head)
+        pending = decoder.decode(head, final=len(head) < _SNIFF_BYTES)
+        blank_run = 0
+        seen_content = False
+        while True:
+            eof = False
+            chunk = fh.read(_STREAM_CHUNK_BYTES)
+            if chunk:
+                bytes_read += len(chunk)
+                pending += decoder.decode(chunk)
+            else:
+                pending += decoder.decode(b"", final=True)
+                eof = True
+            lines = pending.split("\n")
+            pending = "" if eof else lines.pop()
+            for line in lines:
+                if "\x00" in line:
+                    line = line.replace("\x00", "")
+                line = line.rstrip(" \t")
+                if not line.strip():
+                    if not seen_content:
+                        continue
+                    blank_run += 1
+                    if blank_run > 2:
+                        continue
+                    yield "", bytes_read
+                    continue
+                if not seen_content:
+                    line = line.lstrip()
+                    seen_content = True
+                blank_run = 0
+                yield line, bytes_read
+            if eof:
+                return
+
+
+def _stream_prepare(
+    path: Path,
+    *,
+    label: str,
+    max_chars: int,
+    outline_if_needed: bool,
+    counter: TokenCounter,
+    query: PassageQuery | None = None,
+) -> PreparedDocument:
+    """
+    Budgeted ingestion for very large files: reads at most `_STREAM_WINDOW_BUDGETS * max_chars` of text.
+
+    - The window then gets the same char budget as any document (relevance selection with a query,
+      else the outline, then truncation), so memory and time follow the budget, not the file size.
+    - When reading stops early, the original char/token counts cover the window only; a note labels
+      them as lower bounds.
+    """
+    total_bytes = os.stat(path).st_size
+    window_chars = _STREAM_WINDOW_BUDGETS * max_chars
+    pieces: list[str] = []
+    chars_read = 0
+    stopped_at: int | None = None
+    for line, bytes_read in _iter_normalized_lines(path):
+        if chars_read >= window_chars:
+            stopped_at = bytes_read
+            break
+        pieces.append(line + "\n")
+        chars_read += len(line) + 1
+
+    window = "".join(pieces).rstrip("\n") + "\n"
+    if not window.strip():
+        raise ValueError(f"{label} file is empty after normalization: {path}")
+    # Uncached: every line of a streamed file is new, and memoizing them would grow with the window.
+    tokens_read = counter.count_uncached(window)
+    text, notes = _apply_budgets(
+        window, max_chars=max_chars, label=label, outline_if_needed=outline_if_needed, query=query
+    )
+    if stopped_at is not None and stopped_at < total_bytes:
+        notes.insert(
+            0,
+            f"{label} streamed from a {total_bytes}-byte file; reading stopped at byte {stopped_at}, so its "
+            f"original size ({len(window)} chars, {tokens_read} tokens) is a lower bound.",
+        )
+    return PreparedDocument(text=text, notes=tuple(notes), chars_original=len(window), tokens_original=tokens_read)
+
+
+def _truncate_to_tokens(text: str, max_tokens: int, counter: TokenCounter, label: str) -> tuple[str, list[str]]:
+    total = counter.count(text)
+    if total <= max_tokens:
+        return text, []
+
+    # Keep whole lines while they fit; per-line counts are memoized by the counter.
+    kept: list[str] = []
+    used = 0
+    lines = text.splitlines(keepends=True)
+    for line in lines:
+        n = counter.count(line)
+        if used + n > max_tokens:
+            break
+        kept.append(line)
+        used += n
+    if not kept:
+        # The first line alone is over budget (CJK text, a PDF export without newlines): cut inside it,
+        # sized by its chars/token ratio and shrunk until it fits, rather than sending nothing.
+        first = lines[0]
+        cut = first[: max(1, len(first) * max_tokens // counter.count_uncached(first))]
+        while cut and counter.count_uncached(cut) > max_tokens:
+            cut = cut[: len(cut) * 9 // 10]
+        used = counter.count_uncached(cut)
+        note = (
+            f"{label} truncated from {total} to {used} tokens ({counter.name}) inside its first line "
+            f"({len(cut)} of {len(first)} chars kept)."
+        )
+        return cut, [note]
+    note = f"{label} truncated from {total} to {used} tokens ({counter.name})."
+    return "".join(kept), [note]
+
+
+def _apply_token_budget(
+    text: str,
+    max_tokens: int | None,
+    counter: TokenCounter,
+    label: str,
+    outline_if_needed: bool,
+    query: PassageQuery | None = None,
+) -> tuple[str, list[str]]:
+    if max_tokens is None:
+        return text, []
+    tokens = counter.count(text)
+    if tokens <= max_tokens:
+        return text, []
+
+    # Map the token budget onto this document's own chars/token ratio so the outline pass
+    # keeps roughly the right amount, then trim exactly by tokens.
+    char_target = max(1, int(len(text) * max_tokens / tokens))
+    notes = [f"{label} exceeded token budget ({tokens} > {max_tokens} tokens, {counter.name})."]
+    text, more = _apply_budgets(
+        text, max_chars=char_target, label=label, outline_if_needed=outline_if_needed, query=query
+    )
+    notes.extend(more[1:])
+    text, more = _truncate_to_tokens(text, max_tokens=max_tokens, counter=counter, label=label)
+    notes.extend(more)
+    return text, notes
+
+
+def prompt_overhead(notes: list[str], counter: TokenCounter, layout: str = "classic") -> tuple[int, int]:
+    """Measure (chars, tokens) of the system prompt + user scaffold/schema with empty JD/CV, in `layout`."""
+    # Imported lazily: prompting depends on this module for PreparedInputs.
+    from jd_resume_evaluator.prompting import build_system_prompt, build_user_prompt
+
+    meta = InputMeta(
+        jd_path="",
+        cv_path="",
+        jd_chars_original=0,
+        cv_chars_original=0,
+        jd_chars_used=0,
+        cv_chars_used=0,
+        prompt_chars_estimate=0,
+        truncation_notes=notes,
+    )
+    scaffold = build_system_prompt() + build_user_prompt(
+        PreparedInputs(jd_text="", cv_text="", meta=meta), layout=layout
+    )
+    return len(scaffold), counter.count(scaffold)
+
+
+@dataclass(frozen=True)
+class PreparedDocument:
+    """One JD or CV after its char/token budgets, before the whole prompt is fitted."""
+
+    text: str
+    notes: tuple[str, ...]
+    chars_original: int
+    tokens_original: int
+
+
+class PreparedInputCache:
+    """
+    Thread-safe LRU cache of per-file preparation work.
+
+    - Keyed on (resolved path, size, mtime_ns), so an edited file is re-read automatically.
+    - Holds the normalized text per file (bounded by total chars), and the budgeted text/notes per
+      (file, label, budgets).
+    - In batch screening the JD is read, decoded and budgeted once, not once per CV.
+    """
+
+    def __init__(self, max_documents: int = 256, max_normalized_chars: int = 64_000_000) -> None:
+        self.max_documents = max_documents
+        self.max_normalized_chars = max_normalized_chars
+        self._normalized: OrderedDict[tuple, str] = OrderedDict()
+        self._normalized_chars = 0
+        self._budgeted: OrderedDict[tuple, PreparedDocument] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def file_key(path: Path) -> tuple:
+        st = os.stat(path)
+        return (str(Path(path).resolve()), st.st_size, st.st_mtime_ns)
+
+    def normalized_text(self, path: Path) -> str:
+        key = self.file_key(path)
+        with self._lock:
+            text = self._normalized.get(key)
+            if text is not None:
+                self._normalized.move_to_end(key)
+                return text
+        text = _read_and_normalize(path)
+        with self._lock:
+            if key not in self._normalized:
+                self._normalized_chars += len(text)
+            self._normalized[key] = text
+            while self._normalized and (
+                len(self._normalized) > self.max_documents or self._normalized_chars > self.max_normalized_chars
+            ):
+                _, evicted = self._normalized.popitem(last=False)
+                self._normalized_chars -= len(evicted)
+        return text
+
+    def _get_budgeted(self, key: tuple) -> PreparedDocument | None:
+        with self._lock:
+            doc = self._budgeted.get(key)
+            if doc is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._budgeted.move_to_end(key)
+            return doc
+
+    def _put_budgeted(self, key: tuple, doc: PreparedDocument) -> None:
+        with self._lock:
+            self._budgeted[key] = doc
+            self._budgeted.move_to_end(key)
+            while len(self._budgeted) > self.max_documents:
+                self._budgeted.popitem(last=False)
+
+
+def _read_and_normalize(path: Path) -> str:
+    with span("prepare_inputs.decode"):
+        text = read_text(path)
+    with span("prepare_inputs.normalize"):
+        return normalize_text(text)
+
+
+def packed_text(path: Path, corpus_dir: str) -> str | None:
+    """Normalized text of `path` from the packed corpus, or None if it is not packed (or is stale)."""
+    # Imported lazily: the corpus builder depends on this module for decoding/normalization.
+    from jd_resume_evaluator.corpus import open_corpus
+
+    with span("prepare_inputs.corpus"):
+        return open_corpus(corpus_dir).normalized_text(path)
+
+
+def prepare_document(
+    path: Path,
+    *,
+    label: str,
+    max_chars: int,
+    max_tokens: int | None,
+    budgets: InputBudgets,
+    counter: TokenCounter,
+    cache: PreparedInputCache | None,
+    query: PassageQuery | None = None,
+) -> PreparedDocument:
+    """Read, normalize and budget one input file (streamed when it is above the stream threshold)."""
+    key = None
+    if cache is not None:
+        key = _budget_key(PreparedInputCache.file_key(path), label, max_chars, max_tokens, budgets, query)
+        doc = cache._get_budgeted(key)
+        if doc is not None:
+            return doc
+
+    if os.stat(path).st_size > budgets.stream_threshold_bytes:
+        # Never materializes the whole file, so it also bypasses the normalized-text cache.
+        with span("prepare_inputs.stream"):
+            doc = _stream_prepare(
+                path,
+                label=label,
+                max_chars=max_chars,
+                outline_if_needed=budgets.outline_if_needed,
+                counter=counter,
+                query=query,
+            )
+        text, notes = doc.text, list(doc.notes)
+        chars_original, tokens_original = doc.chars_original, doc.tokens_original
+    else:
+        raw = packed_text(path, budgets.corpus_dir) if budgets.corpus_dir is not None else None
+        if raw is None:
+            raw = cache.normalized_text(path) if cache is not None else _read_and_normalize(path)
+        if not raw.strip():
+            raise ValueError(f"{label} file is empty after normalization: {path}")
+        text, notes, chars_original, tokens_original = _apply_char_budget(
+            raw, label=label, max_chars=max_chars, budgets=budgets, counter=counter, query=query
+        )
 
-    jd_text, jd_notes = _apply_budgets(
-        jd_raw, max_chars=budgets.max_jd_chars, label="JD", outline_if_needed=budgets.outline_if_needed
+    doc = finish_document(
+        text,
+        notes,
+        chars_original,
+        tokens_original,
+        label=label,
+        max_tokens=max_tokens,
+        budgets=budgets,
+        counter=counter,
+        query=query,
     )
-    cv_text, cv_notes = _apply_budgets(
-        cv_raw, max_chars=budgets.max_cv_chars, label="CV", outline_if_needed=budgets.outline_if_needed
+    if key is not None:
+        cache._put_budgeted(key, doc)
+    return doc
+
+
+def prepare_text_document(
+    text: str,
+    *,
+    label: str,
+    max_chars: int,
+    max_tokens: int | None,
+    budgets: InputBudgets,
+    counter: TokenCounter,
+    cache: PreparedInputCache | None,
+    query: PassageQuery | None = None,
+) -> PreparedDocument:
+    """prepare_document() for in-memory text."""
+    # In-memory inputs are keyed by content, so a JD sent with every request is budgeted once.
+    key = None
+    if cache is not None:
+        digest = hashlib.sha256(text.encode("utf-8", errors="surrogatepass")).hexdigest()
+        key = _budget_key(("text", digest), label, max_chars, max_tokens, budgets, query)
+        doc = cache._get_budgeted(key)
+        if doc is not None:
+            return doc
+
+    with span("prepare_inputs.normalize"):
+        raw = normalize_text(text)
+    if not raw.strip():
+        raise ValueError(f"{label} text is empty after normalization.")
+    text, notes, chars_original, tokens_original = _apply_char_budget(
+        raw, label=label, max_chars=max_chars, budgets=budgets, counter=counter, query=query
+    )
+    doc = finish_document(
+        text,
+        notes,
+        chars_original,
+        tokens_original,
+        label=label,
+        max_tokens=max_tokens,
+        budgets=budgets,
+        counter=counter,
+        query=query,
+    )
+    if key is not None:
+        cache._put_budgeted(key, doc)
+    return doc
+
+
+def _budget_key(
+    source_key: tuple,
+    label: str,
+    max_chars: int,
+    max_tokens: int | None,
+    budgets: InputBudgets,
+    query: PassageQuery | None = None,
+) -> tuple:
+    return (
+        source_key,
+        label,
+        max_chars,
+        max_tokens,
+        budgets.outline_if_needed,
+        budgets.tokenizer,
+        query.digest if query is not None else None,
     )
 
-    # Very rough overhead for prompt scaffolding/schema.
-    overhead = 8_000
-    prompt_chars_estimate = len(jd_text) + len(cv_text) + overhead
+
+def _apply_char_budget(
+    raw: str,
+    *,
+    label: str,
+    max_chars: int,
+    budgets: InputBudgets,
+    counter: TokenCounter,
+    query: PassageQuery | None = None,
+) -> tuple[str, list[str], int, int]:
+    with span("prepare_inputs.budget"):
+        text, notes = _apply_budgets(
+            raw, max_chars=max_chars, label=label, outline_if_needed=budgets.outline_if_needed, query=query
+        )
+    with span("prepare_inputs.count_tokens"):
+        tokens_original = counter.count(raw)
+    return text, notes, len(raw), tokens_original
+
+
+def finish_document(
+    text: str,
+    notes: list[str],
+    chars_original: int,
+    tokens_original: int,
+    *,
+    label: str,
+    max_tokens: int | None,
+    budgets: InputBudgets,
+    counter: TokenCounter,
+    query: PassageQuery | None = None,
+) -> PreparedDocument:
+    """Apply the token budget to char-budgeted text and freeze the result."""
+    with span("prepare_inputs.token_budget"):
+        text, more = _apply_token_budget(
+            text, max_tokens, counter, label=label, outline_if_needed=budgets.outline_if_needed, query=query
+        )
+    notes.extend(more)
+    return PreparedDocument(
+        text=text, notes=tuple(notes), chars_original=chars_original, tokens_original=tokens_original
+    )
+
+
+def prepare_inputs(
+    jd_path: Path, cv_path: Path, budgets: InputBudgets, cache: PreparedInputCache | None = None
+) -> PreparedInputs:
+    counter = get_token_counter(budgets.tokenizer)
+
+    jd_doc = prepare_document(
+        jd_path,
+        label="JD",
+        max_chars=budgets.max_jd_chars,
+        max_tokens=budgets.max_jd_tokens,
+        budgets=budgets,
+        counter=counter,
+        cache=cache,
+    )
+    cv_doc = prepare_document(
+        cv_path,
+        label="CV",
+        max_chars=budgets.max_cv_chars,
+        max_tokens=budgets.max_cv_tokens,
+        budgets=budgets,
+        counter=counter,
+        cache=cache,
+        query=_cv_query(jd_doc, budgets),
+    )
+    with span("prepare_inputs.prompt_budget"):
+        return fit_prompt_budget(str(jd_path), str(cv_path), jd_doc, cv_doc, budgets, counter)
+
+
+def prepare_texts(
+    jd_text: str,
+    cv_text: str,
+    budgets: InputBudgets,
+    cache: PreparedInputCache | None = None,
+    *,
+    jd_name: str = "<jd>",
+    cv_name: str = "<cv>",
+) -> PreparedInputs:
+    """Same as prepare_inputs() for in-memory JD/CV text; `jd_name`/`cv_name` fill the meta paths."""
+    counter = get_token_counter(budgets.tokenizer)
+    jd_doc = prepare_text_document(
+        jd_text,
+        label="JD",
+        max_chars=budgets.max_jd_chars,
+        max_tokens=budgets.max_jd_tokens,
+        budgets=budgets,
+        counter=counter,
+        cache=cache,
+    )
+    cv_doc = prepare_text_document(
+        cv_text,
+        label="CV",
+        max_chars=budgets.max_cv_chars,
+        max_tokens=budgets.max_cv_tokens,
+        budgets=budgets,
+        counter=counter,
+        cache=cache,
+        query=_cv_query(jd_doc, budgets),
+    )
+    with span("prepare_inputs.prompt_budget"):
+        return fit_prompt_budget(jd_name, cv_name, jd_doc, cv_doc, budgets, counter)
+
+
+def _cv_query(jd_doc: PreparedDocument, budgets: InputBudgets) -> PassageQuery | None:
+    if not budgets.relevance_selection:
+        return None
+    from jd_resume_evaluator.passages import passage_query
+
+    return passage_query(jd_doc.text)
+
+
+def fit_prompt_budget(
+    jd_path: str,
+    cv_path: str,
+    jd_doc: PreparedDocument,
+    cv_doc: PreparedDocument,
+    budgets: InputBudgets,
+    counter: TokenCounter,
+) -> PreparedInputs:
+    """Trim a prepared JD/CV pair to max_prompt_chars / max_prompt_tokens and build its InputMeta."""
+    jd_text, jd_notes = jd_doc.text, list(jd_doc.notes)
+    cv_text, cv_notes = cv_doc.text, list(cv_doc.notes)
 
     truncation_notes = jd_notes + cv_notes
+    overhead_chars, _ = prompt_overhead(truncation_notes, counter, budgets.prompt_layout)
+    prompt_chars_estimate = len(jd_text) + len(cv_text) + overhead_chars
+
     if prompt_chars_estimate > budgets.max_prompt_chars:
         # Scale down CV first, then JD, keeping at least 5k each.
         truncation_notes.append(
             f"Prompt estimate {prompt_chars_estimate} exceeds max_prompt_chars={budgets.max_prompt_chars}; "
             "applying additional truncation."
         )
-        available = max(budgets.max_prompt_chars - overhead, 10_000)
+        available = max(budgets.max_prompt_chars - overhead_chars, 10_000)
         jd_target = max(min(len(jd_text), available // 3), 5_000)
         cv_target = max(min(len(cv_text), available - jd_target), 5_000)
 
@@ -137,16 +727,47 @@ def prepare_inputs(jd_path: Path, cv_path: Path, budgets: InputBudgets) -> Prepa
         truncation_notes.extend(extra)
         cv_text, extra = _truncate(cv_text, max_chars=cv_target, label="CV")
         truncation_notes.extend(extra)
-        prompt_chars_estimate = len(jd_text) + len(cv_text) + overhead
+
+    jd_tokens = counter.count(jd_text)
+    cv_tokens = counter.count(cv_text)
+    overhead_chars, overhead_tokens = prompt_overhead(truncation_notes, counter, budgets.prompt_layout)
+    prompt_tokens_estimate = jd_tokens + cv_tokens + overhead_tokens
+
+    if budgets.max_prompt_tokens is not None and prompt_tokens_estimate > budgets.max_prompt_tokens:
+        # Same policy in token space: JD gets at most a third, CV the rest.
+        truncation_notes.append(
+            f"Prompt estimate {prompt_tokens_estimate} tokens exceeds "
+            f"max_prompt_tokens={budgets.max_prompt_tokens}; applying additional truncation."
+        )
+        available = max(budgets.max_prompt_tokens - overhead_tokens, 2_000)
+        jd_target = max(min(jd_tokens, available // 3), 1_000)
+        cv_target = max(min(cv_tokens, available - jd_target), 1_000)
+
+        jd_text, extra = _truncate_to_tokens(jd_text, max_tokens=jd_target, counter=counter, label="JD")
+        truncation_notes.extend(extra)
+        cv_text, extra = _truncate_to_tokens(cv_text, max_tokens=cv_target, counter=counter, label="CV")
+        truncation_notes.extend(extra)
+        jd_tokens = counter.count(jd_text)
+        cv_tokens = counter.count(cv_text)
+        overhead_chars, overhead_tokens = prompt_overhead(truncation_notes, counter, budgets.prompt_layout)
+        prompt_tokens_estimate = jd_tokens + cv_tokens + overhead_tokens
+
+    prompt_chars_estimate = len(jd_text) + len(cv_text) + overhead_chars
 
     meta = InputMeta(
-        jd_path=str(jd_path),
-        cv_path=str(cv_path),
-        jd_chars_original=len(jd_raw),
-        cv_chars_original=len(cv_raw),
+        jd_path=jd_path,
+        cv_path=cv_path,
+        jd_chars_original=jd_doc.chars_original,
+        cv_chars_original=cv_doc.chars_original,
         jd_chars_used=len(jd_text),
         cv_chars_used=len(cv_text),
         prompt_chars_estimate=prompt_chars_estimate,
         truncation_notes=truncation_notes,
+        tokenizer=counter.name,
+        jd_tokens_original=jd_doc.tokens_original,
+        cv_tokens_original=cv_doc.tokens_original,
+        jd_tokens_used=jd_tokens,
+        cv_tokens_used=cv_tokens,
+        prompt_tokens_estimate=prompt_tokens_estimate,
     )
     return PreparedInputs(jd_text=jd_text, cv_text=cv_text, meta=meta)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import contextlib
+import threading
+import time
+from contextvars import ContextVar
+from typing import Iterator
+
+_RECORDER: ContextVar["TimingRecorder | None"] = ContextVar("jd_resume_timing_recorder", default=None)
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class TimingRecorder:
+    """
+    Collects named stage durations (wall clock) and counters for one run.
+
+    - Spans with the same name are aggregated (total seconds + count), in first-seen order.
+    - Nested spans are recorded independently; names use a dotted `stage.substage` convention.
+    - Safe to share between threads (e.g. chunk workers running in a copied context).
+    """
+
+    def __init__(self) -> None:
+        self._started = time.perf_counter()
+        self._stages: dict[str, list[float]] = {}
+        self.counters: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                self._stages[name] = [seconds, 1]
+            else:
+                stage[0] += seconds
+                stage[1] += 1
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self) -> dict:
+        return {
+            "total_seconds": round(time.perf_counter() - self._started, 6),
+            "stages": [
+                {"name": name, "seconds": round(total, 6), "count": int(n)}
+                for name, (total, n) in self._stages.items()
+            ],
+            "counters": dict(self.counters),
+        }
+
+
+@contextlib.contextmanager
+def recording() -> Iterator[TimingRecorder]:
+    """
+    Install a fresh recorder for the current context.
+
+    asyncio tasks and asyncio.to_thread() calls started inside inherit it. Plain threads and
+    ThreadPoolExecutor workers do not: submit through contextvars.copy_context().run to keep it.
+    """
+    recorder = TimingRecorder()
+    token = _RECORDER.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _RECORDER.reset(token)
+
+
+def current_recorder() -> TimingRecorder | None:
+    return _RECORDER.get()
+
+
+def span(name: str):
+    """Time a block into the active recorder; a shared no-op context when nothing is recording."""
+    recorder = _RECORDER.get()
+    if recorder is None:
+        return _NULL_SPAN
+    return _Span(recorder, name)
+
+
+def count(name: str, value: float = 1) -> None:
+    recorder = _RECORDER.get()
+    if recorder is not None:
+        recorder.count(name, value)
+
+
+class _Span:
+    __slots__ = ("_recorder", "_name", "_started")
+
+    def __init__(self, recorder: TimingRecorder, name: str) -> None:
+        self._recorder = recorder
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._started = time.perf_counter()
+
+    def __exit__(self, *exc: object) -> None:
+        self._recorder.add(self._name, time.perf_counter() - self._started)
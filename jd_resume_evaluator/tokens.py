@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import abc
+import base64
+import functools
+import math
+import re
+from pathlib import Path
+from typing import Protocol
+
+# CJK ideographs, kana and hangul: BPE vocabularies spend roughly one token (often more) per character.
+_CJK = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+_OTHER_NON_ASCII = re.compile(r"[^\x00-\x7f]")
+
+# Approximation of the cl100k pre-tokenizer using stdlib `re` (no \p{L}/\p{N} classes).
+_PRETOKENIZE = re.compile(
+    r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\w]?[^\W\d_]+|\d{1,3}| ?[^\s\w]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+)
+
+_MEMO_MAX_ENTRIES = 200_000
+
+
+class TokenCounter(Protocol):
+    name: str
+
+    def count(self, text: str) -> int: ...
+
+    def count_uncached(self, text: str) -> int: ...
+
+
+class _MemoizedCounter(abc.ABC):
+    """Counts tokens line by line and memoizes each line, so repeated JDs/CV sections are counted once."""
+
+    name = "base"
+
+    def __init__(self) -> None:
+        self._memo: dict[str, int] = {}
+
+    def count(self, text: str) -> int:
+        memo = self._memo
+        total = 0
+        for segment in text.splitlines(keepends=True):
+            n = memo.get(segment)
+            if n is None:
+                n = self._count_segment(segment)
+                if len(memo) >= _MEMO_MAX_ENTRIES:
+                    memo.clear()
+                memo[segment] = n
+            total += n
+        return total
+
+    def count_uncached(self, text: str) -> int:
+        """count() without the memo, for one-off text (a streamed file) that would only churn it."""
+        return sum(self._count_segment(segment) for segment in text.splitlines(keepends=True))
+
+    @abc.abstractmethod
+    def _count_segment(self, segment: str) -> int: ...
+
+
+class ApproxTokenCounter(_MemoizedCounter):
+    """
+    Fast offline estimate tuned for OpenAI-style BPE vocabularies.
+
+    - ASCII text: ~4 characters per token.
+    - CJK/kana/hangul: 1 token per character.
+    - Other non-ASCII (accents, symbols): ~2 characters per token.
+    """
+
+    name = "approx"
+
+    def _count_segment(self, segment: str) -> int:
+        cjk = len(segment) - len(_CJK.sub("", segment))
+        other = len(_OTHER_NON_ASCII.findall(segment)) - cjk
+        ascii_chars = len(segment) - cjk - other
+        return cjk + math.ceil(other / 2) + math.ceil(ascii_chars / 4)
+
+
+class BpeTokenCounter(_MemoizedCounter):
+    """
+    Exact byte-pair-encoding counts from a local `.tiktoken`-format rank file
+    (one `<base64 token> <rank>` pair per line), e.g. a downloaded cl100k_base table.
+
+    Pre-tokenization uses a stdlib approximation of the cl100k regex, so counts can differ from the
+    reference tokenizer by a token or two on unusual Unicode; merges themselves are exact.
+    """
+
+    def __init__(self, ranks: dict[bytes, int], name: str = "bpe") -> None:
+        super().__init__()
+        self._ranks = ranks
+        self.name = name
+        self._piece_memo: dict[bytes, int] = {}
+
+    @classmethod
+    def from_file(cls, path: Path) -> "BpeTokenCounter":
+        return cls(_load_ranks(str(path)), name=f"bpe:{Path(path).name}")
+
+    def _count_segment(self, segment: str) -> int:
+        total = 0
+        for piece in _PRETOKENIZE.findall(segment):
+            data = piece.encode("utf-8")
+            if data in self._ranks:
+                total += 1
+                continue
+            n = self._piece_memo.get(data)
+            if n is None:
+                n = _bpe_token_count(data, self._ranks)
+                if len(self._piece_memo) >= _MEMO_MAX_ENTRIES:
+                    self._piece_memo.clear()
+                self._piece_memo[data] = n
+            total += n
+        return total
+
+
+@functools.lru_cache(maxsize=4)
+def _load_ranks(path: str) -> dict[bytes, int]:
+    ranks: dict[bytes, int] = {}
+    with open(path, "rb") as fh:
+        for lineno, line in enumerate(fh, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                token_b64, rank = line.split()
+                ranks[base64.b64decode(token_b64)] = int(rank)
+            except ValueError as e:
+                raise ValueError(f"Invalid BPE rank file {path} at line {lineno}.") from e
+    if not ranks:
+        raise ValueError(f"BPE rank file is empty: {path}")
+    return ranks
+
+
+def _bpe_token_count(data: bytes, ranks: dict[bytes, int]) -> int:
+    # Same greedy lowest-rank merge as tiktoken's reference implementation.
+    parts = [data[i : i + 1] for i in range(len(data))]
+    while len(parts) > 1:
+        best_rank = None
+        best_idx = -1
+        for i in range(len(parts) - 1):
+            rank = ranks.get(parts[i] + parts[i + 1])
+            if rank is not None and (best_rank is None or rank < best_rank):
+                best_rank = rank
+                best_idx = i
+        if best_rank is None:
+            break
+        parts[best_idx : best_idx + 2] = [parts[best_idx] + parts[best_idx + 1]]
+    return len(parts)
+
+
+@functools.lru_cache(maxsize=8)
+def get_token_counter(spec: str = "approx") -> TokenCounter:
+    """
+    Resolve a tokenizer spec to a (per-process, shared) counter.
+
+    - `approx`: fast heuristic (default).
+    - `bpe:<path>`: exact counts from a local `.tiktoken` rank file.
+    """
+    if spec == "approx":
+        return ApproxTokenCounter()
+    if spec.startswith("bpe:"):
+        return BpeTokenCounter.from_file(Path(spec[4:]))
+    raise ValueError(f"Unknown tokenizer spec: {spec!r} (expected 'approx' or 'bpe:<path>').")
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+from jd_resume_evaluator.batch import BatchPair, BatchSummary, PairOutcome, collect_inputs, run_batch
+from jd_resume_evaluator.cache import ResponseCache
+from jd_resume_evaluator.engines import EngineConfig
+from jd_resume_evaluator.prompting import build_system_prompt
+from jd_resume_evaluator.report import schema_example
+from jd_resume_evaluator.text_prep import InputBudgets
+
+_MANIFEST_FILE = "manifest.json"
+_RESULTS_DIR = "results"
+_FORMAT_VERSION = 1
+# EngineConfig fields that change how a request is sent, not what comes back.
+_TRANSPORT_FIELDS = frozenset(
+    {"openai_api_key", "request_timeout", "max_retries", "stream", "requests_per_minute", "tokens_per_minute"}
+)
+# InputBudgets fields that change where inputs are read from, not the text that is evaluated.
+_SOURCE_FIELDS = frozenset({"corpus_dir"})
+
+
+@dataclass(frozen=True)
+class WatchCycle:
+    pairs_total: int
+    pairs_run: int
+    pairs_unchanged: int
+    pairs_removed: int
+    summary: BatchSummary | None
+
+
+def settings_digest(config: EngineConfig, budgets: InputBudgets) -> str:
+    """sha256 of everything besides the inputs that can change a report: engine settings, budgets and prompt."""
+    settings = {
+        "engine": {k: v for k, v in asdict(config).items() if k not in _TRANSPORT_FIELDS},
+        "budgets": {k: v for k, v in asdict(budgets).items() if k not in _SOURCE_FIELDS},
+        "system_prompt": build_system_prompt(),
+        "schema": schema_example(),
+    }
+    data = json.dumps(settings, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class _DigestCache:
+    # File sha256 keyed on (size, mtime_ns), so an unchanged file is stat'ed but never re-read.
+    def __init__(self) -> None:
+        self._entries: dict[str, tuple[int, int, str]] = {}
+
+    def digest(self, path: str) -> str:
+        st = os.stat(path)
+        cached = self._entries.get(path)
+        if cached is not None and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        with open(path, "rb") as fh:
+            digest = hashlib.file_digest(fh, "sha256").hexdigest()
+        self._entries[path] = (st.st_size, st.st_mtime_ns, digest)
+        return digest
+
+
+class IncrementalRunner:
+    """
+    Keeps a results directory in sync with JD/CV inputs, re-evaluating only what changed.
+
+    - `manifest.json` records, per (JD, CV) pair, both files' sha256, the settings digest, whether
+      the evaluation succeeded and its result file. A pair runs again only when one of those differs
+      (or it failed); other result files are never rewritten.
+    - Results are one JSON file per pair under `results/`, written atomically as each pair finishes.
+      The manifest is saved after every cycle, so pairs finished before a crash are simply re-run.
+    - Pairs whose JD or CV disappeared are dropped from the manifest and their result files removed.
+    """
+
+    def __init__(
+        self,
+        out_dir: Path,
+        *,
+        jobs: list[str],
+        cvs: list[str],
+        budgets: InputBudgets,
+        config: EngineConfig,
+        workers: int,
+        executor_kind: str = "thread",
+        cache: ResponseCache | None = None,
+    ) -> None:
+        self.out_dir = Path(out_dir)
+        self.jobs = jobs
+        self.cvs = cvs
+        self.budgets = budgets
+        self.config = config
+        self.workers = workers
+        self.executor_kind = executor_kind
+        self.cache = cache
+        self.settings = settings_digest(config, budgets)
+        self._digests = _DigestCache()
+        self._pairs: dict[str, dict] = {}
+
+        manifest_path = self.out_dir / _MANIFEST_FILE
+        if manifest_path.exists():
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            if manifest.get("version") != _FORMAT_VERSION:
+                raise ValueError(f"Unsupported manifest format in {manifest_path}: {manifest.get('version')}")
+            self._pairs = manifest["pairs"]
+
+    def input_files(self) -> list[Path]:
+        return _collect(self.jobs) + _collect(self.cvs)
+
+    def snapshot(self) -> dict[str, tuple[int, int]]:
+        """Cheap change detector for polling: (size, mtime_ns) of every input file."""
+        snap: dict[str, tuple[int, int]] = {}
+        for path in self.input_files():
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snap[str(path)] = (st.st_size, st.st_mtime_ns)
+        return snap
+
+    def run_once(
+        self,
+        *,
+        on_result: Callable[[PairOutcome], None] | None = None,
+        on_progress: Callable[[int, int, float], None] | None = None,
+    ) -> WatchCycle:
+        jd_paths, cv_paths = _collect(self.jobs), _collect(self.cvs)
+        digests: dict[str, str] = {}
+        for path in jd_paths + cv_paths:
+            try:
+                digests[str(path)] = self._digests.digest(str(path))
+            except FileNotFoundError:
+                # Moved or deleted since it was listed (e.g. mid bulk copy): absent this cycle, as in snapshot().
+                continue
+        jd_paths = [p for p in jd_paths if str(p) in digests]
+        cv_paths = [p for p in cv_paths if str(p) in digests]
+
+        current: dict[str, BatchPair] = {}
+        to_run: list[BatchPair] = []
+        for jd in jd_paths:
+            for cv in cv_paths:
+                pair = BatchPair(jd_path=str(jd), cv_path=str(cv))
+                key = _pair_key(pair)
+                current[key] = pair
+                entry = self._pairs.get(key)
+                if (
+                    entry is None
+                    or not entry["ok"]
+                    or entry["jd_sha256"] != digests[pair.jd_path]
+                    or entry["cv_sha256"] != digests[pair.cv_path]
+                    or entry["settings"] != self.settings
+                ):
+                    to_run.append(pair)
+
+        removed = [key for key in self._pairs if key not in current]
+        for key in removed:
+            (self.out_dir / _RESULTS_DIR / self._pairs.pop(key)["result"]).unlink(missing_ok=True)
+
+        summary = None
+        if to_run:
+            (self.out_dir / _RESULTS_DIR).mkdir(parents=True, exist_ok=True)
+
+            def record(outcome: PairOutcome) -> None:
+                self._record(outcome, digests)
+                if on_result is not None:
+                    on_result(outcome)
+
+            summary = run_batch(
+                to_run,
+                budgets=self.budgets,
+                config=self.config,
+                workers=self.workers,
+                executor_kind=self.executor_kind,
+                cache=self.cache,
+                on_result=record,
+                on_progress=on_progress,
+            )
+        if to_run or removed:
+            self._save()
+        return WatchCycle(
+            pairs_total=len(current),
+            pairs_run=len(to_run),
+            pairs_unchanged=len(current) - len(to_run),
+            pairs_removed=len(removed),
+            summary=summary,
+        )
+
+    def _record(self, outcome: PairOutcome, digests: dict[str, str]) -> None:
+        pair = BatchPair(jd_path=outcome.jd_path, cv_path=outcome.cv_path)
+        key = _pair_key(pair)
+        name = f"{Path(pair.jd_path).stem}__{Path(pair.cv_path).stem}__{hashlib.sha256(key.encode()).hexdigest()[:10]}"
+        evaluated_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        entry = {
+            "jd_path": pair.jd_path,
+            "cv_path": pair.cv_path,
+            "jd_sha256": digests[pair.jd_path],
+            "cv_sha256": digests[pair.cv_path],
+            "settings": self.settings,
+            "ok": outcome.ok,
+            "result": f"{name}.json",
+            "evaluated_at": evaluated_at,
+        }
+        record = {**asdict(outcome), **{k: entry[k] for k in ("jd_sha256", "cv_sha256", "evaluated_at")}}
+        path = self.out_dir / _RESULTS_DIR / entry["result"]
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(record, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+        self._pairs[key] = entry
+
+    def _save(self) -> None:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.out_dir / (_MANIFEST_FILE + ".tmp")
+        manifest = {"version": _FORMAT_VERSION, "pairs": self._pairs}
+        tmp.write_text(json.dumps(manifest, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.out_dir / _MANIFEST_FILE)
+
+
+def watch(
+    runner: IncrementalRunner,
+    *,
+    interval: float,
+    debounce: float,
+    on_cycle: Callable[[WatchCycle], None],
+    stop: Callable[[], bool] = lambda: False,
+) -> None:
+    """
+    Catch up once, then poll the inputs every `interval` seconds.
+
+    A change starts a quiet period: the next cycle runs only after `debounce` seconds without
+    further changes, so a burst of edits (or a bulk copy into resume_box/) becomes one batch.
+    """
+    on_cycle(runner.run_once())
+    snapshot = runner.snapshot()
+    changed_at: float | None = None
+    while not stop():
+        time.sleep(interval)
+        current = runner.snapshot()
+        if current != snapshot:
+            snapshot = current
+            changed_at = time.monotonic()
+            continue
+        if changed_at is not None and time.monotonic() - changed_at >= debounce:
+            changed_at = None
+            on_cycle(runner.run_once())
+
+
+def _collect(specs: list[str]) -> list[Path]:
+    # Like collect_inputs(), but an empty directory or unmatched pattern is just "nothing yet".
+    found: list[Path] = []
+    for spec in specs:
+        try:
+            found.extend(collect_inputs([spec]))
+        except ValueError:
+            continue
+    return sorted(dict.fromkeys(found), key=str)
+
+
+def _pair_key(pair: BatchPair) -> str:
+    return f"{Path(pair.jd_path).resolve()}\n{Path(pair.cv_path).resolve()}"
@@ -0,0 +1,381 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Callable, Iterator, TypeVar
+
+from jd_resume_evaluator.batch import BatchPair, PairOutcome, evaluate_pair
+from jd_resume_evaluator.cache import ResponseCache
+from jd_resume_evaluator.engines import EngineConfig, EngineName
+from jd_resume_evaluator.result_store import content_digest
+from jd_resume_evaluator.text_prep import InputBudgets
+from jd_resume_evaluator.watch import settings_digest
+
+_FORMAT_VERSION = 1
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS settings (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    job_key TEXT NOT NULL UNIQUE,
+    jd_path TEXT NOT NULL,
+    cv_path TEXT NOT NULL,
+    settings_id INTEGER NOT NULL REFERENCES settings(id),
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    outcome TEXT,
+    last_error TEXT,
+    enqueued_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (state, id);
+"""
+JOB_STATES = ("pending", "leased", "done", "failed")
+# Never written to the queue: every worker supplies its own key.
+_SECRET_FIELDS = frozenset({"openai_api_key"})
+# run_worker gives up after this many consecutive queue errors in one thread, backing off in between.
+_MAX_QUEUE_ERRORS = 5
+_MAX_BACKOFF_SECONDS = 60.0
+
+_T = TypeVar("_T")
+
+
+@dataclass(frozen=True)
+class QueuedJob:
+    id: int
+    pair: BatchPair
+    budgets: InputBudgets
+    config: EngineConfig
+    attempts: int
+
+
+class WorkQueue:
+    """
+    Durable JD × CV job queue in one SQLite file, shared by a coordinator and any number of workers.
+
+    - A job is (JD, CV, engine config + budgets). Its key hashes the JD/CV contents and
+      watch.settings_digest(), so enqueueing the same work again is a no-op and a finished job is never
+      re-run. Edited inputs or changed settings are new jobs.
+    - Workers claim jobs with a time-limited lease and renew it while they work. A lease that expires
+      (crashed or partitioned worker) makes the job claimable again, so a crash loses only in-flight work.
+    - The first successful completion wins, even from a worker whose lease was reclaimed; later results
+      are dropped. A failed attempt only counts while its worker still holds the lease.
+    - Failed evaluations go back to pending until `max_attempts` claims have been used.
+    - Uses SQLite's default rollback journal (not WAL), which only needs working file locks, so the file
+      can sit on shared storage for workers on several hosts. Leases compare wall clocks across hosts.
+    """
+
+    def __init__(self, path: Path, *, timeout: float = 30.0) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode: every write is its own short transaction unless opened with BEGIN IMMEDIATE.
+        self._db = sqlite3.connect(self.path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.executescript(_SCHEMA)
+            self._db.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('format_version', ?)", (str(_FORMAT_VERSION),)
+            )
+            (version,) = self._db.execute("SELECT value FROM meta WHERE key = 'format_version'").fetchone()
+        if int(version) != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported work queue format in {self.path}: v{version}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "WorkQueue":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def enqueue(
+        self, pairs: list[BatchPair], *, budgets: InputBudgets, config: EngineConfig, max_attempts: int = 3
+    ) -> int:
+        """Add jobs for `pairs`; returns how many were new (already queued or finished ones are skipped)."""
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be >= 1.")
+        digest = settings_digest(config, budgets)
+        body = json.dumps(
+            {
+                "engine": {k: v for k, v in asdict(config).items() if k not in _SECRET_FIELDS},
+                "budgets": asdict(budgets),
+            },
+            sort_keys=True,
+        )
+        file_digests: dict[str, str] = {}
+
+        def file_digest(path: str) -> str:
+            if path not in file_digests:
+                file_digests[path] = content_digest(Path(path).read_bytes())
+            return file_digests[path]
+
+        rows = []
+        now = time.time()
+        for pair in pairs:
+            jd_path, cv_path = str(Path(pair.jd_path).resolve()), str(Path(pair.cv_path).resolve())
+            key = hashlib.sha256(f"{file_digest(jd_path)}:{file_digest(cv_path)}:{digest}".encode()).hexdigest()
+            rows.append((key, jd_path, cv_path, max_attempts, now))
+
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute("INSERT OR IGNORE INTO settings (digest, body) VALUES (?, ?)", (digest, body))
+                (settings_id,) = self._db.execute("SELECT id FROM settings WHERE digest = ?", (digest,)).fetchone()
+                before = self._db.total_changes
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO jobs (job_key, jd_path, cv_path, settings_id, max_attempts, enqueued_at) "
+                    f"VALUES (?, ?, ?, {int(settings_id)}, ?, ?)",
+                    rows,
+                )
+                added = self._db.total_changes - before
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return added
+
+    def claim(self, worker_id: str, *, lease_seconds: float, limit: int = 1) -> list[QueuedJob]:
+        """
+        Lease up to `limit` jobs: pending ones first, then ones whose lease expired.
+
+        An expired job that has already used all its attempts is marked failed instead of re-leased,
+        so an input that crashes every worker cannot cycle forever.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "UPDATE jobs SET state = 'failed', lease_owner = NULL, finished_at = ?, "
+                    "last_error = 'lease expired after the last attempt' "
+                    "WHERE state = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+                    (now, now),
+                )
+                rows = self._db.execute(
+                    "SELECT jobs.id, jd_path, cv_path, attempts, body FROM jobs "
+                    "JOIN settings ON settings.id = jobs.settings_id "
+                    "WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?) "
+                    "ORDER BY state = 'leased', jobs.id LIMIT ?",
+                    (now, limit),
+                ).fetchall()
+                self._db.executemany(
+                    "UPDATE jobs SET state = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    [(worker_id, now + lease_seconds, row[0]) for row in rows],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return [_job_from_row(*row) for row in rows]
+
+    def renew(self, worker_id: str, *, lease_seconds: float) -> int:
+        """Extend every lease `worker_id` still holds; returns how many it holds."""
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE state = 'leased' AND lease_owner = ?",
+                (time.time() + lease_seconds, worker_id),
+            )
+        return cur.rowcount
+
+    def complete(self, job: QueuedJob, outcome: PairOutcome, *, worker_id: str) -> bool:
+        """Record a finished attempt; False when it was dropped (finished elsewhere, or a lost lease's failure)."""
+        now = time.time()
+        data = json.dumps(asdict(outcome), ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            if outcome.ok:
+                cur = self._db.execute(
+                    "UPDATE jobs SET state = 'done', outcome = ?, lease_owner = NULL, finished_at = ? "
+                    "WHERE id = ? AND state = 'leased'",
+                    (data, now, job.id),
+                )
+            else:
+                cur = self._db.execute(
+                    "UPDATE jobs SET state = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END, "
+                    "outcome = ?, last_error = ?, lease_owner = NULL, lease_expires = NULL, "
+                    "finished_at = CASE WHEN attempts >= max_attempts THEN ? END "
+                    "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                    (data, outcome.error, now, job.id, worker_id),
+                )
+        return cur.rowcount == 1
+
+    def release(self, worker_id: str) -> int:
+        """Hand back every job `worker_id` holds (graceful shutdown); the attempt is not counted."""
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE jobs SET state = 'pending', attempts = attempts - 1, lease_owner = NULL, "
+                "lease_expires = NULL WHERE state = 'leased' AND lease_owner = ?",
+                (worker_id,),
+            )
+        return cur.rowcount
+
+    def retry_failed(self) -> int:
+        """Make every failed job pending again with fresh attempts; returns how many."""
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE jobs SET state = 'pending', attempts = 0, finished_at = NULL WHERE state = 'failed'"
+            )
+        return cur.rowcount
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            counts = dict(self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+            (expired,) = self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE state = 'leased' AND lease_expires < ?", (time.time(),)
+            ).fetchone()
+        stats = {state: int(counts.get(state, 0)) for state in JOB_STATES}
+        stats["expired_leases"] = int(expired)
+        stats["total"] = sum(stats[state] for state in JOB_STATES)
+        return stats
+
+    def outcomes(self) -> Iterator[dict]:
+        """Final outcomes (done and failed jobs) in enqueue order, as batch.py results.jsonl rows."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT outcome, last_error, jd_path, cv_path, state FROM jobs "
+                "WHERE state IN ('done', 'failed') ORDER BY id"
+            ).fetchall()
+        for data, last_error, jd_path, cv_path, state in rows:
+            if data is not None:
+                yield json.loads(data)
+            else:
+                # Failed without any recorded attempt: every lease expired (e.g. the input crashes workers).
+                yield asdict(PairOutcome(jd_path=jd_path, cv_path=cv_path, ok=False, seconds=0.0, error=last_error))
+
+
+def _job_from_row(job_id: int, jd_path: str, cv_path: str, attempts: int, body: str) -> QueuedJob:
+    settings = json.loads(body)
+    engine = settings["engine"]
+    return QueuedJob(
+        id=job_id,
+        pair=BatchPair(jd_path=jd_path, cv_path=cv_path),
+        budgets=InputBudgets(**settings["budgets"]),
+        config=EngineConfig(**{**engine, "engine": EngineName(engine["engine"])}),
+        attempts=attempts + 1,
+    )
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{uuid.uuid4().hex[:8]}"
+
+
+def run_worker(
+    queue: WorkQueue,
+    *,
+    worker_id: str,
+    threads: int = 1,
+    lease_seconds: float = 300.0,
+    poll_interval: float = 2.0,
+    follow: bool = False,
+    openai_api_key: str | None = None,
+    cache: ResponseCache | None = None,
+    on_result: Callable[[QueuedJob, PairOutcome, bool], None] | None = None,
+    on_error: Callable[[str, sqlite3.Error, int], None] | None = None,
+) -> int:
+    """
+    Claim and evaluate jobs on `threads` threads until the queue is drained; returns jobs evaluated.
+
+    - Each job runs batch.evaluate_pair() (prepare inputs → engine → validation → evidence check)
+      with the config it was enqueued with, plus this worker's API key.
+    - A heartbeat renews this worker's leases every third of `lease_seconds`, so a slow LLM call keeps
+      its job while a dead worker's jobs expire. At most `threads` jobs are leased at once.
+    - Without `follow`, a thread exits once nothing is pending or leased anywhere; with it, it keeps
+      polling for new jobs. On exit (including KeyboardInterrupt) held leases are released.
+    - A queue error (e.g. "database is locked") is passed to `on_error(operation, error, failures)` and the
+      operation is retried with exponential backoff. After `_MAX_QUEUE_ERRORS` consecutive failures the
+      worker stops and raises RuntimeError; jobs it still holds are picked up by others once leases expire.
+    """
+    if threads < 1:
+        raise ValueError("threads must be >= 1.")
+    if lease_seconds <= 0:
+        raise ValueError("lease_seconds must be > 0.")
+    stop = threading.Event()
+    evaluated = 0
+    count_lock = threading.Lock()
+    gave_up: list[sqlite3.Error] = []
+
+    def guarded(operation: str, call: Callable[[], _T], *, max_backoff: float = _MAX_BACKOFF_SECONDS) -> _T | None:
+        # None means stop: the worker is shutting down or this thread gave up on the queue.
+        failures = 0
+        while not stop.is_set():
+            try:
+                return call()
+            except sqlite3.Error as exc:
+                failures += 1
+                if on_error is not None:
+                    on_error(operation, exc, failures)
+                if failures >= _MAX_QUEUE_ERRORS:
+                    gave_up.append(exc)
+                    stop.set()
+                    return None
+                stop.wait(min(poll_interval * 2 ** (failures - 1), max_backoff))
+        return None
+
+    def heartbeat() -> None:
+        # Retries stay within a third of the lease, so one lost renewal does not cost the job.
+        while not stop.wait(lease_seconds / 3):
+            guarded("renew", lambda: queue.renew(worker_id, lease_seconds=lease_seconds), max_backoff=lease_seconds / 3)
+
+    def work() -> None:
+        nonlocal evaluated
+        while not stop.is_set():
+            jobs = guarded("claim", lambda: queue.claim(worker_id, lease_seconds=lease_seconds))
+            if jobs is None:
+                return
+            if not jobs:
+                stats = guarded("stats", queue.stats)
+                if stats is None:
+                    return
+                if not follow and stats["pending"] == 0 and stats["leased"] == 0:
+                    return
+                stop.wait(poll_interval)
+                continue
+            job = jobs[0]
+            config = job.config if openai_api_key is None else replace(job.config, openai_api_key=openai_api_key)
+            outcome = evaluate_pair(job.pair, job.budgets, config, cache)
+            recorded = guarded("complete", lambda: queue.complete(job, outcome, worker_id=worker_id))
+            if recorded is None:
+                return
+            with count_lock:
+                evaluated += 1
+            if on_result is not None:
+                on_result(job, outcome, recorded)
+
+    beat = threading.Thread(target=heartbeat, name="work-queue-heartbeat", daemon=True)
+    beat.start()
+    pool = [threading.Thread(target=work, name=f"work-queue-{i}", daemon=True) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    try:
+        for thread in pool:
+            # A timeout keeps the main thread responsive to KeyboardInterrupt.
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+    finally:
+        stop.set()
+        beat.join()
+        # Best effort: leases a locked queue keeps simply expire.
+        with contextlib.suppress(sqlite3.Error):
+            queue.release(worker_id)
+    if gave_up:
+        raise RuntimeError(
+            f"Worker {worker_id} gave up after {_MAX_QUEUE_ERRORS} consecutive queue errors: {gave_up[0]}"
+        ) from gave_up[0]
+    return evaluated
@@ -1,16 +1,32 @@
 from __future__ import annotations
 
 import argparse
+import cProfile
 import json
-import os
 import sys
-from dataclasses import asdict
+import uuid
+from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 
+from jd_resume_evaluator.cache import cache_stats_dict, evaluate_with_cache
+from jd_resume_evaluator.chunking import evaluate_chunked, prepare_chunked_inputs
+from jd_resume_evaluator.cli import (
+    add_budget_args,
+    add_cache_args,
+    add_engine_args,
+    add_store_args,
+    budgets_from_args,
+    cache_from_args,
+    engine_config_from_args,
+    store_from_args,
+)
 from jd_resume_evaluator.engines import EngineName, evaluate_with_engine
-from jd_resume_evaluator.report import EvaluationReport, validate_report_dict
-from jd_resume_evaluator.text_prep import InputBudgets, PreparedInputs, prepare_inputs
+from jd_resume_evaluator.evidence import EvidenceCheck, retry_unverified
+from jd_resume_evaluator.report import EvaluationReport, parse_report, validate_report_dict
+from jd_resume_evaluator.result_store import RecordLocation, ShardedResultStore, content_digest
+from jd_resume_evaluator.text_prep import InputMeta, prepare_inputs
+from jd_resume_evaluator.timing import TimingRecorder, recording, span
 
 
 def _parse_args(argv: list[str]) -> argparse.Namespace:
@@ -19,71 +35,48 @@ def _parse_args(argv: list[str]) -> argparse.Namespace:
     )
     parser.add_argument("--job", required=True, help="Path to the job description (Markdown/text).")
     parser.add_argument("--cv", required=True, help="Path to the candidate CV/resume (Markdown/text).")
-    parser.add_argument(
-        "--engine",
-        default="mock",
-        choices=[e.value for e in EngineName],
-        help="Evaluation engine: mock (offline) or openai (Chat Completions HTTP).",
-    )
-    parser.add_argument(
-        "--model",
-        default=os.environ.get("MODEL", "gpt-4o-mini"),
-        help="Model name (used by LLM engines).",
-    )
-    parser.add_argument(
-        "--temperature",
-        type=float,
-        default=0.0,
-        help="LLM temperature (LLM engines only).",
-    )
-    parser.add_argument(
-        "--openai-base-url",
-        default=os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1"),
-        help="Base URL for OpenAI-compatible API (LLM engines only).",
-    )
-    parser.add_argument(
-        "--openai-api-key",
-        default=os.environ.get("OPENAI_API_KEY"),
-        help="OpenAI API key (or set OPENAI_API_KEY).",
-    )
-    parser.add_argument(
-        "--max-jd-chars",
-        type=int,
-        default=60_000,
-        help="Max characters to include from JD after compression/truncation.",
-    )
-    parser.add_argument(
-        "--max-cv-chars",
-        type=int,
-        default=140_000,
-        help="Max characters to include from CV after compression/truncation.",
-    )
-    parser.add_argument(
-        "--max-prompt-chars",
-        type=int,
-        default=220_000,
-        help="Max total prompt characters; inputs are compressed/truncated to fit.",
-    )
-    parser.add_argument(
-        "--outline-if-needed",
-        action=argparse.BooleanOptionalAction,
-        default=True,
-        help="When inputs exceed budgets, extract headings/bullets before truncation.",
-    )
+    add_engine_args(parser)
+    add_budget_args(parser)
+    add_cache_args(parser)
+    add_store_args(parser)
     parser.add_argument(
         "--dry-run",
         action="store_true",
         help="Print prompt/input size stats and exit without calling any engine.",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "Also write a cProfile dump: profile.pstats in the output directory, or "
+            "<store-dir>/profiles/<record id>.pstats with --store-dir."
+        ),
+    )
     parser.add_argument(
         "--out-dir",
         default="outputs/jd_resume_eval",
-        help="Directory to write outputs into (timestamped subdir).",
+        help="Directory to write outputs into (timestamped subdir); unused with --store-dir.",
     )
     return parser.parse_args(argv)
 
 
-def _write_outputs(out_dir: Path, prepared: PreparedInputs, report: EvaluationReport, raw: str | None) -> None:
+@dataclass(frozen=True)
+class _RunOutput:
+    meta: InputMeta
+    report: EvaluationReport
+    raw_output: str | None
+    run_meta: dict
+    evidence: EvidenceCheck
+
+
+def _write_outputs(
+    out_dir: Path,
+    meta: InputMeta,
+    report: EvaluationReport,
+    raw: str | None,
+    run_meta: dict,
+    evidence: EvidenceCheck,
+) -> None:
     out_dir.mkdir(parents=True, exist_ok=True)
 
     report_path = out_dir / "report.json"
@@ -91,46 +84,198 @@ def _write_outputs(out_dir: Path, prepared: PreparedInputs, report: EvaluationRe
 
     meta_path = out_dir / "input_meta.json"
     meta_path.write_text(
-        json.dumps(asdict(prepared.meta), ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+        json.dumps(asdict(meta), ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+    )
+
+    (out_dir / "evidence_check.json").write_text(
+        json.dumps(asdict(evidence), ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+    )
+
+    (out_dir / "run_meta.json").write_text(
+        json.dumps(run_meta, ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
     )
 
     if raw is not None:
         (out_dir / "raw_output.txt").write_text(raw, encoding="utf-8")
 
 
+def _write_timings(out_dir: Path, recorder: TimingRecorder) -> None:
+    (out_dir / "timings.json").write_text(
+        json.dumps(recorder.to_dict(), ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+    )
+
+
 def main(argv: list[str] | None = None) -> int:
     args = _parse_args(sys.argv[1:] if argv is None else argv)
 
-    budgets = InputBudgets(
-        max_jd_chars=args.max_jd_chars,
-        max_cv_chars=args.max_cv_chars,
-        max_prompt_chars=args.max_prompt_chars,
-        outline_if_needed=bool(args.outline_if_needed),
+    try:
+        # Opened before the evaluation, so a store held by another writer fails before any model call.
+        store = store_from_args(args) if not args.dry_run else None
+    except RuntimeError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    profiler = cProfile.Profile() if args.profile and not args.dry_run else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        with recording() as recorder:
+            output = _run(args)
+            if output is not None and not args.store_dir:
+                timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+                out_dir = Path(args.out_dir) / timestamp
+                with span("write_outputs"):
+                    _write_outputs(
+                        out_dir,
+                        meta=output.meta,
+                        report=output.report,
+                        raw=output.raw_output,
+                        run_meta=output.run_meta,
+                        evidence=output.evidence,
+                    )
+                _write_timings(out_dir, recorder)
+    except BaseException:
+        if store is not None:
+            store.close()
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+    if output is None:
+        return 0
+
+    if store is not None:
+        with store:
+            record_id, location = _store_output(store, args, output, recorder)
+        if profiler is not None:
+            profile_dir = store.root / "profiles"
+            profile_dir.mkdir(exist_ok=True)
+            profiler.dump_stats(str(profile_dir / f"{record_id}.pstats"))
+        print(f"{store.root / location.shard}@{location.offset} (id {record_id})")
+        return 0
+
+    if profiler is not None:
+        profiler.dump_stats(str(out_dir / "profile.pstats"))
+    print(str(out_dir))
+    return 0
+
+
+def _store_output(
+    store: ShardedResultStore, args: argparse.Namespace, output: _RunOutput, recorder: TimingRecorder
+) -> tuple[str, RecordLocation]:
+    # Same content as the per-run directory, as one record keyed by the input files' sha256.
+    record_id = uuid.uuid4().hex
+    record = {
+        "id": record_id,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "report": asdict(output.report),
+        "input_meta": asdict(output.meta),
+        "run_meta": output.run_meta,
+        "evidence_check": asdict(output.evidence),
+        "timings": recorder.to_dict(),
+        "raw_output": output.raw_output,
+    }
+    location = store.append(
+        record,
+        jd_sha256=content_digest(Path(args.job).read_bytes()),
+        cv_sha256=content_digest(Path(args.cv).read_bytes()),
     )
-    prepared = prepare_inputs(Path(args.job), Path(args.cv), budgets=budgets)
+    return record_id, location
+
+
+def _run(args: argparse.Namespace) -> _RunOutput | None:
+    budgets = budgets_from_args(args)
+    with span("prepare_inputs"):
+        if budgets.cv_chunking:
+            chunked = prepare_chunked_inputs(Path(args.job), Path(args.cv), budgets=budgets)
+            meta = chunked.meta
+        else:
+            prepared = prepare_inputs(Path(args.job), Path(args.cv), budgets=budgets)
+            meta = prepared.meta
 
     if args.dry_run:
-        print(json.dumps(asdict(prepared.meta), ensure_ascii=False, indent=2))
-        return 0
+        print(json.dumps(asdict(meta), ensure_ascii=False, indent=2))
+        return None
 
     engine = EngineName(args.engine)
-    report_dict, raw_output = evaluate_with_engine(
-        engine=engine,
-        prepared=prepared,
-        model=args.model,
-        temperature=float(args.temperature),
-        openai_base_url=args.openai_base_url,
-        openai_api_key=args.openai_api_key,
-    )
-    validate_report_dict(report_dict)
-    report = EvaluationReport.from_dict(report_dict)
+    config = engine_config_from_args(args)
+    cache = cache_from_args(args)
+    chunk_meta = None
+    with span("evaluate"):
+        if budgets.cv_chunking:
+            evaluation = evaluate_chunked(chunked, config=config, cache=cache)
+            chunk_meta = {
+                "count": len(chunked.chunks),
+                "cache_hits": evaluation.cache_hits,
+                "scores": evaluation.chunk_scores,
+            }
+        else:
+            evaluation = evaluate_with_cache(
+                cache,
+                engine=engine,
+                prepared=prepared,
+                model=args.model,
+                temperature=float(args.temperature),
+                openai_base_url=args.openai_base_url,
+                openai_api_key=args.openai_api_key,
+                request_timeout=float(args.request_timeout),
+                max_retries=int(args.max_retries),
+                stream=bool(args.stream),
+                prompt_layout=args.prompt_layout,
+                response_format=args.response_format,
+            )
+    with span("validate_report_dict"):
+        validate_report_dict(evaluation.report_dict)
 
-    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-    out_dir = Path(args.out_dir) / timestamp
-    _write_outputs(out_dir, prepared=prepared, report=report, raw=raw_output)
+    if budgets.cv_chunking:
+        jd_text, cv_text = chunked.jd_text, chunked.cv_text
 
-    print(str(out_dir))
-    return 0
+        def reevaluate() -> tuple[dict, str | None]:
+            fresh = evaluate_chunked(chunked, config=config)
+            return fresh.report_dict, fresh.raw_output
+
+    else:
+        jd_text, cv_text = prepared.jd_text, prepared.cv_text
+
+        def reevaluate() -> tuple[dict, str | None]:
+            return evaluate_with_engine(
+                engine=engine,
+                prepared=prepared,
+                model=args.model,
+                temperature=float(args.temperature),
+                openai_base_url=args.openai_base_url,
+                openai_api_key=args.openai_api_key,
+                request_timeout=float(args.request_timeout),
+                max_retries=int(args.max_retries),
+                stream=bool(args.stream),
+                prompt_layout=args.prompt_layout,
+                response_format=args.response_format,
+            )
+
+    # The mock engine is deterministic, so asking it again cannot help.
+    report_dict, raw_output, evidence = retry_unverified(
+        evaluation.report_dict,
+        evaluation.raw_output,
+        jd_text=jd_text,
+        cv_text=cv_text,
+        retries=0 if engine == EngineName.mock else config.evidence_retries,
+        reevaluate=reevaluate,
+    )
+    report = parse_report(report_dict)
+    run_meta = {
+        "engine": engine.value,
+        "model": args.model,
+        "temperature": float(args.temperature),
+        "prompt_layout": args.prompt_layout,
+        "response_format": args.response_format,
+        "cache_hit": evaluation.cache_hit,
+        "cache": cache_stats_dict(cache),
+        "evidence": evidence.summary(),
+    }
+    if chunk_meta is not None:
+        run_meta["cv_chunks"] = chunk_meta
+
+    return _RunOutput(meta=meta, report=report, raw_output=raw_output, run_meta=run_meta, evidence=evidence)
 
 
 if __name__ == "__main__":
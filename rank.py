@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from jd_resume_evaluator.batch import collect_inputs
+from jd_resume_evaluator.corpus import open_corpus
+from jd_resume_evaluator.ranking import LexicalIndex
+from jd_resume_evaluator.text_prep import normalize_text, read_text
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Build/update a persistent BM25 index over a CV corpus and rank CVs against a JD."
+    )
+    parser.add_argument("--index-dir", default="outputs/cv_index", help="Index directory.")
+    parser.add_argument(
+        "--cvs",
+        nargs="*",
+        default=[],
+        help="CV files, directories, or glob patterns to (incrementally) add to the index.",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Drop indexed CVs that are not among --cvs.",
+    )
+    parser.add_argument(
+        "--corpus-dir",
+        default=None,
+        help="Packed corpus built by corpus.py; CVs packed there are read from it instead of one file at a time.",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Rewrite the index segments without replaced/removed CVs (after --cvs/--prune).",
+    )
+    parser.add_argument("--job", help="Rank the indexed CVs against this JD.")
+    parser.add_argument("--top-k", type=int, default=20, help="Number of CVs to print.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    index = LexicalIndex.open(Path(args.index_dir))
+
+    if args.cvs:
+        started = time.perf_counter()
+        corpus = open_corpus(args.corpus_dir) if args.corpus_dir else None
+        added, removed = index.update(collect_inputs(args.cvs), prune=args.prune, corpus=corpus)
+        print(
+            f"indexed +{added} -{removed} ({index.live_count} live) in {time.perf_counter() - started:.2f}s",
+            file=sys.stderr,
+        )
+
+    if args.compact:
+        started = time.perf_counter()
+        dropped = index.compact()
+        print(
+            f"compacted -{dropped} ({index.live_count} live) in {time.perf_counter() - started:.2f}s",
+            file=sys.stderr,
+        )
+
+    if args.job:
+        jd_text = normalize_text(read_text(Path(args.job)))
+        for ranked in index.rank(jd_text, top_k=args.top_k):
+            print(json.dumps(asdict(ranked), ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+
+from jd_resume_evaluator.cli import (
+    add_budget_args,
+    add_cache_args,
+    add_engine_args,
+    add_store_args,
+    budgets_from_args,
+    cache_from_args,
+    engine_config_from_args,
+    store_from_args,
+)
+from jd_resume_evaluator.server import EvaluationServer
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Serve JD ↔ CV evaluations over a local HTTP/JSON API with warm caches and connections."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address.")
+    parser.add_argument("--port", type=int, default=8080, help="Bind port.")
+    add_engine_args(parser)
+    add_budget_args(parser)
+    add_cache_args(parser)
+    add_store_args(parser)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Evaluations processed concurrently (also the LLM connection pool size).",
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=64,
+        help="Requests allowed to wait for a worker; beyond this the server answers 429.",
+    )
+    parser.add_argument(
+        "--max-body-mb",
+        type=float,
+        default=16.0,
+        help="Largest accepted request body (MB).",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    try:
+        store = store_from_args(args)
+    except RuntimeError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    server = EvaluationServer(
+        budgets=budgets_from_args(args),
+        config=engine_config_from_args(args),
+        workers=args.workers,
+        max_queue=args.max_queue,
+        cache=cache_from_args(args),
+        max_body_bytes=int(args.max_body_mb * 1024 * 1024),
+        store=store,
+    )
+    print(f"listening on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
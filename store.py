@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from jd_resume_evaluator.result_store import ShardedResultStore, content_digest
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Look up stored evaluations by JD/CV content hash in a sharded result store."
+    )
+    parser.add_argument("--store-dir", required=True, help="Result store directory (see main.py --store-dir).")
+    jd = parser.add_mutually_exclusive_group(required=True)
+    jd.add_argument("--job", help="JD file (hashed the same way main.py hashes it).")
+    jd.add_argument("--jd-sha256", help="JD content sha256.")
+    cv = parser.add_mutually_exclusive_group(required=True)
+    cv.add_argument("--cv", help="CV file (hashed the same way main.py hashes it).")
+    cv.add_argument("--cv-sha256", help="CV content sha256.")
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Print every stored evaluation of the pair (oldest first), not just the latest.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    jd_sha256 = args.jd_sha256 or content_digest(Path(args.job).read_bytes())
+    cv_sha256 = args.cv_sha256 or content_digest(Path(args.cv).read_bytes())
+
+    # Read-only: safe next to a running writer (main.py runs or server.py --store-dir).
+    store = ShardedResultStore(Path(args.store_dir), read_only=True)
+    records = store.lookup(jd_sha256, cv_sha256)
+    if not records:
+        print(f"No stored evaluation for jd={jd_sha256[:12]} cv={cv_sha256[:12]}.", file=sys.stderr)
+        return 1
+    for record in records if args.all else records[-1:]:
+        print(json.dumps(record, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
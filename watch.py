@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from jd_resume_evaluator.cli import (
+    add_budget_args,
+    add_cache_args,
+    add_engine_args,
+    budgets_from_args,
+    cache_from_args,
+    engine_config_from_args,
+)
+from jd_resume_evaluator.watch import IncrementalRunner, WatchCycle, watch
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Keep evaluations of every JD × CV pair up to date, re-running only pairs whose inputs "
+            "or settings changed."
+        )
+    )
+    parser.add_argument(
+        "--jobs",
+        nargs="+",
+        required=True,
+        help="JD files, directories, or glob patterns (e.g. 'job_box/').",
+    )
+    parser.add_argument(
+        "--cvs",
+        nargs="+",
+        required=True,
+        help="CV files, directories, or glob patterns (e.g. 'resume_box/').",
+    )
+    add_engine_args(parser)
+    add_budget_args(parser)
+    add_cache_args(parser)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=min(8, os.cpu_count() or 1),
+        help="Worker pool size for each re-evaluation batch.",
+    )
+    parser.add_argument(
+        "--executor",
+        default="thread",
+        choices=["thread", "process", "async"],
+        help="Worker pool type (as in batch.py).",
+    )
+    parser.add_argument(
+        "--out-dir",
+        default="outputs/jd_resume_watch",
+        help="Persistent results directory (manifest.json + results/); reused across runs.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=2.0,
+        help="Seconds between polls of the input files.",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=3.0,
+        help="Wait until inputs have been unchanged this many seconds before re-evaluating.",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Run one incremental pass and exit (e.g. from cron) instead of watching.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    runner = IncrementalRunner(
+        Path(args.out_dir),
+        jobs=args.jobs,
+        cvs=args.cvs,
+        budgets=budgets_from_args(args),
+        config=engine_config_from_args(args),
+        workers=args.workers,
+        executor_kind=args.executor,
+        cache=cache_from_args(args),
+    )
+
+    def report(cycle: WatchCycle) -> None:
+        line = (
+            f"[watch] {cycle.pairs_run} pair(s) evaluated, {cycle.pairs_unchanged} unchanged, "
+            f"{cycle.pairs_removed} removed"
+        )
+        if cycle.summary is not None:
+            line += f" ({cycle.summary.pairs_failed} failed, {cycle.summary.seconds:.2f}s)"
+        print(line, file=sys.stderr)
+
+    if args.once:
+        cycle = runner.run_once()
+        report(cycle)
+        print(str(runner.out_dir))
+        return 0 if cycle.summary is None or cycle.summary.pairs_failed == 0 else 1
+
+    print(f"Watching {' '.join(args.jobs)} × {' '.join(args.cvs)} → {runner.out_dir}", file=sys.stderr)
+    try:
+        watch(runner, interval=args.interval, debounce=args.debounce, on_cycle=report)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+from jd_resume_evaluator.batch import PairOutcome
+from jd_resume_evaluator.cli import add_cache_args, cache_from_args
+from jd_resume_evaluator.work_queue import QueuedJob, WorkQueue, default_worker_id, run_worker
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Claim jobs from a coordinator.py work queue under time-limited leases and evaluate them. "
+            "Run any number of these, on any number of hosts."
+        )
+    )
+    parser.add_argument("--queue", default="outputs/work_queue.sqlite", help="Queue database (see coordinator.py).")
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=min(8, os.cpu_count() or 1),
+        help="Jobs evaluated (and leased) at once by this process.",
+    )
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=300.0,
+        help="Lease length; renewed while a job runs, so it only bounds how long a crashed worker's jobs wait.",
+    )
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds between claims when idle.")
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Keep polling for new jobs instead of exiting once the queue is drained.",
+    )
+    parser.add_argument(
+        "--openai-api-key",
+        default=os.environ.get("OPENAI_API_KEY"),
+        help="API key for LLM jobs (or set OPENAI_API_KEY); keys are never stored in the queue.",
+    )
+    parser.add_argument("--worker-id", default=None, help="Lease owner name (default: hostname + random suffix).")
+    add_cache_args(parser)
+    parser.add_argument("--quiet", action="store_true", help="Do not print per-job progress to stderr.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    worker_id = args.worker_id or default_worker_id()
+
+    def report(job: QueuedJob, outcome: PairOutcome, recorded: bool) -> None:
+        if args.quiet:
+            return
+        status = "ok" if outcome.ok else f"failed (attempt {job.attempts}): {outcome.error}"
+        note = "" if recorded else " [dropped: finished elsewhere or lease lost]"
+        print(f"[{worker_id}] job {job.id} {status} in {outcome.seconds:.2f}s{note}", file=sys.stderr)
+
+    def report_error(operation: str, error: sqlite3.Error, failures: int) -> None:
+        print(f"[{worker_id}] queue {operation} failed ({failures} in a row): {error}; retrying", file=sys.stderr)
+
+    with WorkQueue(Path(args.queue)) as queue:
+        try:
+            evaluated = run_worker(
+                queue,
+                worker_id=worker_id,
+                threads=args.threads,
+                lease_seconds=args.lease_seconds,
+                poll_interval=args.poll_interval,
+                follow=args.follow,
+                openai_api_key=args.openai_api_key,
+                cache=cache_from_args(args),
+                on_result=report,
+                on_error=report_error,
+            )
+        except KeyboardInterrupt:
+            evaluated = None
+        except RuntimeError as e:
+            print(f"[{worker_id}] {e}", file=sys.stderr)
+            return 1
+        stats = queue.stats()
+    print(json.dumps({"worker_id": worker_id, "evaluated": evaluated, "queue": stats}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())